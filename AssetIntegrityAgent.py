@@ -1,31 +1,26 @@
+import hashlib
 import pandas as pd
 import random
 from datetime import datetime, timedelta
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
-
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+from genai import chat_completion
+import fallback_advisories
+from capital_planning import CostCatalog, capital_plan
+from degradation_sim import DegradationSimulator
 
 # -------------------------
 # Utility: Generate Assets
 # -------------------------
-def generate_assets():
+def generate_assets(fleet_size=None):
     equipment_types = {
         "Pump": 30, "Compressor": 10, "Turbine": 5,
         "Heat Exchanger": 10, "Tank": 10, "Vessel": 5,
         "Pipeline": 15, "Motor": 10, "Control Panel": 5,
         "Sensor": 40
     }
+    if fleet_size is not None:
+        # Same type mix, scaled to the requested fleet size
+        drawn = random.choices(list(equipment_types), weights=list(equipment_types.values()), k=fleet_size)
+        equipment_types = {t: drawn.count(t) for t in equipment_types}
     assets = []
     id_counter = 1
     for eq_type, count in equipment_types.items():
@@ -49,16 +44,18 @@ def generate_assets():
 # -------------------------
 # Utility: GenAI Advisory
 # -------------------------
-def genai_advisory(prompt: str):
+def genai_advisory(prompt: str, fallback=None):
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        response = chat_completion(
+            agent="asset_integrity",
+            fallback=fallback,
             messages=[
                 {"role": "system", "content": "You are an asset integrity advisor."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            max_tokens=400
         )
-        return response.choices[0].message.content.strip()
+        return response.strip()
     except Exception as e:
         return f"⚠️ GenAI Error: {e}"
 
@@ -66,16 +63,20 @@ def genai_advisory(prompt: str):
 # Asset Integrity Agent
 # -------------------------
 class AssetIntegrityAgent:
-    def __init__(self):
-        self.assets_df = generate_assets()
+    def __init__(self, fleet_size=None):
+        self.assets_df = generate_assets(fleet_size)
+        # Unit replacement costs by type (CSV via ASSET_COST_CATALOG, else one quote per type)
+        self.cost_catalog = CostCatalog.from_env()
+        self._simulation = None
+        self._simulation_key = None
 
     def overview(self):
         return {
             "description": "AI-powered Asset Integrity Agent with modules for asset health, RUL, corrosion, failures, compliance, costs, and work orders.",
             "modules": [
                 "Asset Register", "Lifespan Estimator", "Corrosion Simulator",
-                "Failure Mode Predictor", "Field Report Summarizer",
-                "Regulatory Watch", "Replacement Cost Forecast", "Work Order Optimizer"
+                "Failure Mode Predictor", "Degradation Simulator", "Field Report Summarizer",
+                "Regulatory Watch", "Replacement Cost Forecast", "Capital Planner", "Work Order Optimizer"
             ]
         }
 
@@ -97,24 +98,53 @@ RUL: {sample['RUL (months)']} months
 Explain why this asset's RUL is low and suggest next steps."""
             advisories.append({
                 "asset": sample["Asset ID"],
-                "advisory": genai_advisory(prompt)
+                "advisory": genai_advisory(prompt, lambda: fallback_advisories.asset(sample))
             })
         return {"low_rul_assets": low_rul_df.to_dict(orient="records"), "advisories": advisories}
 
+    # Content hash of the register, so a replaced or edited frame is never mistaken for the simulated one
+    def register_digest(self):
+        rows = pd.util.hash_pandas_object(self.assets_df, index=True).to_numpy()
+        return hashlib.sha1(rows.tobytes() + "\0".join(map(str, self.assets_df.columns)).encode("utf-8")).hexdigest()
+
+    # Month-by-month stochastic projection of the whole fleet; reused until the register or settings change
+    def degradation_forecast(self, months=60, trials=1000, seed=None):
+        key = (self.register_digest(), months, trials, seed)
+        if self._simulation_key != key:
+            self._simulation = DegradationSimulator(months=months, trials=trials, seed=seed).run(self.assets_df)
+            self._simulation_key = key
+        return self._simulation
+
+    def degradation_simulator(self, months=60, trials=1000):
+        sim = self.degradation_forecast(months, trials)
+        return {
+            "assets": sim["assets"].to_dict(orient="records"),
+            "failures_by_month": sim["failures_by_month"].to_dict(orient="records")
+        }
+
+    # Register joined with the simulated projections
+    def _projected(self):
+        sim = self.degradation_forecast()["assets"]
+        return self.assets_df.assign(**{c: sim[c].to_numpy() for c in sim.columns.drop(["Asset ID", "Type"])})
+
     def corrosion_simulator(self):
-        corroding = self.assets_df.sort_values("Corrosion Level", ascending=False).head(5)
+        corroding = self._projected().sort_values("Projected Corrosion Level", ascending=False).head(5)
         advisories = []
         for _, row in corroding.iterrows():
-            prompt = f"Asset {row['Asset ID']} has corrosion level {row['Corrosion Level']}. Suggest mitigation strategy."
-            advisories.append({"asset": row["Asset ID"], "advisory": genai_advisory(prompt)})
+            prompt = (f"Asset {row['Asset ID']} has corrosion level {row['Corrosion Level']}, projected to reach "
+                      f"{row['Projected Corrosion Level']} within 60 months. Suggest mitigation strategy.")
+            advisories.append({"asset": row["Asset ID"], "advisory": genai_advisory(prompt, lambda: fallback_advisories.asset(row))})
         return {"top_corroding": corroding.to_dict(orient="records"), "advisories": advisories}
 
     def failure_mode_predictor(self):
-        risky = self.assets_df.sort_values("Degradation %", ascending=False).head(5)
+        risky = self._projected().sort_values(["Failure Prob (12m)", "Degradation %"], ascending=False).head(5)
         advisories = []
         for _, row in risky.iterrows():
-            prompt = f"Predict failure modes for {row['Asset ID']} ({row['Type']}) with degradation {row['Degradation %']}%."
-            advisories.append({"asset": row["Asset ID"], "advisory": genai_advisory(prompt)})
+            prompt = (f"Predict failure modes for {row['Asset ID']} ({row['Type']}) with degradation {row['Degradation %']}%. "
+                      f"Simulated failure probability within 12 months is {row['Failure Prob (12m)']:.0%}; "
+                      f"median failure in {row['Failure Month P50']} months (P10 {row['Failure Month P10']}, "
+                      f"P90 {row['Failure Month P90']}).")
+            advisories.append({"asset": row["Asset ID"], "advisory": genai_advisory(prompt, lambda: fallback_advisories.asset(row))})
         return {"risky_assets": risky.to_dict(orient="records"), "advisories": advisories}
 
     def field_report_summary(self, note: str):
@@ -126,36 +156,39 @@ Explain why this asset's RUL is low and suggest next steps."""
     def regulatory_watch(self):
         sample = self.assets_df.sample(1).iloc[0]
         prompt = f"The asset {sample['Asset ID']} is {sample['Age (years)']} years old with degradation {sample['Degradation %']}%, in {sample['Location']}. Predict compliance risks."
-        return {"asset": sample["Asset ID"], "advisory": genai_advisory(prompt)}
+        return {"asset": sample["Asset ID"], "advisory": genai_advisory(prompt, lambda: fallback_advisories.asset(sample))}
 
     def replacement_cost_forecast(self):
-        def get_equipment_cost(eq_type):
-            catalog = {
-                "Pump": random.randint(5000, 15000),
-                "Compressor": random.randint(20000, 60000),
-                "Turbine": random.randint(40000, 120000),
-                "Tank": random.randint(15000, 40000),
-                "Sensor": random.randint(500, 3000),
-                "Pipeline": random.randint(10000, 30000),
-                "Motor": random.randint(8000, 20000),
-                "Control Panel": random.randint(5000, 15000),
-                "Heat Exchanger": random.randint(10000, 25000),
-                "Vessel": random.randint(12000, 35000)
-            }
-            return catalog.get(eq_type, 10000)
-
         low_rul = self.assets_df[self.assets_df["RUL (months)"] <= 6]
         if low_rul.empty:
             return {"message": "No assets nearing end of life"}
-        low_rul["Replacement Cost ($)"] = low_rul["Type"].apply(get_equipment_cost)
-        low_rul["Replace By"] = pd.to_datetime('today') + pd.to_timedelta(low_rul["RUL (months)"] * 30, unit='D')
-        total = low_rul["Replacement Cost ($)"].sum()
-        prompt = f"In the next 6 months, assets totaling ${total} are due for replacement. Provide a capital planning summary."
+        low_rul = low_rul.assign(**{
+            "Replacement Cost (£)": self.cost_catalog.lookup(low_rul["Type"]),
+            "Replace By": pd.to_datetime('today') + pd.to_timedelta(low_rul["RUL (months)"] * 30, unit='D')
+        })
+        total = low_rul["Replacement Cost (£)"].sum()
+        prompt = f"In the next 6 months, assets totaling £{total:,.0f} are due for replacement. Provide a capital planning summary."
         return {
             "assets_due": low_rul.to_dict(orient="records"),
             "capital_summary": genai_advisory(prompt)
         }
 
+    # Fleet-wide replacement cash flows by month ("M") or quarter ("Q"), optionally budget-constrained
+    def capital_planner(self, horizon_months=60, freq="Q", budget_per_period=None):
+        schedule, cash_flow, summary = capital_plan(self.assets_df, self.cost_catalog, horizon_months=horizon_months,
+                                                    freq=freq, budget_per_period=budget_per_period)
+        prompt = f"""Replacement capital plan over {horizon_months} months:
+{summary}
+Cash flow by period:
+{cash_flow.head(12).to_string(index=False)}
+Provide a capital planning summary: funding peaks, deferral risk and recommended budget changes."""
+        return {
+            "summary": summary,
+            "cash_flow": cash_flow.to_dict(orient="records"),
+            "schedule": schedule.sort_values("Priority").to_dict(orient="records"),
+            "capital_summary": genai_advisory(prompt, lambda: fallback_advisories.capital(summary))
+        }
+
     def work_order_optimizer(self):
         critical_assets = self.assets_df[self.assets_df["RUL (months)"] <= 3]
         if critical_assets.empty:
@@ -173,7 +206,7 @@ Corrosion: {sample['Corrosion Level']}
 Suggest optimal technician type and urgency."""
         return {
             "critical_assets": critical_assets.to_dict(orient="records"),
-            "work_order": genai_advisory(prompt)
+            "work_order": genai_advisory(prompt, lambda: fallback_advisories.asset(sample))
         }
 
     def run(self, action: str, **kwargs):
@@ -185,7 +218,10 @@ Suggest optimal technician type and urgency."""
             "failure_mode": self.failure_mode_predictor,
             "field_report": lambda: self.field_report_summary(kwargs.get("note", "")),
             "regulatory": self.regulatory_watch,
+            "degradation_sim": lambda: self.degradation_simulator(kwargs.get("months", 60), kwargs.get("trials", 1000)),
             "replacement_cost": self.replacement_cost_forecast,
+            "capital_plan": lambda: self.capital_planner(kwargs.get("horizon_months", 60), kwargs.get("freq", "Q"),
+                                                         kwargs.get("budget_per_period")),
             "work_order": self.work_order_optimizer
         }
         if action in mapping:
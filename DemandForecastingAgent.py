@@ -1,41 +1,60 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
+from genai import chat_completion
+import fallback_advisories
+from demand_model import SeasonalDemandModel
+from demand_store import interval_index, intraday_shape, is_sub_daily, step, downsample
 import random
 
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-
 # -------------------------
 # Demand Forecasting Agent
 # -------------------------
 class DemandForecastingAgent:
-    def __init__(self):
-        pass
-
-    # Step 1: Generate historical demand data
-    def historical_data(self, start="2020-01-01", end="2024-12-31"):
-        date_rng = pd.date_range(start=start, end=end, freq="D")
-        seasonal_trend = 200 * np.sin(2 * np.pi * date_rng.dayofyear / 365.25)
+    # resolution: "D" (daily) or a sub-daily step such as "30min" or "15min"
+    def __init__(self, resolution="D"):
+        self.resolution = resolution
+        # One model per resolution, fitted on the history and updated in place as new intervals are appended
+        self.models = {}
+        # Demand history per resolution, kept across runs and extended with new intervals only
+        self.histories = {}
+
+    def model(self, resolution=None):
+        resolution = resolution or self.resolution
+        if resolution not in self.models:
+            self.models[resolution] = SeasonalDemandModel(daily_harmonics=4 if is_sub_daily(resolution) else 0)
+        return self.models[resolution]
+
+    # Step 1: Generate historical demand data (float32 MW per interval)
+    def historical_data(self, start="2020-01-01", end="2024-12-31", resolution=None):
+        date_rng = interval_index(start, end, resolution or self.resolution)
+        seasonal_trend = 200 * np.sin(2 * np.pi * date_rng.dayofyear.to_numpy() / 365.25)
         random_noise = np.random.normal(0, 50, len(date_rng))
         load_values = 1200 + seasonal_trend + random_noise
-        df = pd.DataFrame({"date": date_rng, "load": load_values.astype(int)})
+        if is_sub_daily(resolution or self.resolution):
+            load_values *= intraday_shape(date_rng)
+        df = pd.DataFrame({"date": date_rng, "load": load_values.astype(np.float32)})
         return df
 
+    # History up to yesterday: generated once, then only the intervals since the last run
+    # are appended, so the model sees an extension of what it fitted and updates in place
+    def history(self, resolution=None, start="2020-01-01"):
+        resolution = resolution or self.resolution
+        end = pd.Timestamp.today().normalize() - pd.Timedelta(days=1)
+        hist_df = self.histories.get(resolution)
+        if hist_df is None:
+            hist_df = self.historical_data(start=start, end=end, resolution=resolution)
+        else:
+            following = hist_df["date"].iloc[-1] + step(resolution)
+            if following < end + pd.Timedelta(days=1):
+                new = self.historical_data(start=following, end=end, resolution=resolution)
+                hist_df = pd.concat([hist_df, new], ignore_index=True)
+        self.histories[resolution] = hist_df
+        return hist_df
+
     # Step 2: Aggregated trends + GenAI insight
     def aggregated_trends(self, hist_df):
-        agg_df = hist_df.groupby("date").agg({"load": "sum"}).reset_index()
+        agg_df = downsample(hist_df, "D").astype({"load": np.float64}).round({"load": 1})
         sample_preview = agg_df.head(10).to_string(index=False)
         prompt = f"""
         Analyze the following historical electricity demand trends:
@@ -45,8 +64,10 @@ class DemandForecastingAgent:
         Summarize key patterns, risks, and implications for future planning.
         """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="demand_forecasting",
+                priority="low",
+                fallback=lambda: fallback_advisories.demand_trends(agg_df),
                 messages=[
                     {"role": "system", "content": "You are an energy demand analyst."},
                     {"role": "user", "content": prompt},
@@ -54,7 +75,7 @@ class DemandForecastingAgent:
                 max_tokens=250,
                 temperature=0.4,
             )
-            insight = resp.choices[0].message.content
+            insight = resp
         except Exception as e:
             insight = f"⚠️ GenAI error: {e}"
         return {"aggregated": agg_df.to_dict(orient="records"), "genai_insight": insight}
@@ -85,8 +106,10 @@ class DemandForecastingAgent:
         Describe how demand may evolve under this scenario and suggest operational strategies.
         """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="demand_forecasting",
+                priority="low",
+                fallback=lambda: fallback_advisories.demand_scenario(scenario_prompt),
                 messages=[
                     {"role": "system", "content": "You are a scenario modeling expert for energy utilities."},
                     {"role": "user", "content": prompt},
@@ -94,17 +117,27 @@ class DemandForecastingAgent:
                 max_tokens=300,
                 temperature=0.5,
             )
-            narrative = resp.choices[0].message.content
+            narrative = resp
         except Exception as e:
             narrative = f"⚠️ GenAI error: {e}"
         return narrative
 
     # Step 5: Forecast generation with scenarios
-    def forecast(self, horizon_days=30):
-        future_dates = pd.date_range(datetime.today(), periods=horizon_days, freq="D")
-        base_forecast = 1300 + 100 * np.sin(2 * np.pi * future_dates.dayofyear / 365.25)
-        noise = np.random.normal(0, 30, len(future_dates))
-        forecast_base = base_forecast + noise
+    def forecast(self, horizon_days=30, hist_df=None, resolution=None):
+        resolution = resolution or self.resolution
+        model = self.model(resolution)
+        if hist_df is not None:
+            model.fit_or_update(hist_df["date"], hist_df["load"])
+        elif model.coef is None:
+            hist_df = self.historical_data(resolution=resolution)
+            model.fit(hist_df["date"], hist_df["load"])
+        if is_sub_daily(resolution):
+            future_dates = pd.date_range(pd.Timestamp.today().normalize(),
+                                         periods=int(horizon_days * pd.Timedelta(days=1) / step(resolution)),
+                                         freq=resolution)
+        else:
+            future_dates = pd.date_range(datetime.today(), periods=horizon_days, freq="D")
+        forecast_base = model.predict(future_dates)
 
         # Scenario adjustments
         forecast_cold_wave = forecast_base * 1.2
@@ -113,10 +146,10 @@ class DemandForecastingAgent:
 
         df = pd.DataFrame({
             "date": future_dates,
-            "base_case": forecast_base.astype(int),
-            "cold_wave": forecast_cold_wave.astype(int),
-            "recession": forecast_recession.astype(int),
-            "supply_shock": forecast_supply_shock.astype(int)
+            "base_case": forecast_base,
+            "cold_wave": forecast_cold_wave,
+            "recession": forecast_recession,
+            "supply_shock": forecast_supply_shock
         })
         return df
 
@@ -133,8 +166,9 @@ class DemandForecastingAgent:
         3. Provide recommendations for utility planners
         """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="demand_forecasting",
+                fallback=lambda: fallback_advisories.demand_forecast(forecast_df),
                 messages=[
                     {"role": "system", "content": "You are a UK energy grid analyst."},
                     {"role": "user", "content": prompt},
@@ -142,15 +176,17 @@ class DemandForecastingAgent:
                 max_tokens=300,
                 temperature=0.5,
             )
-            advisory = resp.choices[0].message.content
+            advisory = resp
         except Exception as e:
             advisory = f"⚠️ GenAI error: {e}"
         return advisory
 
     # Main run method (integrated with Agent 1 + Agent 2 outputs)
-    def run(self, assets, grid_exceptions, horizon_days=30):
+    def run(self, assets, grid_exceptions, horizon_days=30, resolution=None):
+        resolution = resolution or self.resolution
+
         # Step 1: Historical data
-        hist_df = self.historical_data()
+        hist_df = self.history(resolution)
 
         # Step 2: Aggregated trends
         agg = self.aggregated_trends(hist_df)
@@ -162,17 +198,26 @@ class DemandForecastingAgent:
         narrative = self.scenario_narrative(scenario, hist_df)
 
         # Step 5: Forecast
-        forecast_df = self.forecast(horizon_days)
+        interval_df = self.forecast(horizon_days, hist_df, resolution)
+        # Downstream agents plan in days: daily mean MW
+        forecast_df = downsample(interval_df, "D") if is_sub_daily(resolution) else interval_df
+        scenarios = forecast_df.columns.drop("date")
+        forecast_df = forecast_df.round(dict.fromkeys(scenarios, 0)).astype(dict.fromkeys(scenarios, int))
 
         # Step 6: Advisory
         advisory = self.forecast_advisory(forecast_df)
 
-        return {
+        result = {
             "agent": "demand_forecasting",
-            "historical_summary": f"{len(hist_df)} days of demand history generated.",
+            "resolution": resolution,
+            "historical_summary": f"{len(agg['aggregated'])} days of demand history generated.",
             "aggregated_trends": agg,
             "scenario_prompt": scenario,
             "scenario_narrative": narrative,
             "forecast": forecast_df.to_dict(orient="records"),
             "genai_advisory": advisory
         }
+        if is_sub_daily(resolution):
+            result["interval_forecast"] = interval_df.astype(dict.fromkeys(scenarios, np.float64)) \
+                .round(dict.fromkeys(scenarios, 1)).to_dict(orient="records")
+        return result
@@ -1,29 +1,91 @@
 import pandas as pd
-import random
+import numpy as np
 from datetime import datetime
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
+from genai import chat_completion
+import fallback_advisories
+from order_book import MarketSimulator
 
 # -------------------------
-# Setup Azure OpenAI client
+# Portfolio risk engine
 # -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+class RiskEngine:
+    def __init__(self, n_paths=10000, demand_sd=0.03, supply_sd=0.045,
+                 price_mean=55.0, price_vol=0.15, correlation=None, seed=None):
+        self.n_paths = n_paths
+        self.demand_sd = demand_sd    # ~±5% demand forecast error
+        self.supply_sd = supply_sd    # ~±8% supply inefficiency
+        self.price_mean = price_mean  # £/MWh
+        self.price_vol = price_vol
+        # demand error, supply error, price shock
+        self.correlation = np.array(correlation if correlation is not None else [
+            [1.0, 0.1, 0.6],
+            [0.1, 1.0, -0.4],
+            [0.6, -0.4, 1.0]
+        ])
+        self._chol = np.linalg.cholesky(self.correlation)
+        self.rng = np.random.default_rng(seed)
+
+    # (n_paths x 3) correlated standard normal shocks
+    def shocks(self):
+        return self.rng.standard_normal((self.n_paths, 3)) @ self._chol.T
+
+    def simulate(self, demand, supply):
+        z = self.shocks()
+        demand_paths = demand * (1 + self.demand_sd * z[:, 0])
+        supply_paths = supply * (1 + self.supply_sd * z[:, 1])
+        price_paths = self.price_mean * np.exp(self.price_vol * z[:, 2] - 0.5 * self.price_vol ** 2)
+        return demand_paths, supply_paths, price_paths
+
+    # buffer: share of the gap between the expected balance and its (1 - confidence)
+    # quantile that is held back on top of the expected imbalance
+    def evaluate(self, demand, supply, confidence=0.95, buffer=0.5):
+        demand_paths, supply_paths, price_paths = self.simulate(demand, supply)
+        balance = supply_paths - demand_paths
+
+        # Unhedged imbalance settled at the simulated price; losses are positive
+        loss = -balance * price_paths
+        var = np.quantile(loss, confidence)
+        cvar = loss[loss >= var].mean()
+
+        low, median, high = np.quantile(balance, [1 - confidence, 0.5, confidence])
+        expected = float(balance.mean())
+        var_buffer = buffer * (expected - float(low))
+        return {
+            "paths": self.n_paths,
+            "confidence": confidence,
+            "expected_balance_mwh": round(expected, 1),
+            "balance_low_mwh": round(float(low), 1),
+            "balance_median_mwh": round(float(median), 1),
+            "balance_high_mwh": round(float(high), 1),
+            "deficit_probability": round(float((balance < 0).mean()), 4),
+            "var_gbp": round(float(var), 2),
+            "cvar_gbp": round(float(cvar), 2),
+            "expected_price": round(float(price_paths.mean()), 2),
+            "var_buffer_mwh": round(var_buffer, 1),
+            # Expected deficit plus the buffer / expected surplus less the buffer
+            "hedge_buy_mwh": int(max(0.0, -expected + var_buffer)),
+            "hedge_sell_mwh": int(max(0.0, expected - var_buffer))
+        }
+
 
 # -------------------------
 # Energy Trading Agent
 # -------------------------
 class EnergyTradingAgent:
-    def __init__(self):
-        pass
-
-    # Market position based on dispatch vs demand
+    # deficit_threshold: buy only when a deficit is at least this likely, sell only when a
+    # surplus is; a balanced book (deficit probability ~0.5) holds
+    # max_slippage: £/MWh a limit price may cross the reference price by
+    def __init__(self, confidence=0.95, n_paths=10000, deficit_threshold=0.6, var_buffer=0.5,
+                 min_trade_mwh=50, max_slippage=1.0, seed=None):
+        self.confidence = confidence
+        self.deficit_threshold = deficit_threshold
+        self.var_buffer = var_buffer
+        self.min_trade_mwh = min_trade_mwh
+        self.max_slippage = max_slippage
+        self.risk_engine = RiskEngine(n_paths=n_paths, seed=seed)
+        self.market = MarketSimulator(seed=seed)
+
+    # Market position based on dispatch vs demand, over simulated demand/supply/price paths
     def calculate_position(self, demand_forecast, dispatch_plan):
         if not demand_forecast or not dispatch_plan:
             return {"surplus_deficit_mwh": 0, "recommendation": "HOLD"}
@@ -32,47 +94,58 @@ class EnergyTradingAgent:
         demand = sum([d.get("base_case", 1000) for d in demand_forecast[:5]])
         supply = sum([p.get("renewables_mw", 0) + p.get("backup_mw", 0) for p in dispatch_plan[:5]])
 
-        # Apply forecast error and reserve margin
-        forecast_error = random.uniform(-0.05, 0.05)  # ±5% demand forecast error
-        reserve_margin = random.uniform(-0.08, 0.08)  # ±8% supply inefficiency
-
-        adjusted_demand = int(demand * (1 + forecast_error))
-        adjusted_supply = int(supply * (1 + reserve_margin))
-
-        balance = adjusted_supply - adjusted_demand
-
-        # Add buffer so tiny noise doesn't cause false buy/sell
-        if balance > 50:
-            rec = f"Sell {abs(balance)} MWh"
-        elif balance < -50:
-            rec = f"Buy {abs(balance)} MWh"
+        risk = self.risk_engine.evaluate(demand, supply, self.confidence, self.var_buffer)
+        balance = int(round(risk["expected_balance_mwh"]))
+
+        # Trade only on a likely imbalance, and not for tiny volumes
+        if risk["deficit_probability"] > self.deficit_threshold and risk["hedge_buy_mwh"] > self.min_trade_mwh:
+            hedge = risk["hedge_buy_mwh"]
+            rec = f"Buy {hedge} MWh"
+        elif 1 - risk["deficit_probability"] > self.deficit_threshold \
+                and risk["hedge_sell_mwh"] > self.min_trade_mwh:
+            hedge = risk["hedge_sell_mwh"]
+            rec = f"Sell {hedge} MWh"
         else:
+            hedge = 0
             rec = "HOLD"
 
         return {
             "surplus_deficit_mwh": balance,
-            "recommendation": rec
+            "hedge_volume_mwh": hedge,
+            "recommendation": rec,
+            "risk": risk
         }
 
-    # Generate trade orders
+    # Reference price for a delivery date: the mid of the book the order will trade on,
+    # else the risk engine's expected price
+    def reference_price(self, delivery_date, market_position):
+        mid = self.market.open_session(delivery_date).mid()
+        if mid is not None:
+            return mid
+        return market_position.get("risk", {}).get("expected_price", self.risk_engine.price_mean)
+
+    # Generate trade orders, limit-priced up to max_slippage through the reference price
     def generate_orders(self, market_position):
         orders = []
-        if "Buy" in market_position["recommendation"]:
-            orders.append({
-                "type": "BUY",
-                "volume_mwh": abs(market_position["surplus_deficit_mwh"]),
-                "price": round(random.uniform(40, 60), 2),
-                "delivery_date": str(datetime.today().date())
-            })
-        elif "Sell" in market_position["recommendation"]:
+        rec = market_position["recommendation"]
+        if "Buy" in rec or "Sell" in rec:
+            side = "BUY" if "Buy" in rec else "SELL"
+            delivery_date = str(datetime.today().date())
+            reference = self.reference_price(delivery_date, market_position)
             orders.append({
-                "type": "SELL",
-                "volume_mwh": abs(market_position["surplus_deficit_mwh"]),
-                "price": round(random.uniform(50, 70), 2),
-                "delivery_date": str(datetime.today().date())
+                "type": side,
+                "volume_mwh": market_position.get("hedge_volume_mwh", abs(market_position["surplus_deficit_mwh"])),
+                "price": round(reference + (self.max_slippage if side == "BUY" else -self.max_slippage), 2),
+                "delivery_date": delivery_date
             })
         return orders
 
+    # Simulated execution against the local order book
+    def simulate_execution(self, orders):
+        for order in orders:
+            self.market.open_session(order["delivery_date"])
+        return self.market.execute(orders)
+
     # Risk adjustments based on faults & supply chain
     def risk_adjustments(self, grid_exceptions, supply_chain, field_ops):
         risks = []
@@ -104,13 +177,14 @@ Provide:
 4. Clear executive-level recommendation
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="energy_trading",
+                fallback=lambda: fallback_advisories.trading(market_position, orders, risks),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
                 temperature=0.4
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Advisory error: {e}"
 
@@ -122,16 +196,20 @@ Provide:
         # Step 2: Trade orders
         orders = self.generate_orders(market_position)
 
-        # Step 3: Risks
+        # Step 3: Simulated execution
+        executions = self.simulate_execution(orders)
+
+        # Step 4: Risks
         risks = self.risk_adjustments(grid_exceptions, supply_chain, field_ops)
 
-        # Step 4: GenAI summary
+        # Step 5: GenAI summary
         summary = self.advisory(market_position, orders, risks)
 
         return {
             "agent": "energy_trading",
             "market_position": market_position,
             "buy_sell_orders": orders,
+            "executions": executions,
             "risk_adjustments": risks,
             "genai_advisory": summary
         }
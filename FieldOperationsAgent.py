@@ -1,33 +1,90 @@
 import pandas as pd
 import random
 import datetime
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
+from genai import chat_completion
+import fallback_advisories
+import re
+from field_dispatch import TechnicianRoster, AssignmentEngine, RoutePlanner
 
 # -------------------------
-# Setup Azure OpenAI client
+# Equipment -> spare part index
 # -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+# Alternate part-name tokens per equipment type, tried when the equipment name
+# itself does not appear in any part of the catalog
+EQUIPMENT_ALIASES = {
+    "Transformer": ["transformer", "coil", "bushing"],
+    "Generator": ["generator", "exciter", "rotor", "turbine"],
+    "Circuit Breaker": ["breaker", "switchgear", "fuse", "switch"],
+    "Inverter": ["inverter", "gateway"],
+    "Relay": ["relay"],
+    "Smart Meter": ["meter"],
+}
+
+
+def _tokenize(name):
+    return [t for t in re.split(r"[^a-z0-9]+", str(name).lower()) if t]
+
+
+class PartIndex:
+    def __init__(self, supply_chain, aliases=None):
+        self.parts = list(supply_chain or [])
+        self.aliases = EQUIPMENT_ALIASES if aliases is None else aliases
+        self._positions = {}
+        self._cache = {}
+        for pos, part in enumerate(self.parts):
+            for token in set(_tokenize(part.get("Part Name", ""))):
+                self._positions.setdefault(token, []).append(pos)
+
+    # First catalog position whose part name contains every token
+    def _match(self, tokens):
+        if not tokens:
+            return None
+        candidates = None
+        for token in tokens:
+            positions = self._positions.get(token)
+            if not positions:
+                return None
+            candidates = set(positions) if candidates is None else candidates & set(positions)
+            if not candidates:
+                return None
+        return min(candidates)
+
+    def lookup(self, equipment):
+        if equipment in self._cache:
+            return self._cache[equipment]
+
+        pos = self._match(_tokenize(equipment))
+        if pos is None:
+            alias_hits = [self._match(_tokenize(a)) for a in self.aliases.get(equipment, [])]
+            alias_hits = [p for p in alias_hits if p is not None]
+            pos = min(alias_hits) if alias_hits else None
+
+        part = self.parts[pos] if pos is not None else None
+        self._cache[equipment] = part
+        return part
+
 
 # -------------------------
 # Field Operations Agent
 # -------------------------
 class FieldOperationsAgent:
     def __init__(self):
-        # Dummy technician pool (would come from HR/roster in production)
-        self.technicians = [
-            {"name": "Technician Smith", "skills": ["Transformer", "Relay"], "zone": "Zone A"},
-            {"name": "Technician Patel", "skills": ["Generator", "Breaker"], "zone": "Zone B"},
-            {"name": "Technician Wang", "skills": ["Inverter", "Smart Meter"], "zone": "Zone C"},
-            {"name": "Technician Singh", "skills": ["Pipeline", "Compressor"], "zone": "Zone D"}
-        ]
+        # Technician roster (CSV via FIELD_TECHNICIAN_ROSTER, else the default pool)
+        self.roster = TechnicianRoster.from_env()
+        self.technicians = self.roster.technicians
+        self.assignment_engine = AssignmentEngine(self.roster)
+        self.route_planner = RoutePlanner()
+        self._work_order_seq = 0
+        self._part_index = None
+        self._part_index_key = None
+
+    # Build the part index once per supply-chain snapshot
+    def part_index(self, supply_chain):
+        key = tuple(p.get("Part Name", "") for p in supply_chain or [])
+        if self._part_index is None or key != self._part_index_key:
+            self._part_index = PartIndex(supply_chain)
+            self._part_index_key = key
+        return self._part_index
 
     # Step 1: Simulate new faults based on assets and grid exceptions
     def simulate_faults(self, assets, grid_exceptions, n=5):
@@ -47,28 +104,31 @@ class FieldOperationsAgent:
             })
         return pd.DataFrame(faults)
 
-    # Step 2: Assign technician to a fault
+    # Step 2: Assign technicians to a batch of faults (min-cost matching)
+    def assign_technicians(self, faults):
+        assignment = self.assignment_engine.assign(faults)
+        for i, fault in enumerate(faults):
+            if i in assignment:
+                fault["technician"] = self.technicians[assignment[i]]["name"]
+                fault["status"] = "Assigned"
+        return faults
+
     def assign_technician(self, fault):
-        available = [t for t in self.technicians if fault["equipment"] in t["skills"]]
-        if available:
-            tech = random.choice(available)
-        else:
-            tech = random.choice(self.technicians)
-        fault["technician"] = tech["name"]
-        fault["status"] = "Assigned"
-        return fault
+        return self.assign_technicians([fault])[0]
 
     # Step 3: Work order generation
     def generate_work_orders(self, faults_df, supply_chain):
         work_orders = []
-        for _, row in faults_df.iterrows():
-            fault = row.to_dict()
-            fault = self.assign_technician(fault)
+        index = self.part_index(supply_chain)
+        faults = self.assign_technicians(faults_df.to_dict(orient="records"))
+        for fault in faults:
+            self._work_order_seq += 1
 
             # Check if spare part exists in supply chain forecast
-            needed_part = next((p for p in supply_chain if row["equipment"] in p["Part Name"]), None)
+            needed_part = index.lookup(fault["equipment"])
 
             work_orders.append({
+                "work_order_id": f"WO-{self._work_order_seq:04d}",
                 "asset_id": fault.get("asset_id", "N/A"),
                 "fault_code": fault["fault_code"],
                 "equipment": fault["equipment"],
@@ -79,7 +139,22 @@ class FieldOperationsAgent:
             })
         return work_orders
 
-    # Step 4: GenAI risk & field advisory
+    # Step 4: Sequence each technician's jobs
+    def plan_routes(self, work_orders):
+        return self.route_planner.plan(work_orders, self.technicians)
+
+    # Re-optimize the current routes for newly arrived faults
+    def dispatch_new_faults(self, faults_df, supply_chain):
+        work_orders = self.generate_work_orders(faults_df, supply_chain)
+        return work_orders, self.route_planner.add_jobs(work_orders, self.technicians)
+
+    # Completed work: frees technician capacity and drops the sites from the travel-time matrix
+    def close_work_orders(self, work_order_ids):
+        closed = self.route_planner.close_jobs(work_order_ids)
+        self.roster.release(self.roster.name_index[tech] for tech in closed.values())
+        return self.route_planner.itineraries()
+
+    # Step 5: GenAI risk & field advisory
     def advisory(self, work_orders, dispatch_plan):
         sample = pd.DataFrame(work_orders).head(5).to_string(index=False)
         dispatch_preview = pd.DataFrame(dispatch_plan).head(3).to_string(index=False)
@@ -99,24 +174,31 @@ Provide:
 4. Clear field guidance for the next 24h
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="field_operations",
+                priority="high",
+                fallback=lambda: fallback_advisories.field_operations(work_orders),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
                 temperature=0.5
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Advisory error: {e}"
 
-    # Step 5: Main run
+    # Step 6: Main run (a new dispatch cycle; dispatch_new_faults adds to it)
     def run(self, assets, grid_exceptions, demand_forecast, renewable_plan, dispatch_plan, supply_chain):
+        self.roster.reset()
+
         # Simulate faults
         faults_df = self.simulate_faults(assets, grid_exceptions, n=5)
 
         # Generate work orders
         work_orders = self.generate_work_orders(faults_df, supply_chain)
 
+        # Route planning
+        routes = self.plan_routes(work_orders)
+
         # GenAI advisory
         advisory = self.advisory(work_orders, dispatch_plan)
 
@@ -124,5 +206,6 @@ Provide:
             "agent": "field_operations",
             "faults": faults_df.to_dict(orient="records"),
             "work_orders": work_orders,
+            "routes": routes,
             "genai_field_advisory": advisory
         }
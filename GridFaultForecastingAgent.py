@@ -1,29 +1,19 @@
+import os
 import pandas as pd
 import random
+import contextvars
 from datetime import datetime
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+from concurrent.futures import ThreadPoolExecutor
+from genai import chat_completion
+import fallback_advisories
 
 # -------------------------
 # Grid Fault Forecasting Agent
 # -------------------------
 class GridFaultForecastingAgent:
     def __init__(self):
-        pass
+        # Concurrent analyze_event calls; events of the same class share one GenAI request
+        self.event_workers = int(os.getenv("GRID_EVENT_WORKERS", 8))
 
     # Always simulate events from assets
     def simulate_events_from_assets(self, assets):
@@ -42,25 +32,34 @@ class GridFaultForecastingAgent:
                 })
         return pd.DataFrame(events)
 
-    # Root cause + advisory
+    @staticmethod
+    def load_band(load):
+        if load > 100:
+            return "above 100 MW"
+        return "80-100 MW" if load > 80 else "80 MW or below"
+
+    # Root cause + advisory. The prompt only carries the event class (substation, type,
+    # fault code, load band), so concurrent events of the same class coalesce into one
+    # GenAI request; the asset and exact load stay on the exception record.
     def analyze_event(self, row_dict):
         prompt = (
             f"You are a grid reliability assistant. Analyze this simulated grid event:\n\n"
-            f"Asset: {row_dict.get('asset_id')}\n"
             f"Substation: {row_dict.get('substation')}\n"
             f"Event Type: {row_dict.get('event_type')}\n"
             f"Fault Code: {row_dict.get('fault_code')}\n"
-            f"Load (MW): {row_dict.get('load_MW')}\n\n"
+            f"Load: {self.load_band(row_dict.get('load_MW') or 0)}\n\n"
             f"Provide a short root cause analysis and preventive action."
         )
         try:
-            response = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            response = chat_completion(
+                agent="grid_fault_forecasting",
+                priority="high",
+                fallback=lambda: fallback_advisories.grid_event(row_dict),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=200,
                 temperature=0.4,
             )
-            return response.choices[0].message.content
+            return response
         except Exception as e:
             return f"⚠️ Error: {e}"
 
@@ -74,13 +73,15 @@ class GridFaultForecastingAgent:
             f"Sample Data:\n{exceptions_df[['event_type','substation','fault_code','load_MW']].head(10).to_string(index=False)}"
         )
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="grid_fault_forecasting",
+                priority="low",
+                fallback=lambda: fallback_advisories.grid_summary(exceptions_df),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=250,
                 temperature=0.4,
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Summary Error: {e}"
 
@@ -94,13 +95,15 @@ class GridFaultForecastingAgent:
             f"Data:\n{exceptions_df[['event_type','substation','fault_code','load_MW']].head(10).to_string(index=False)}"
         )
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="grid_fault_forecasting",
+                priority="low",
+                fallback=lambda: fallback_advisories.grid_summary(exceptions_df),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300,
                 temperature=0.4,
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Insight Error: {e}"
 
@@ -120,8 +123,9 @@ Recent Simulated Events:
 {df[['timestamp','substation','event_type','fault_code','load_MW']].tail(20).to_string(index=False)}
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="grid_fault_forecasting",
+                fallback=lambda: fallback_advisories.grid_forecast(df),
                 messages=[
                     {"role": "system", "content": "You forecast grid issues and recommend parts inventory."},
                     {"role": "user", "content": prompt}
@@ -129,10 +133,23 @@ Recent Simulated Events:
                 max_tokens=500,
                 temperature=0.4,
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Forecast Error: {e}"
 
+    # Load-based KMeans clustering of events
+    def cluster_events(self, events_df):
+        if events_df.empty or "load_MW" not in events_df.columns:
+            return []
+        # sklearn is slow to import; only pay for it when there is something to cluster
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.cluster import KMeans
+        scaler = StandardScaler()
+        scaled_features = scaler.fit_transform(events_df[['load_MW']].fillna(0))
+        kmeans = KMeans(n_clusters=3, random_state=42)
+        events_df['cluster'] = kmeans.fit_predict(scaled_features)
+        return events_df[['substation', 'event_type', 'load_MW', 'cluster']].to_dict(orient="records")
+
     # Main Run
     def run(self, assets):
         if not assets:
@@ -144,10 +161,16 @@ Recent Simulated Events:
         exceptions = []
         for _, row in events_df.iterrows():
             if row.get("event_type") in ["Outage", "Overload", "RelayTrip"] or row.get("load_MW", 0) > 80:
-                advisory = self.analyze_event(row.to_dict())
-                record = row.to_dict()
-                record["GenAI Advisory"] = advisory
-                exceptions.append(record)
+                exceptions.append(row.to_dict())
+
+        # Events of one class are submitted back to back so they are in flight together and
+        # coalesce; each worker call runs in a copy of this context (trace, budget, deadline)
+        ordered = sorted(exceptions, key=lambda e: (str(e.get("substation")), str(e.get("event_type")),
+                                                    str(e.get("fault_code")), self.load_band(e.get("load_MW") or 0)))
+        with ThreadPoolExecutor(max(1, self.event_workers)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self.analyze_event, record) for record in ordered]
+        for record, future in zip(ordered, futures):
+            record["GenAI Advisory"] = future.result()
 
         exceptions_df = pd.DataFrame(exceptions)
 
@@ -165,13 +188,7 @@ Recent Simulated Events:
             repetitive = repeat_faults[repeat_faults['count'] > 1].to_dict(orient="records")
 
         # Clustering
-        clusters = []
-        if not events_df.empty and "load_MW" in events_df.columns:
-            scaler = StandardScaler()
-            scaled_features = scaler.fit_transform(events_df[['load_MW']].fillna(0))
-            kmeans = KMeans(n_clusters=3, random_state=42)
-            events_df['cluster'] = kmeans.fit_predict(scaled_features)
-            clusters = events_df[['substation', 'event_type', 'load_MW', 'cluster']].to_dict(orient="records")
+        clusters = self.cluster_events(events_df)
 
         return {
             "simulated_events": events_df.to_dict(orient="records"),
@@ -1,22 +1,9 @@
 import pandas as pd
 import numpy as np
-import requests
 import random
 from datetime import datetime
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
-
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+from genai import chat_completion
+import fallback_advisories
 
 # -------------------------
 # Renewable Integration Agent
@@ -27,6 +14,7 @@ class RenewableIntegrationAgent:
 
     # Weather forecast (10 hrs, via Open-Meteo)
     def fetch_weather_forecast(self, lat=51.5, lon=-0.1):
+        import requests
         url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=temperature_2m,windspeed_10m,shortwave_radiation&forecast_days=1&timezone=auto"
         try:
             response = requests.get(url)
@@ -108,19 +96,20 @@ You are a renewable integration advisor. Analyze the following demand vs renewab
 4. Provide concise advisory for utility planners
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="renewable_integration",
+                fallback=lambda: fallback_advisories.renewable_plan(plan),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300,
                 temperature=0.4
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Advisory error: {e}"
 
     # Main run
-    def run(self, demand_forecast, grid_exceptions, assets=None):
-        weather_df = self.fetch_weather_forecast()
+    def run(self, demand_forecast, grid_exceptions, assets=None, lat=51.5, lon=-0.1):
+        weather_df = self.fetch_weather_forecast(lat=lat, lon=lon)
         sensor_df = self.simulate_live_sensors()
         prediction_df = self.predict_output(weather_df, sensor_df)
 
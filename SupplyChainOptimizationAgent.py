@@ -1,20 +1,8 @@
 import pandas as pd
 import random
 import datetime
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
-
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+from genai import chat_completion
+import fallback_advisories
 
 # -------------------------
 # Supply Chain Optimization Agent
@@ -86,13 +74,14 @@ Dispatch Plan (from Energy Management): {dispatch_plan[:3]}
 4. Provide executive summary
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="supply_chain_optimization",
+                fallback=lambda: fallback_advisories.supply_chain(df, vendor_df),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=350,
                 temperature=0.4
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ GenAI error: {e}"
 
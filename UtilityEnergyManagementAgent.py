@@ -1,22 +1,10 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
+from genai import chat_completion
+import fallback_advisories
 import random
 
-# -------------------------
-# Setup Azure OpenAI client
-# -------------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-
 # -------------------------
 # Utility Energy Management Agent
 # -------------------------
@@ -97,13 +85,14 @@ Carbon Outlook: {carbon}
 Provide a concise management summary with recommended actions.
 """
         try:
-            resp = client.chat.completions.create(
-                model=DEPLOYMENT_NAME,
+            resp = chat_completion(
+                agent="utility_energy_management",
+                fallback=lambda: fallback_advisories.dispatch_summary(plan, load_shift, efficiency, carbon),
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300,
                 temperature=0.4
             )
-            return resp.choices[0].message.content
+            return resp
         except Exception as e:
             return f"⚠️ Summary error: {e}"
 
@@ -0,0 +1,167 @@
+import os
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from order_book import MarketSimulator
+
+# -------------------------
+# Historical inputs
+# -------------------------
+def build_history(start="2020-01-01", end="2024-12-31", seed=42):
+    from DemandForecastingAgent import DemandForecastingAgent
+
+    np.random.seed(seed)
+    hist = DemandForecastingAgent().historical_data(start=start, end=end)
+    rng = np.random.default_rng(seed)
+    n = len(hist)
+    doy = hist["date"].dt.dayofyear.to_numpy()
+
+    # Renewables: winter wind, summer solar, plus weather noise
+    renewables = 180 + 60 * np.cos(2 * np.pi * doy / 365.25) + rng.normal(0, 40, n)
+    hist["renewables_mw"] = np.clip(renewables, 0, None).round(1)
+    # Imbalance price tracks demand stress
+    stress = (hist["load"] - hist["load"].mean()) / hist["load"].std()
+    hist["spot_price"] = (55 * np.exp(0.1 * stress + rng.normal(0, 0.12, n))).round(2)
+    return hist
+
+
+# -------------------------
+# Worker
+# -------------------------
+_agent = None
+
+
+def _init_worker(confidence, n_paths):
+    global _agent
+    import genai
+    from EnergyTradingAgent import EnergyTradingAgent
+    # Backtests never call the LLM
+    genai.set_client(genai.OfflineClient())
+    _agent = EnergyTradingAgent(confidence=confidence, n_paths=n_paths)
+
+
+# window: `lag` days already settled, then the `horizon` days being traded. Backup is
+# committed ahead from the settled days' mean net load (load less renewables), so it
+# does not see the traded days' demand and the book can be long or short.
+def _replay_day(window, seed, horizon, forecast_error):
+    rng = np.random.default_rng(seed)
+    _agent.risk_engine.rng = rng
+    # Fresh seeded market per replay: orders are priced off its book
+    _agent.market = MarketSimulator(seed=seed)
+
+    settled, days = window[:-horizon], window[-horizon:]
+    backup_mw = max(0.0, float(np.mean([d["load"] - d["renewables_mw"] for d in settled])))
+    demand_forecast, dispatch_plan = [], []
+    for d in days:
+        base_case = int(d["load"] * (1 + rng.normal(0, forecast_error)))
+        renewables = max(0.0, d["renewables_mw"] * (1 + rng.normal(0, 0.15)))
+        demand_forecast.append({"date": str(d["date"].date()), "base_case": base_case})
+        dispatch_plan.append({"renewables_mw": renewables, "backup_mw": backup_mw})
+
+    position = _agent.calculate_position(demand_forecast, dispatch_plan)
+    orders = _agent.generate_orders(position)
+
+    # Realized balance: planned backup plus actual renewables against actual load
+    realized = sum(p["backup_mw"] for p in dispatch_plan) + sum(d["renewables_mw"] for d in days) \
+        - sum(d["load"] for d in days)
+    spot = float(np.mean([d["spot_price"] for d in days]))
+
+    signed_volume, pnl = 0.0, 0.0
+    for o in orders:
+        sign = 1 if o["type"] == "BUY" else -1
+        signed_volume += sign * o["volume_mwh"]
+        pnl += sign * o["volume_mwh"] * (spot - o["price"])
+
+    direction = np.sign(signed_volume)
+    return {
+        "date": str(days[0]["date"].date()),
+        "recommendation": position["recommendation"],
+        "traded_mwh": signed_volume,
+        "realized_balance_mwh": round(realized, 1),
+        "residual_imbalance_mwh": round(realized + signed_volume, 1),
+        "spot_price": round(spot, 2),
+        "trade_pnl": round(pnl, 2),
+        # Hit: bought ahead of a real deficit or sold a real surplus
+        "hit": bool(direction != 0 and direction == -np.sign(realized))
+    }
+
+
+def _replay_chunk(windows, seeds, horizon, forecast_error):
+    return [_replay_day(w, s, horizon, forecast_error) for w, s in zip(windows, seeds)]
+
+
+# -------------------------
+# Backtest runner
+# -------------------------
+class Backtester:
+    # lag: days of settled history the backup schedule is planned from
+    def __init__(self, workers=None, confidence=0.95, n_paths=10000, horizon=5, lag=7,
+                 forecast_error=0.03, chunks_per_worker=4, seed=42):
+        self.workers = workers or os.cpu_count() or 1
+        self.confidence = confidence
+        self.n_paths = n_paths
+        self.horizon = horizon
+        self.lag = lag
+        self.forecast_error = forecast_error
+        self.chunks_per_worker = chunks_per_worker
+        self.seed = seed
+
+    def _tasks(self, history):
+        records = history.to_dict(orient="records")
+        span = self.lag + self.horizon
+        windows = [records[i:i + span] for i in range(len(records) - span + 1)]
+        seeds = [self.seed + i for i in range(len(windows))]
+        size = max(1, -(-len(windows) // (self.workers * self.chunks_per_worker)))
+        for i in range(0, len(windows), size):
+            yield windows[i:i + size], seeds[i:i + size]
+
+    def run(self, history):
+        started = time.perf_counter()
+        rows = []
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.confidence, self.n_paths)) as pool:
+            futures = [pool.submit(_replay_chunk, w, s, self.horizon, self.forecast_error)
+                       for w, s in self._tasks(history)]
+            for f in futures:
+                rows.extend(f.result())
+
+        daily = pd.DataFrame(rows)
+        return {"daily": daily, "metrics": self.metrics(daily, time.perf_counter() - started)}
+
+    def metrics(self, daily, elapsed):
+        if daily.empty:
+            return {"days": 0}
+        traded = daily[daily["traded_mwh"] != 0]
+        pnl = daily["trade_pnl"]
+        return {
+            "days": len(daily),
+            "days_traded": len(traded),
+            "hit_rate": round(float(traded["hit"].mean()), 4) if len(traded) else None,
+            "total_pnl": round(float(pnl.sum()), 2),
+            "mean_daily_pnl": round(float(pnl.mean()), 2),
+            "pnl_sharpe": round(float(pnl.mean() / pnl.std() * np.sqrt(365)), 3) if pnl.std() > 0 else None,
+            "worst_day_pnl": round(float(pnl.min()), 2),
+            "mean_abs_residual_mwh": round(float(daily["residual_imbalance_mwh"].abs().mean()), 1),
+            "workers": self.workers,
+            "elapsed_s": round(elapsed, 2)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical days through the trading pipeline.")
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--out", default=None, help="Optional CSV path for the per-day results")
+    args = parser.parse_args()
+
+    history = build_history(args.start, args.end)
+    result = Backtester(workers=args.workers, n_paths=args.paths).run(history)
+    if args.out:
+        result["daily"].to_csv(args.out, index=False)
+    print(result["metrics"])
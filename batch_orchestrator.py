@@ -0,0 +1,177 @@
+import os
+import json
+import random
+import argparse
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from result_serializer import dumps_json
+
+# Example regions; pass --regions regions.json to override
+DEFAULT_REGIONS = [
+    {"name": "London", "company_type": "Integrated Utility", "lat": 51.5, "lon": -0.1},
+    {"name": "Manchester", "company_type": "Distribution Operator", "lat": 53.5, "lon": -2.2},
+    {"name": "Glasgow", "company_type": "Transmission Operator", "lat": 55.9, "lon": -4.3},
+    {"name": "Cardiff", "company_type": "Generation Company", "lat": 51.5, "lon": -3.2}
+]
+
+# -------------------------
+# Shared LLM slots across worker processes
+# -------------------------
+class _ThrottledCompletions:
+    def __init__(self, client, slots):
+        self._client = client
+        self._slots = slots
+
+    def create(self, **kwargs):
+        completions = self._client.inner().chat.completions
+        with self._slots:
+            return completions.create(**kwargs)
+
+
+class _ThrottledChat:
+    def __init__(self, client, slots):
+        self.completions = _ThrottledCompletions(client, slots)
+
+
+# factory builds the wrapped client on the first create(), so missing credentials or a
+# failing endpoint fail that call (and its agent falls back) rather than the worker
+class ThrottledClient:
+    def __init__(self, factory, slots):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+        self.chat = _ThrottledChat(self, slots)
+
+    def inner(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+
+def _init_worker(llm_slots, workers, client_factory):
+    import genai
+    from rate_limiter import PriorityScheduler
+    genai.set_client(ThrottledClient(client_factory or genai.build_client, llm_slots))
+    # Each worker gets an equal share of the deployment's RPM/TPM quota
+    rpm, tpm = os.getenv("GENAI_RPM"), os.getenv("GENAI_TPM")
+    if rpm or tpm:
+        genai.set_scheduler(PriorityScheduler(rpm=max(1, int(rpm) // workers) if rpm else None,
+                                              tpm=max(1, int(tpm) // workers) if tpm else None))
+
+
+def _run_region(region):
+    from orchestrator import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent()
+    if "seed" in region:
+        random.seed(region["seed"])
+        np.random.seed(region["seed"])
+        # The trading agent's risk engine and order book draw from their own generators
+        from EnergyTradingAgent import EnergyTradingAgent
+        orchestrator.trading_agent = EnergyTradingAgent(seed=region["seed"])
+    params = {k: region[k] for k in OrchestratorAgent.DEFAULT_PARAMS if k in region}
+
+    started = time.perf_counter()
+    results = orchestrator.run(**params)
+    return region["name"], results, time.perf_counter() - started
+
+
+# -------------------------
+# Consolidated report
+# -------------------------
+def region_summary(name, results, elapsed):
+    assets = results.get("AssetIntegrity") or []
+    forecast = (results.get("DemandForecast") or {}).get("forecast") or []
+    parts = (results.get("SupplyChainOptimization") or {}).get("parts_forecast") or []
+    work_orders = (results.get("FieldOperations") or {}).get("work_orders") or []
+    position = (results.get("EnergyTrading") or {}).get("market_position") or {}
+    return {
+        "region": name,
+        "assets": len(assets),
+        "low_rul_assets": sum(1 for a in assets if a.get("RUL (months)", 99) <= 6),
+        "grid_exceptions": len(results.get("GridFaults") or []),
+        "peak_forecast_mw": max((d.get("base_case", 0) for d in forecast), default=0),
+        "part_shortages": sum(1 for p in parts if p.get("Expected Shortage", 0) > 0),
+        "work_orders": len(work_orders),
+        "unassigned_work_orders": sum(1 for w in work_orders if w.get("status") != "Assigned"),
+        "trading_position_mwh": position.get("surplus_deficit_mwh", 0),
+        "trading_recommendation": position.get("recommendation", "HOLD"),
+        "trading_var_gbp": (position.get("risk") or {}).get("var_gbp"),
+        "runtime_s": round(elapsed, 2)
+    }
+
+
+def consolidate(region_results):
+    rows = [region_summary(name, results, elapsed) for name, (results, elapsed) in region_results.items()]
+    df = pd.DataFrame(rows)
+    totals = {}
+    if not df.empty:
+        numeric = ["assets", "low_rul_assets", "grid_exceptions", "part_shortages",
+                   "work_orders", "unassigned_work_orders", "trading_position_mwh", "trading_var_gbp"]
+        for c in numeric:
+            total = float(pd.to_numeric(df[c], errors="coerce").fillna(0).sum())
+            totals[c] = int(total) if total.is_integer() else round(total, 2)
+        totals["regions"] = len(df)
+    return {"by_region": df.to_dict(orient="records"), "totals": totals}
+
+
+# -------------------------
+# Batch orchestrator
+# -------------------------
+class BatchOrchestrator:
+    # client_factory: picklable zero-argument callable building each worker's GenAI client
+    # (e.g. genai.OfflineClient); the Azure client by default
+    def __init__(self, max_workers=None, llm_concurrency=8, client_factory=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.llm_concurrency = llm_concurrency
+        self.client_factory = client_factory
+
+    def run(self, regions):
+        # Results are keyed by region name
+        names = [r["name"] for r in regions]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate region names: {', '.join(map(str, duplicates))}")
+        started = time.perf_counter()
+        ctx = multiprocessing.get_context()
+        llm_slots = ctx.BoundedSemaphore(self.llm_concurrency)
+
+        region_results = {}
+        workers = min(self.max_workers, len(regions)) or 1
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(llm_slots, workers, self.client_factory)) as pool:
+            futures = [pool.submit(_run_region, region) for region in regions]
+            for future in as_completed(futures):
+                name, results, elapsed = future.result()
+                region_results[name] = (results, elapsed)
+
+        # Keep the caller's region order
+        ordered = {r["name"]: region_results[r["name"]] for r in regions}
+        report = consolidate(ordered)
+        report["elapsed_s"] = round(time.perf_counter() - started, 2)
+        return {"regions": {name: res for name, (res, _) in ordered.items()}, "consolidated": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the orchestrator for several regions in parallel.")
+    parser.add_argument("--regions", default=None, help="JSON file with a list of region configs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    regions = DEFAULT_REGIONS
+    if args.regions:
+        with open(args.regions) as f:
+            regions = json.load(f)
+
+    batch = BatchOrchestrator(max_workers=args.workers, llm_concurrency=args.llm_concurrency)
+    output = batch.run(regions)
+    print(dumps_json(output["consolidated"], indent=2))
@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+import genai
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def timed(fn, repeats, seed):
+    # Warm-up run pays one-off import and cache costs
+    seed_all(seed)
+    fn()
+    timings = []
+    for _ in range(repeats):
+        seed_all(seed)
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    # Benchmarks may report counters from their last run next to the timings
+    return {"median_s": round(statistics.median(timings), 5), "min_s": round(min(timings), 5),
+            **getattr(fn, "stats", {})}
+
+
+# -------------------------
+# Seeded inputs
+# -------------------------
+def make_assets(n, seed):
+    from AssetIntegrityAgent import generate_assets
+    seed_all(seed)
+    return generate_assets(fleet_size=n).to_dict(orient="records")
+
+
+def make_weather(lat=51.5, lon=-0.1):
+    # Fixed 10-hour weather frame instead of calling Open-Meteo
+    hours = pd.date_range("2024-06-01 00:00", periods=10, freq="h")
+    return pd.DataFrame({
+        "time": hours,
+        "temperature_2m": np.linspace(12, 21, 10),
+        "windspeed_10m": np.linspace(8, 14, 10),
+        "shortwave_radiation": np.linspace(0, 450, 10)
+    })
+
+
+def make_parts(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Part Name": [f"Part {i}" for i in range(n)],
+        "Installed Base": rng.integers(50, 300, n),
+        "Stock": rng.integers(1, 20, n),
+        "Lead Time (days)": rng.choice([7, 14, 21, 28], n),
+        "Failure Rate": rng.uniform(0.01, 0.15, n).round(2)
+    })
+
+
+# -------------------------
+# Benchmarks (each takes a size and returns a zero-arg callable)
+# -------------------------
+def bench_simulate_events(n, seed):
+    from GridFaultForecastingAgent import GridFaultForecastingAgent
+    agent, assets = GridFaultForecastingAgent(), make_assets(n, seed)
+    return lambda: agent.simulate_events_from_assets(assets)
+
+
+def bench_kmeans(n, seed):
+    from GridFaultForecastingAgent import GridFaultForecastingAgent
+    agent = GridFaultForecastingAgent()
+    seed_all(seed)
+    events = agent.simulate_events_from_assets(make_assets(n, seed))
+    return lambda: agent.cluster_events(events.copy())
+
+
+def bench_historical_data(n, seed):
+    from DemandForecastingAgent import DemandForecastingAgent
+    agent = DemandForecastingAgent()
+    # n = days of history
+    end = (pd.Timestamp("2020-01-01") + pd.Timedelta(days=n - 1)).date().isoformat()
+    return lambda: agent.historical_data(start="2020-01-01", end=end)
+
+
+def bench_demand_forecast(n, seed):
+    from DemandForecastingAgent import DemandForecastingAgent
+    agent = DemandForecastingAgent()
+    seed_all(seed)
+    # n = days of history; a fresh model each call measures the full fit
+    end = (pd.Timestamp("2020-01-01") + pd.Timedelta(days=n - 1)).date().isoformat()
+    hist = agent.historical_data(start="2020-01-01", end=end)
+
+    def run():
+        agent.models.clear()
+        agent.forecast(horizon_days=365, hist_df=hist)
+    return run
+
+
+# The store is ~11 KB per feeder-month at 15 minutes; sizes above this reuse the cap so
+# the benchmark stays in memory (the stats report the feeder count actually used)
+MAX_FEEDERS = 10_000
+
+
+def bench_feeder_store(n, seed):
+    from demand_store import FeederLoadStore
+    # n = feeders with 30 days of 15-minute load: daily peaks, system total and peak intervals
+    feeders = min(n, MAX_FEEDERS)
+    store = FeederLoadStore.simulate(feeders, start="2024-01-01", end="2024-01-30", resolution="15min", seed=seed)
+
+    def run():
+        store.downsample("D", how="max")
+        store.total()
+        store.peaks()
+    run.stats = {"feeders": feeders, "store_mb": round(store.nbytes / 2 ** 20, 1),
+                 "bytes_per_feeder_year": int(store.bytes_per_feeder_year())}
+    return run
+
+
+def bench_reorder_plan(n, seed):
+    from SupplyChainOptimizationAgent import SupplyChainOptimizationAgent
+    agent = SupplyChainOptimizationAgent()
+    parts = agent.forecast_parts(make_parts(n, seed))
+    return lambda: agent.reorder_plan(parts.copy())
+
+
+def bench_work_orders(n, seed):
+    from FieldOperationsAgent import FieldOperationsAgent
+    agent = FieldOperationsAgent()
+    seed_all(seed)
+    faults = agent.simulate_faults([], [], n=n)
+    supply_chain = [{"Part Name": p} for p in ["Universal Switchgear", "Multi-purpose Relay", "Hybrid Transformer"]]
+
+    # Each repeat is a fresh dispatch cycle with the whole roster's capacity
+    def run():
+        agent.roster.reset()
+        return agent.generate_work_orders(faults.copy(), supply_chain)
+    return run
+
+
+# Effectively unlimited run budget: the default one skips most GenAI calls on large
+# fleets, and the benchmark would time the skip path instead of the pipeline
+UNLIMITED_TOKENS = 10 ** 12
+UNLIMITED_COST = 10.0 ** 9
+
+
+def bench_full_run(n, seed):
+    from orchestrator import OrchestratorAgent
+    from AssetIntegrityAgent import AssetIntegrityAgent
+    seed_all(seed)
+    fleet = AssetIntegrityAgent(fleet_size=n)
+
+    def run():
+        orch = OrchestratorAgent(token_budget=UNLIMITED_TOKENS, cost_budget=UNLIMITED_COST)
+        orch.asset_agent = fleet
+        orch.renewable_agent.fetch_weather_forecast = make_weather
+        orch.run()
+        calls = [attrs for _, cat, _, _, _, attrs in orch.last_trace.spans if cat == "llm"]
+        run.stats = {
+            "llm_calls": len(calls),
+            "llm_skipped": sum(1 for a in calls if a.get("skipped")),
+            "llm_coalesced": sum(1 for a in calls if a.get("coalesced"))
+        }
+    run.stats = {}
+    return run
+
+
+BENCHMARKS = {
+    "simulate_events_from_assets": bench_simulate_events,
+    "kmeans_clustering": bench_kmeans,
+    "historical_data": bench_historical_data,
+    "demand_forecast": bench_demand_forecast,
+    "feeder_store": bench_feeder_store,
+    "reorder_plan": bench_reorder_plan,
+    "generate_work_orders": bench_work_orders,
+    "orchestrator_run": bench_full_run
+}
+
+
+# -------------------------
+# Runner
+# -------------------------
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def run_suite(names, sizes, repeats, seed, budget_s):
+    results = {}
+    for name in names:
+        results[name] = {}
+        for n in sizes:
+            fn = BENCHMARKS[name](n, seed)
+            results[name][str(n)] = timed(fn, repeats, seed)
+            print(f"{name:<30} n={n:<9} {results[name][str(n)]}", flush=True)
+            # Skip larger sizes once a size blows the per-benchmark budget
+            if results[name][str(n)]["median_s"] * repeats > budget_s:
+                for bigger in [s for s in sizes if s > n]:
+                    results[name][str(bigger)] = {"skipped": f"over {budget_s}s budget"}
+                break
+    return results
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, by_size in current.items():
+        for size, res in by_size.items():
+            old = baseline.get(name, {}).get(size, {})
+            if "median_s" in res and "median_s" in old and old["median_s"] > 0:
+                ratio = res["median_s"] / old["median_s"]
+                flag = "REGRESSION" if ratio > 1 + threshold else ""
+                print(f"{name:<30} n={size:<9} {old['median_s']:.5f}s -> {res['median_s']:.5f}s  x{ratio:.2f} {flag}")
+                if flag:
+                    regressions.append((name, size, round(ratio, 2)))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the orchestrator pipeline with GenAI stubbed out.")
+    parser.add_argument("--only", nargs="*", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget", type=float, default=120.0, help="Seconds per benchmark before larger sizes are skipped")
+    parser.add_argument("--out", default=None, help="Result JSON path (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown ratio flagged as a regression")
+    args = parser.parse_args()
+
+    genai.set_client(genai.OfflineClient())
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "results": run_suite(args.only, sorted(args.sizes), args.repeats, args.seed, args.budget)
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
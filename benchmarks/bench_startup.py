@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start scenarios, each timed in a fresh interpreter
+SCENARIOS = {
+    # What importing orchestrator used to cost: every agent module up front
+    "eager_agents": "import AssetIntegrityAgent, GridFaultForecastingAgent, DemandForecastingAgent, "
+                    "RenewableIntegrationAgent, UtilityEnergyManagementAgent, SupplyChainOptimizationAgent, "
+                    "FieldOperationsAgent, EnergyTradingAgent",
+    "import_orchestrator": "import orchestrator",
+    "construct_orchestrator": "import orchestrator; orchestrator.OrchestratorAgent()",
+    "first_agent": "import orchestrator; orchestrator.OrchestratorAgent().asset_agent",
+    "import_dashboard": "import orchestrator_dashboard"
+}
+
+
+def time_scenario(code, repeats):
+    timings = []
+    for _ in range(repeats):
+        script = f"import time; t = time.perf_counter(); {code}; print(time.perf_counter() - t)"
+        out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"median_ms": round(statistics.median(timings) * 1000, 1), "min_ms": round(min(timings) * 1000, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the orchestrator.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", default=None, help="Subset of scenarios to run")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = time_scenario(code, args.repeats)
+        print(f"{name:<24} {results[name]}")
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,143 @@
+import os
+import random
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Replacement cost catalog
+# -------------------------
+# Unit replacement cost ranges by equipment type; the default catalog quotes one
+# price per type when it is built, instead of re-drawing for every asset
+DEFAULT_COST_RANGES = {
+    "Pump": (5000, 15000),
+    "Compressor": (20000, 60000),
+    "Turbine": (40000, 120000),
+    "Tank": (15000, 40000),
+    "Sensor": (500, 3000),
+    "Pipeline": (10000, 30000),
+    "Motor": (8000, 20000),
+    "Control Panel": (5000, 15000),
+    "Heat Exchanger": (10000, 25000),
+    "Vessel": (12000, 35000)
+}
+DEFAULT_UNIT_COST = 10000
+
+PERIODS_PER_YEAR = {"M": 12, "Q": 4}
+
+
+class CostCatalog:
+    def __init__(self, costs, default=DEFAULT_UNIT_COST):
+        self.types = pd.Index(list(costs))
+        # Last slot holds the default for unknown types
+        self.costs = np.append(np.array(list(costs.values()), dtype=np.float64), default)
+
+    @classmethod
+    def quote(cls, ranges=None):
+        ranges = ranges or DEFAULT_COST_RANGES
+        return cls({t: random.randint(low, high) for t, (low, high) in ranges.items()})
+
+    @classmethod
+    def from_csv(cls, path):
+        # Expected columns: type, cost
+        df = pd.read_csv(path)
+        return cls(dict(zip(df["type"], df["cost"])))
+
+    @classmethod
+    def from_env(cls, path=None):
+        path = path or os.getenv("ASSET_COST_CATALOG")
+        if path and os.path.exists(path):
+            return cls.from_csv(path)
+        return cls.quote()
+
+    def lookup(self, types):
+        codes = self.types.get_indexer(pd.Index(types))
+        return self.costs[np.where(codes < 0, len(self.costs) - 1, codes)]
+
+    def to_dict(self):
+        return dict(zip(self.types, self.costs[:-1].tolist()))
+
+
+# -------------------------
+# Capital plan
+# -------------------------
+# Every asset is due for replacement when its RUL runs out. Under a per-period budget,
+# due work is funded in due order (most degraded first within a period) and whatever
+# does not fit slips to later periods; unspent budget carries forward. Budgets are in
+# today's money; planned costs are escalated to the period they fall in. The schedule
+# is one sort and one cumulative sum over the fleet.
+def capital_plan(assets_df, catalog, horizon_months=60, freq="Q", budget_per_period=None,
+                 escalation=0.03, start=None):
+    if freq not in PERIODS_PER_YEAR:
+        raise ValueError(f"Unknown planning frequency {freq}; choose from {', '.join(PERIODS_PER_YEAR)}")
+    start = pd.Timestamp(start or pd.Timestamp.today()).normalize()
+    first = start.to_period(freq)
+    n_periods = int(np.ceil(horizon_months * PERIODS_PER_YEAR[freq] / 12))
+
+    rul = assets_df["RUL (months)"].to_numpy(dtype=np.float64)
+    replace_by = start + pd.to_timedelta(rul * 30, unit="D")
+    # Overdue assets are due in the first period
+    due = np.maximum(replace_by.to_period(freq).asi8 - first.ordinal, 0)
+    base_cost = catalog.lookup(assets_df["Type"])
+
+    # Funding order: due period, then most degraded
+    order = np.lexsort((-assets_df["Degradation %"].to_numpy(dtype=np.float64), due))
+    if budget_per_period is not None:
+        cumulative = np.cumsum(base_cost[order])
+        if budget_per_period > 0:
+            # Spend through period p can not exceed (p + 1) budgets
+            earliest = np.ceil(cumulative / budget_per_period).astype(np.int64) - 1
+        else:
+            # Nothing is funded from a zero budget
+            earliest = np.full(len(order), n_periods, dtype=np.int64)
+        scheduled = np.empty_like(due)
+        scheduled[order] = np.maximum(due[order], earliest)
+    else:
+        scheduled = due.copy()
+    funded = scheduled < n_periods
+    growth = (1 + escalation) ** (1 / PERIODS_PER_YEAR[freq])
+    cost = base_cost * growth ** scheduled
+    priority = np.empty(len(order), dtype=np.int64)
+    priority[order] = np.arange(1, len(order) + 1)
+
+    labels = pd.period_range(first, periods=max(n_periods, int(scheduled.max(initial=0)) + 1), freq=freq) \
+        .astype(str).to_numpy()
+    schedule = assets_df.assign(**{
+        "Replacement Cost (£)": cost.round(2),
+        "Replace By": replace_by,
+        "Due Period": labels[due],
+        "Scheduled Period": np.where(funded, labels[scheduled], "Beyond horizon"),
+        "Deferred (periods)": scheduled - due,
+        "Funded": funded,
+        "Priority": priority
+    })
+
+    in_horizon = due < n_periods
+    due_cost = np.bincount(due[in_horizon], weights=(base_cost * growth ** due)[in_horizon], minlength=n_periods)
+    planned = np.bincount(scheduled[funded], weights=cost[funded], minlength=n_periods)
+    # Work due but not yet funded, in today's money
+    backlog = np.cumsum(np.bincount(due[in_horizon], weights=base_cost[in_horizon], minlength=n_periods)) \
+        - np.cumsum(np.bincount(scheduled[funded], weights=base_cost[funded], minlength=n_periods))
+    cash_flow = pd.DataFrame({
+        "period": labels[:n_periods],
+        "assets_due": np.bincount(due[in_horizon], minlength=n_periods),
+        "assets_replaced": np.bincount(scheduled[funded], minlength=n_periods),
+        "due_cost": due_cost.round(2),
+        "planned_cost": planned.round(2),
+        "cumulative_cost": planned.cumsum().round(2),
+        "backlog_cost": backlog.clip(min=0).round(2)
+    })
+    if budget_per_period is not None:
+        cash_flow["budget"] = float(budget_per_period)
+
+    summary = {
+        "frequency": freq,
+        "horizon_months": horizon_months,
+        "budget_per_period": budget_per_period,
+        "assets": int(len(schedule)),
+        "funded_assets": int(funded.sum()),
+        "deferred_assets": int(((scheduled > due) & funded).sum()),
+        "unfunded_assets": int((~funded).sum()),
+        "planned_cost": round(float(planned.sum()), 2),
+        "unfunded_cost": round(float(base_cost[~funded].sum()), 2)
+    }
+    return schedule, cash_flow, summary
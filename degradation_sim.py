@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Fleet degradation / corrosion simulation
+# -------------------------
+# Every asset is projected month by month over many trials as (asset x step x trial)
+# float32 blocks:
+#   corrosion    C[t] = min(1, C0 + r * t), r a lognormal per-trial rate around the type's rate
+#   degradation  D[t] = D0 + cumsum(max(0, wear * (1 + k * (C[t] - C0) + jitter)) + shocks)
+# jitter is uniform noise and shocks are rare exponential jumps, both taken from one
+# uniform draw per cell. Every term scales with the asset's monthly wear, so the paths
+# are drawn per unit of wear and wear is then set so the median path reaches 100% in the
+# RUL month: the P50 failure month is the RUL. The first month with D >= 100 is the
+# failure month. Assets are processed
+# in chunks sized to `memory_mb`, so fleet size only costs time.
+FAILURE_THRESHOLD = 100.0
+
+# Monthly corrosion growth by equipment type (Corrosion Level is 0-1)
+CORROSION_RATES = {
+    "Pipeline": 0.010, "Tank": 0.009, "Vessel": 0.008, "Heat Exchanger": 0.008,
+    "Pump": 0.005, "Compressor": 0.004, "Turbine": 0.004, "Motor": 0.003,
+    "Control Panel": 0.002, "Sensor": 0.002
+}
+DEFAULT_CORROSION_RATE = 0.005
+
+# Bytes per (asset, step, trial) cell: corrosion (reused as scratch), degradation and
+# uniform float32 blocks, plus a mask
+BYTES_PER_CELL = 13
+
+
+class DegradationSimulator:
+    def __init__(self, months=60, trials=1000, shock_prob=0.02, shock_scale=10.0, wear_noise=0.4,
+                 corrosion_noise=0.3, corrosion_coupling=1.5, memory_mb=256, workers=1, seed=None):
+        self.months = months
+        self.trials = trials
+        # Monthly shock probability; shock size is shock_scale months of expected wear on average
+        self.shock_prob = shock_prob
+        self.shock_scale = shock_scale
+        self.wear_noise = wear_noise
+        self.corrosion_noise = corrosion_noise
+        self.corrosion_coupling = corrosion_coupling
+        self.memory_mb = memory_mb
+        self.workers = workers
+        self.seed = seed
+
+    def chunk_size(self):
+        budget = self.memory_mb * 2 ** 20 // max(self.workers, 1)
+        return max(1, int(budget // (self.months * self.trials * BYTES_PER_CELL)))
+
+    # -------------------------
+    # One chunk of assets
+    # -------------------------
+    def _simulate_chunk(self, rng, degradation, corrosion, rul, corrosion_rate):
+        n, S, T = len(degradation), self.months, self.trials
+        c0 = corrosion.astype(np.float32)[:, None, None]
+        rate = corrosion_rate.astype(np.float32)[:, None, None]
+
+        # Corrosion paths
+        sigma = np.float32(self.corrosion_noise)
+        trial_rate = rng.standard_normal((n, 1, T), dtype=np.float32)
+        trial_rate *= sigma
+        trial_rate -= sigma * sigma / 2
+        np.exp(trial_rate, out=trial_rate)
+        trial_rate *= rate
+        C = np.multiply(trial_rate, np.arange(1, S + 1, dtype=np.float32)[None, :, None])
+        C += c0
+        np.minimum(C, 1, out=C)
+        corrosion_path = C.mean(axis=2)
+
+        # Wear grows with corrosion since the start; the mean wear without shocks is
+        # 1 - p * shock_scale, so shocks make up the rest of one unit on average
+        D = np.subtract(C, c0)
+        D *= np.float32(self.corrosion_coupling)
+        D += 1
+        D *= np.float32(1 - self.shock_prob * self.shock_scale)
+
+        # u < p is a shock (probability p); otherwise (u - p) / (1 - p) is uniform and
+        # gives the jitter, scaled to standard deviation wear_noise
+        p = np.float32(self.shock_prob)
+        U = rng.random((n, S, T), dtype=np.float32)
+        shock = U < p
+        jitter = C
+        np.subtract(U, p, out=jitter)
+        half_width = np.float32(np.sqrt(3) * self.wear_noise)
+        jitter *= 2 * half_width / (1 - p)
+        jitter -= half_width
+        np.copyto(jitter, 0, where=shock)
+        D += jitter
+        np.maximum(D, 0, out=D)
+
+        # Shock size: -log(u / p) is Exp(1) given u < p, and 0 otherwise
+        np.minimum(U, p, out=U)
+        np.maximum(U, np.finfo(np.float32).tiny, out=U)
+        U /= p
+        np.log(U, out=U)
+        U *= -np.float32(self.shock_scale)
+        D += U
+        np.cumsum(D, axis=1, out=D)
+
+        # Wear that puts the median path at the threshold in the RUL month (RULs past the
+        # horizon extend each trial's last monthly step). The order statistic just below
+        # the median keeps more than half the trials failing by then despite float32 rounding.
+        due = np.ceil(np.maximum(rul, 0.5)).astype(np.int64)
+        rows = np.arange(n)
+        at_due = D[rows, np.minimum(due, S) - 1]
+        beyond = np.maximum(due - S, 0).astype(np.float32)[:, None]
+        if beyond.any():
+            last_step = D[rows, S - 1] - (D[rows, S - 2] if S > 1 else 0)
+            at_due += beyond * last_step
+        median = np.partition(at_due, (T - 1) // 2, axis=1)[:, (T - 1) // 2]
+        wear = np.maximum(FAILURE_THRESHOLD - degradation, 0) / np.maximum(median, np.finfo(np.float32).tiny)
+        D *= wear.astype(np.float32)[:, None, None]
+        D += degradation.astype(np.float32)[:, None, None]
+
+        # Failure month per trial (S = survives the horizon)
+        failed = np.greater_equal(D, FAILURE_THRESHOLD, out=shock)
+        month = np.where(failed.any(axis=1), failed.argmax(axis=1), S)
+        hist = np.bincount((np.arange(n)[:, None] * (S + 1) + month).ravel(), minlength=n * (S + 1))
+
+        np.minimum(D, FAILURE_THRESHOLD, out=D)
+        return hist.reshape(n, S + 1), D.mean(axis=2), corrosion_path
+
+    # -------------------------
+    # Whole fleet
+    # -------------------------
+    def run(self, assets_df, start=None):
+        n, S = len(assets_df), self.months
+        degradation = assets_df["Degradation %"].to_numpy(dtype=np.float64)
+        corrosion = assets_df["Corrosion Level"].to_numpy(dtype=np.float64)
+        rul = assets_df["RUL (months)"].to_numpy(dtype=np.float64)
+        corrosion_rate = assets_df["Type"].map(CORROSION_RATES).fillna(DEFAULT_CORROSION_RATE).to_numpy()
+
+        hist = np.zeros((n, S + 1), dtype=np.int32)
+        degradation_path = np.empty((n, S), dtype=np.float32)
+        corrosion_path = np.empty((n, S), dtype=np.float32)
+        chunks = [slice(lo, min(lo + self.chunk_size(), n)) for lo in range(0, n, self.chunk_size())]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(chunks))
+
+        def work(i):
+            rows = chunks[i]
+            hist[rows], degradation_path[rows], corrosion_path[rows] = self._simulate_chunk(
+                np.random.default_rng(seeds[i]), degradation[rows], corrosion[rows], rul[rows], corrosion_rate[rows])
+
+        if self.workers > 1:
+            with ThreadPoolExecutor(self.workers) as pool:
+                list(pool.map(work, range(len(chunks))))
+        else:
+            for i in range(len(chunks)):
+                work(i)
+        return self._summarize(assets_df, hist, degradation_path, corrosion_path, start)
+
+    def _summarize(self, assets_df, hist, degradation_path, corrosion_path, start):
+        S, T = self.months, self.trials
+        months = np.arange(1, S + 1)
+        start = pd.Timestamp(start or pd.Timestamp.today()).to_period("M")
+        cdf = np.cumsum(hist, axis=1) / T
+
+        # Failure-month quantiles (NaN when the quantile lies beyond the horizon)
+        def quantile(q):
+            idx = (cdf[:, :S] < q).sum(axis=1)
+            return np.where(idx < S, idx + 1, np.nan)
+
+        # Expected remaining months at each step; survivors count as failing just after the horizon
+        remaining = np.maximum(np.r_[months, S + 1][:, None] - np.arange(S)[None, :], 0)
+        rul_path = (hist @ remaining / T).astype(np.float32)
+
+        per_asset = pd.DataFrame({
+            "Asset ID": assets_df["Asset ID"].to_numpy(),
+            "Type": assets_df["Type"].to_numpy(),
+            "Failure Prob (horizon)": (1 - hist[:, S] / T).round(4),
+            "Failure Prob (12m)": cdf[:, min(12, S) - 1].round(4),
+            "Failure Month P10": quantile(0.1),
+            "Failure Month P50": quantile(0.5),
+            "Failure Month P90": quantile(0.9),
+            "Projected Degradation %": degradation_path[:, -1].round(2),
+            "Projected Corrosion Level": corrosion_path[:, -1].round(3),
+            "Expected RUL (months)": rul_path[:, 0].round(1)
+        })
+
+        # Assets fail independently, so the fleet count per month is Poisson-binomial;
+        # the 90% band is its normal approximation
+        p_month = hist[:, :S] / T
+        expected = p_month.sum(axis=0)
+        band = 1.645 * np.sqrt((p_month * (1 - p_month)).sum(axis=0))
+        failures = pd.DataFrame({
+            "month": (start + months).astype(str),
+            "expected_failures": expected.round(2),
+            "failures_low": np.clip(expected - band, 0, None).round(2),
+            "failures_high": (expected + band).round(2),
+            "cumulative_failures": expected.cumsum().round(2)
+        })
+        return {
+            "assets": per_asset,
+            "failures_by_month": failures,
+            "degradation": degradation_path,
+            "corrosion": corrosion_path,
+            "rul": rul_path
+        }
@@ -0,0 +1,133 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Seasonal demand regression
+# -------------------------
+# load ~ intercept + trend + yearly and (for sub-daily data) daily Fourier terms +
+# weekday effects, fitted by least squares. The sufficient statistics (X'X, X'y) and the inverse P = (X'X)^-1 are kept,
+# so appending observations is a recursive least-squares update instead of a refit.
+YEAR_DAYS = 365.25
+# Rows per design-matrix block, so multi-year 15-minute histories fit in bounded memory
+CHUNK_ROWS = 65536
+
+
+class SeasonalDemandModel:
+    def __init__(self, yearly_harmonics=3, daily_harmonics=0, weekday_effects=True, ridge=1e-6):
+        self.yearly_harmonics = yearly_harmonics
+        self.daily_harmonics = daily_harmonics
+        self.weekday_effects = weekday_effects
+        self.ridge = ridge
+        self.origin = None
+        self.last_time = None
+        self.n_obs = 0
+        self.coef = None
+        # "full" or "update": how the latest fit_or_update/update was served
+        self.last_fit = None
+        self._xtx = None
+        self._xty = None
+        self._yty = 0.0
+        self._p = None
+        self._hasher = None
+
+    @property
+    def n_features(self):
+        return 2 + 2 * (self.yearly_harmonics + self.daily_harmonics) + (6 if self.weekday_effects else 0)
+
+    # -------------------------
+    # Design matrix
+    # -------------------------
+    def design(self, times):
+        times = pd.DatetimeIndex(times)
+        days = ((times - self.origin) / pd.Timedelta(days=1)).to_numpy(dtype=np.float64)
+        X = np.empty((len(times), self.n_features))
+        X[:, 0] = 1.0
+        X[:, 1] = days / YEAR_DAYS
+        col = 2
+        for period, harmonics in ((YEAR_DAYS, self.yearly_harmonics), (1.0, self.daily_harmonics)):
+            angle = np.outer(2 * np.pi * days / period, np.arange(1, harmonics + 1))
+            X[:, col:col + harmonics] = np.sin(angle)
+            X[:, col + harmonics:col + 2 * harmonics] = np.cos(angle)
+            col += 2 * harmonics
+        if self.weekday_effects:
+            # Monday is the baseline
+            X[:, col:col + 6] = times.dayofweek.to_numpy()[:, None] == np.arange(1, 7)
+        return X
+
+    # -------------------------
+    # Fitting
+    # -------------------------
+    def fit(self, times, load):
+        times = pd.DatetimeIndex(times)
+        load = np.asarray(load, dtype=np.float64)
+        self.origin = times[0].normalize()
+        self._xtx = np.zeros((self.n_features, self.n_features))
+        self._xty = np.zeros(self.n_features)
+        self._yty = 0.0
+        self._accumulate(times, load)
+        self._p = np.linalg.inv(self._xtx + self.ridge * np.eye(self.n_features))
+        self.coef = self._p @ self._xty
+        self.n_obs = len(load)
+        self.last_time = times[-1]
+        self._hasher = hashlib.sha1(load.tobytes())
+        self.last_fit = "full"
+        return self
+
+    def _accumulate(self, times, load):
+        for lo in range(0, len(load), CHUNK_ROWS):
+            X = self.design(times[lo:lo + CHUNK_ROWS])
+            y = load[lo:lo + CHUNK_ROWS]
+            self._xtx += X.T @ X
+            self._xty += X.T @ y
+            self._yty += float(y @ y)
+
+    # Recursive least squares: a Woodbury update of P for small batches (rank one for a
+    # single observation), a re-solve of the accumulated normal equations for large ones
+    def update(self, times, load):
+        if self.coef is None:
+            return self.fit(times, load)
+        times = pd.DatetimeIndex(times)
+        load = np.asarray(load, dtype=np.float64)
+        self.last_fit = "update"
+        if len(load) == 0:
+            return self
+        self._accumulate(times, load)
+        if len(load) <= self.n_features:
+            X = self.design(times)
+            PX = self._p @ X.T
+            gain = PX @ np.linalg.inv(np.eye(len(load)) + X @ PX)
+            self.coef = self.coef + gain @ (load - X @ self.coef)
+            self._p = self._p - gain @ PX.T
+        else:
+            self._p = np.linalg.inv(self._xtx + self.ridge * np.eye(self.n_features))
+            self.coef = self._p @ self._xty
+        self.n_obs += len(load)
+        self.last_time = times[-1]
+        self._hasher.update(load.tobytes())
+        return self
+
+    # Reuse the fit when `times`/`load` repeat or extend what was already fitted
+    def fit_or_update(self, times, load):
+        times = pd.DatetimeIndex(times)
+        load = np.asarray(load, dtype=np.float64)
+        if self.coef is not None and len(load) >= self.n_obs and times[0].normalize() == self.origin \
+                and times[self.n_obs - 1] == self.last_time \
+                and hashlib.sha1(load[:self.n_obs].tobytes()).digest() == self._hasher.digest():
+            return self.update(times[self.n_obs:], load[self.n_obs:])
+        return self.fit(times, load)
+
+    # -------------------------
+    # Forecasting
+    # -------------------------
+    def predict(self, times):
+        times = pd.DatetimeIndex(times)
+        out = np.empty(len(times), dtype=np.float32)
+        for lo in range(0, len(times), CHUNK_ROWS):
+            out[lo:lo + CHUNK_ROWS] = self.design(times[lo:lo + CHUNK_ROWS]) @ self.coef
+        return out
+
+    def residual_std(self):
+        dof = max(self.n_obs - self.n_features, 1)
+        sse = self._yty - 2 * self.coef @ self._xty + self.coef @ self._xtx @ self.coef
+        return float(np.sqrt(max(sse, 0.0) / dof))
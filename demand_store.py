@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Sub-hourly demand storage
+# -------------------------
+# Loads are float32 (MW): a feeder-year at 15 minutes is ~137 KB, at 30 minutes ~69 KB.
+# Many feeders live in one (feeder x interval) array, optionally memory-mapped to disk,
+# and are processed in feeder chunks so temporaries stay bounded.
+RESOLUTIONS = ["15min", "30min", "h", "D"]
+CHUNK_FEEDERS = 1024
+
+
+def step(resolution):
+    return pd.Timedelta(resolution if resolution[0].isdigit() else f"1{resolution}")
+
+
+def is_sub_daily(resolution):
+    return step(resolution) < pd.Timedelta(days=1)
+
+
+# Interval timestamps covering whole days from start to end inclusive
+def interval_index(start, end, resolution="D"):
+    if not is_sub_daily(resolution):
+        return pd.date_range(start=start, end=end, freq=resolution)
+    end = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    return pd.date_range(start=start, end=end, freq=resolution, inclusive="left")
+
+
+# Relative load through the day: overnight trough, morning and evening peaks, mean 1
+def intraday_shape(times):
+    hour = (times.hour + times.minute / 60.0).to_numpy(dtype=np.float32)
+    morning = np.exp(-0.5 * ((hour - 8.0) / 1.5) ** 2)
+    evening = np.exp(-0.5 * ((hour - 18.5) / 2.0) ** 2)
+    shape = 0.75 + 0.25 * morning + 0.4 * evening
+    return shape / shape.mean()
+
+
+# Period start offsets for reduceat, plus the period labels (any pandas frequency,
+# e.g. "h", "D", "W", "MS", "QS"); periods without intervals are dropped
+def _periods(index, freq):
+    first = pd.Series(np.arange(len(index)), index=index).resample(freq).first().dropna()
+    return first.to_numpy(dtype=np.int64), pd.DatetimeIndex(first.index)
+
+
+def _reduce(values, starts, how):
+    if how == "max":
+        return np.maximum.reduceat(values, starts, axis=-1)
+    if how == "min":
+        return np.minimum.reduceat(values, starts, axis=-1)
+    totals = np.add.reduceat(values, starts, axis=-1, dtype=np.float64)
+    if how == "sum":
+        return totals
+    if how == "mean":
+        counts = np.diff(np.r_[starts, values.shape[-1]])
+        return totals / counts
+    raise ValueError(f"Unknown aggregation {how}")
+
+
+# Coarser copy of a (date, value columns...) frame, e.g. half-hourly -> daily mean
+def downsample(df, freq="D", how="mean", time_col="date"):
+    index = pd.DatetimeIndex(df[time_col])
+    starts, labels = _periods(index, freq)
+    out = {time_col: labels}
+    for col in df.columns.drop(time_col):
+        out[col] = _reduce(df[col].to_numpy(), starts, how).astype(np.float32)
+    return pd.DataFrame(out)
+
+
+class FeederLoadStore:
+    def __init__(self, index, feeders, path=None):
+        self.index = pd.DatetimeIndex(index)
+        self.feeders = pd.Index(feeders)
+        shape = (len(self.feeders), len(self.index))
+        if path:
+            self.values = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+        else:
+            self.values = np.zeros(shape, dtype=np.float32)
+
+    @classmethod
+    def open(cls, path, index, feeders):
+        store = cls.__new__(cls)
+        store.index = pd.DatetimeIndex(index)
+        store.feeders = pd.Index(feeders)
+        store.values = np.load(path, mmap_mode="r")
+        return store
+
+    # Synthetic feeder loads, generated chunk by chunk straight into the store
+    @classmethod
+    def simulate(cls, n_feeders, start="2020-01-01", end="2024-12-31", resolution="30min",
+                 seed=None, path=None, chunk_feeders=CHUNK_FEEDERS):
+        rng = np.random.default_rng(seed)
+        index = interval_index(start, end, resolution)
+        store = cls(index, [f"FDR-{i:05d}" for i in range(n_feeders)], path)
+        seasonal = (1 + 0.15 * np.sin(2 * np.pi * index.dayofyear.to_numpy() / 365.25)).astype(np.float32)
+        profile = seasonal * (intraday_shape(index) if is_sub_daily(resolution) else np.float32(1))
+        for lo in range(0, n_feeders, chunk_feeders):
+            hi = min(lo + chunk_feeders, n_feeders)
+            peak = rng.uniform(0.5, 8.0, size=(hi - lo, 1)).astype(np.float32)
+            noise = rng.standard_normal((hi - lo, len(index)), dtype=np.float32)
+            noise *= np.float32(0.05)
+            noise += np.float32(1)
+            np.multiply(noise, profile, out=noise)
+            np.multiply(noise, peak, out=store.values[lo:hi])
+        return store
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def bytes_per_feeder_year(self):
+        if len(self.index) < 2:
+            return float(self.values.itemsize * len(self.index))
+        span = self.index[-1] - self.index[0] + (self.index[1] - self.index[0])
+        return self.values.itemsize * len(self.index) / (span / pd.Timedelta(days=365.25))
+
+    def feeder(self, feeder_id):
+        return pd.DataFrame({"date": self.index, "load": self.values[self.feeders.get_loc(feeder_id)]})
+
+    # New store at a coarser resolution, reduced one feeder chunk at a time
+    def downsample(self, freq="D", how="mean", path=None, chunk_feeders=CHUNK_FEEDERS):
+        starts, labels = _periods(self.index, freq)
+        out = FeederLoadStore(labels, self.feeders, path)
+        for lo in range(0, len(self.feeders), chunk_feeders):
+            out.values[lo:lo + chunk_feeders] = _reduce(self.values[lo:lo + chunk_feeders], starts, how)
+        return out
+
+    # System load: sum over feeders (all, or a subset) with a float64 accumulator
+    def total(self, feeders=None, chunk_feeders=CHUNK_FEEDERS):
+        rows = np.arange(len(self.feeders)) if feeders is None else self.feeders.get_indexer(feeders)
+        if (rows < 0).any():
+            raise KeyError(f"Unknown feeders: {list(pd.Index(feeders)[rows < 0][:10])}")
+        total = np.zeros(len(self.index), dtype=np.float64)
+        for lo in range(0, len(rows), chunk_feeders):
+            chunk = rows[lo:lo + chunk_feeders]
+            block = self.values[chunk[0]:chunk[-1] + 1] if np.all(np.diff(chunk) == 1) else self.values[chunk]
+            total += block.sum(axis=0, dtype=np.float64)
+        return pd.DataFrame({"date": self.index, "load": total})
+
+    # Per-feeder peak and the interval it occurs in
+    def peaks(self, chunk_feeders=CHUNK_FEEDERS):
+        peak = np.empty(len(self.feeders), dtype=np.float32)
+        at = np.empty(len(self.feeders), dtype=np.int64)
+        for lo in range(0, len(self.feeders), chunk_feeders):
+            block = self.values[lo:lo + chunk_feeders]
+            at[lo:lo + len(block)] = block.argmax(axis=1)
+            peak[lo:lo + len(block)] = block[np.arange(len(block)), at[lo:lo + len(block)]]
+        return pd.DataFrame({"feeder": self.feeders, "peak_mw": peak, "peak_at": self.index[at]})
@@ -0,0 +1,151 @@
+import pandas as pd
+
+# -------------------------
+# Rule-based advisories
+# -------------------------
+# Deterministic text built from each agent's structured data, used in place of a
+# GenAI answer when the call is skipped, times out or the circuit breaker is open.
+PREFIX = "📋 Rule-based advisory (GenAI unavailable): "
+
+EVENT_ACTIONS = {
+    "Outage": "dispatch a crew, isolate the faulted section and restore via alternate feeders",
+    "Overload": "shed or transfer load and review transformer/line ratings",
+    "RelayTrip": "inspect relay settings and breaker operation before re-energising",
+    "VoltageDip": "check tap changers and reactive compensation"
+}
+
+
+def _top(series, n=3):
+    counts = series.dropna().astype(str).value_counts().head(n)
+    return ", ".join(f"{k} ({v})" for k, v in counts.items()) or "none"
+
+
+# -------------------------
+# Assets
+# -------------------------
+def asset(row):
+    rul = row.get("RUL (months)")
+    degradation = row.get("Degradation %", 0) or 0
+    if rul is not None and rul <= 3 or degradation >= 85:
+        action = "schedule replacement and keep a spare on hand"
+    elif rul is not None and rul <= 6 or degradation >= 60:
+        action = "plan inspection and condition-based maintenance this quarter"
+    else:
+        action = "continue routine maintenance"
+    return (f"{PREFIX}{row.get('Asset ID')} ({row.get('Type')}) at {degradation}% degradation"
+            f"{f', RUL {rul} months' if rul is not None else ''}: {action}.")
+
+
+def capital(summary):
+    deferred = (f" {summary['deferred_assets']} replacements slip past their due period and "
+                f"{summary['unfunded_assets']} (£{summary['unfunded_cost']:,.0f}) fall outside the horizon under "
+                f"£{summary['budget_per_period']:,.0f} per period." if summary.get("budget_per_period") is not None else "")
+    return (f"{PREFIX}{summary['funded_assets']} of {summary['assets']} assets are replaced within "
+            f"{summary['horizon_months']} months for £{summary['planned_cost']:,.0f}.{deferred} "
+            f"Fund the most degraded assets first.")
+
+
+# -------------------------
+# Grid faults
+# -------------------------
+def grid_event(row):
+    action = EVENT_ACTIONS.get(row.get("event_type"), "inspect the asset and review protection logs")
+    load = row.get("load_MW") or 0
+    overload = " Load is above 100 MW; treat as high priority." if load > 100 else ""
+    return (f"{PREFIX}{row.get('event_type')} at {row.get('substation')} on asset {row.get('asset_id')} "
+            f"(fault {row.get('fault_code')}, {load} MW): {action}.{overload}")
+
+
+def grid_summary(exceptions_df):
+    if exceptions_df.empty:
+        return f"{PREFIX}No exceptions detected."
+    return (f"{PREFIX}{len(exceptions_df)} exceptions. Event types: {_top(exceptions_df['event_type'])}. "
+            f"Most affected substations: {_top(exceptions_df['substation'])}. "
+            f"Mean load {exceptions_df['load_MW'].mean():.1f} MW, peak {exceptions_df['load_MW'].max():.1f} MW.")
+
+
+def grid_forecast(events_df):
+    if events_df.empty:
+        return f"{PREFIX}No events to forecast from."
+    repeats = events_df[events_df["fault_code"] != "None"].groupby(["substation", "fault_code"]).size()
+    repeats = repeats[repeats > 1].sort_values(ascending=False).head(3)
+    repeat_text = ", ".join(f"{s}/{c} ({n})" for (s, c), n in repeats.items()) or "none"
+    return (f"{PREFIX}Repeat faults likely at: {repeat_text}. "
+            f"Stock relays and breakers for the busiest substations: {_top(events_df['substation'])}.")
+
+
+# -------------------------
+# Demand
+# -------------------------
+def demand_trends(agg_df):
+    load = agg_df["load"]
+    return (f"{PREFIX}{len(agg_df)} days of history; mean load {load.mean():.0f} MW, "
+            f"range {load.min():.0f}-{load.max():.0f} MW, latest {load.iloc[-1]:.0f} MW.")
+
+
+def demand_forecast(forecast_df):
+    base = forecast_df["base_case"]
+    peak_day = forecast_df.loc[base.idxmax(), "date"]
+    return (f"{PREFIX}Base-case peak {base.max():.0f} MW on {pd.Timestamp(peak_day).date()}; "
+            f"cold-wave peak {forecast_df['cold_wave'].max():.0f} MW. Hold reserves for the cold-wave case "
+            f"and line up demand response for days above {base.quantile(0.9):.0f} MW.")
+
+
+def demand_scenario(scenario_prompt):
+    return f"{PREFIX}Scenario not modelled. Context: {scenario_prompt}"
+
+
+# -------------------------
+# Renewables, dispatch, supply chain
+# -------------------------
+def renewable_plan(plan):
+    df = pd.DataFrame(plan)
+    share = df["renewables_mw"].sum() / max(df["demand_mw"].sum(), 1)
+    constrained = df["grid_constraint_zone"].dropna()
+    return (f"{PREFIX}Renewables cover {share:.1%} of demand over {len(df)} days; "
+            f"backup peaks at {df['backup_mw'].max():.0f} MW. "
+            f"Constrained zones: {_top(constrained) if len(constrained) else 'none'}.")
+
+
+def dispatch_summary(plan, load_shift, efficiency, carbon):
+    shifts = sum(1 for p in plan if p.get("action") != "normal")
+    return (f"{PREFIX}{shifts} of {len(plan)} days need load shifting. {load_shift} {efficiency} "
+            f"Estimated emissions {carbon.get('total_emissions_kg', 0):,.0f} kg CO₂.")
+
+
+def supply_chain(parts_df, vendor_df):
+    short = parts_df[parts_df["Expected Shortage"] > 0]
+    best = vendor_df.sort_values("Reliability (%)", ascending=False).drop_duplicates("Part Name")
+    picks = ", ".join(f"{r['Part Name']} from {r['Vendor']}" for _, r in best.head(3).iterrows()) or "none"
+    return (f"{PREFIX}{len(short)} of {len(parts_df)} parts are short "
+            f"({int(short['Recommended Qty'].sum())} units to order). Most reliable vendors: {picks}.")
+
+
+# -------------------------
+# Field operations, trading, dashboard
+# -------------------------
+def field_operations(work_orders):
+    df = pd.DataFrame(work_orders)
+    if df.empty:
+        return f"{PREFIX}No open work orders."
+    unassigned = int((df["status"] != "Assigned").sum())
+    return (f"{PREFIX}{len(df)} work orders, {unassigned} unassigned. "
+            f"Busiest zones: {_top(df['location'])}. Equipment: {_top(df['equipment'])}. "
+            f"Work unassigned jobs first and confirm spare parts before dispatch.")
+
+
+def trading(market_position, orders, risks):
+    order_text = "; ".join(f"{o['type']} {o['volume_mwh']} MWh at {o['price']}" for o in orders) or "no orders"
+    risk = market_position.get("risk", {})
+    var = f" VaR {risk['var_gbp']:,.0f} GBP." if "var_gbp" in risk else ""
+    return (f"{PREFIX}{market_position.get('recommendation', 'HOLD')} ({order_text}).{var} "
+            f"Risks: {' '.join(risks)}")
+
+
+def generic(label, output):
+    if isinstance(output, list):
+        return f"{PREFIX}{label}: {len(output)} records returned."
+    if isinstance(output, dict):
+        sizes = ", ".join(f"{k} ({len(v)})" for k, v in output.items() if isinstance(v, list))
+        return f"{PREFIX}{label}: {sizes or 'summary values only'}."
+    return f"{PREFIX}{label}: no structured data."
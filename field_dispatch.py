@@ -0,0 +1,481 @@
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy ships with scikit-learn; fall back to greedy without it
+    linear_sum_assignment = None
+
+# -------------------------
+# Technician roster
+# -------------------------
+DEFAULT_TECHNICIANS = [
+    {"name": "Technician Smith", "skills": ["Transformer", "Relay"], "zone": "Zone A", "capacity": 3},
+    {"name": "Technician Patel", "skills": ["Generator", "Breaker"], "zone": "Zone B", "capacity": 3},
+    {"name": "Technician Wang", "skills": ["Inverter", "Smart Meter"], "zone": "Zone C", "capacity": 3},
+    {"name": "Technician Singh", "skills": ["Pipeline", "Compressor"], "zone": "Zone D", "capacity": 3}
+]
+
+# Cost weights for the fault -> technician matching
+SKILL_MISMATCH_COST = 100.0
+ZONE_DISTANCE_COST = 10.0
+WORKLOAD_COST = 2.0
+
+
+def _tokens(name):
+    return frozenset(t for t in re.split(r"[^a-z0-9]+", str(name).lower()) if t)
+
+
+def _zone_key(zone):
+    # "Zone C" -> 2; anything else ("None", "Zone North", ...) sorts after the lettered zones
+    match = re.match(r"^Zone\s+([A-Z])$", str(zone).strip())
+    return ord(match.group(1)) - ord("A") if match else 26
+
+
+class TechnicianRoster:
+    def __init__(self, technicians):
+        self.technicians = [dict(t) for t in technicians]
+        for t in self.technicians:
+            t.setdefault("capacity", 1)
+            t.setdefault("active_jobs", 0)
+
+        # Skill and zone indexes
+        self.skill_index = {}
+        self.zone_index = {}
+        for i, t in enumerate(self.technicians):
+            for skill in t["skills"]:
+                self.skill_index.setdefault(skill, []).append(i)
+            self.zone_index.setdefault(t["zone"], []).append(i)
+
+        self._skill_tokens = [_tokens(s) for s in self.skill_index]
+        self._skill_names = list(self.skill_index)
+        self.zone_pos = np.array([_zone_key(t["zone"]) for t in self.technicians], dtype=np.int32)
+        # Jobs held per technician: the roster's active_jobs plus everything dispatched since
+        # the last reset()
+        self.base_load = np.array([t["active_jobs"] for t in self.technicians], dtype=np.float64)
+        self.load = self.base_load.copy()
+        self.capacity = np.array([t["capacity"] for t in self.technicians], dtype=np.int64)
+        self.name_index = {t["name"]: i for i, t in enumerate(self.technicians)}
+        self._skilled_cache = {}
+
+    @classmethod
+    def from_csv(cls, path):
+        # Expected columns: name, skills (";"-separated), zone, capacity[, active_jobs]
+        df = pd.read_csv(path).fillna({"capacity": 1, "active_jobs": 0})
+        technicians = []
+        for row in df.to_dict(orient="records"):
+            technicians.append({
+                "name": row["name"],
+                "skills": [s.strip() for s in str(row["skills"]).split(";") if s.strip()],
+                "zone": row["zone"],
+                "capacity": int(row.get("capacity", 1)),
+                "active_jobs": int(row.get("active_jobs", 0) or 0)
+            })
+        return cls(technicians)
+
+    @classmethod
+    def from_env(cls, path=None):
+        path = path or os.getenv("FIELD_TECHNICIAN_ROSTER")
+        if path and os.path.exists(path):
+            return cls.from_csv(path)
+        return cls(DEFAULT_TECHNICIANS)
+
+    def __len__(self):
+        return len(self.technicians)
+
+    # Dispatched jobs count against capacity until the next dispatch cycle
+    def commit(self, positions):
+        np.add.at(self.load, np.asarray(list(positions), dtype=np.int64), 1)
+
+    def release(self, positions):
+        np.subtract.at(self.load, np.asarray(list(positions), dtype=np.int64), 1)
+        np.maximum(self.load, 0, out=self.load)
+
+    def reset(self):
+        self.load[:] = self.base_load
+
+    # Boolean mask of technicians able to work on an equipment type
+    def skilled_mask(self, equipment):
+        if equipment not in self._skilled_cache:
+            mask = np.zeros(len(self.technicians), dtype=bool)
+            eq_tokens = _tokens(equipment)
+            for skill, tokens in zip(self._skill_names, self._skill_tokens):
+                if tokens and tokens <= eq_tokens:
+                    mask[self.skill_index[skill]] = True
+            self._skilled_cache[equipment] = mask
+        return self._skilled_cache[equipment]
+
+
+# -------------------------
+# Batch assignment engine
+# -------------------------
+class AssignmentEngine:
+    def __init__(self, roster, time_budget_s=0.5, max_block_cells=250_000):
+        self.roster = roster
+        self.time_budget_s = time_budget_s
+        self.max_block_cells = max_block_cells
+
+    # (faults x technicians) cost matrix, built per unique equipment type
+    def cost_matrix(self, faults, tech_idx, load):
+        equipment = np.array([f["equipment"] for f in faults], dtype=object)
+        zones = np.array([_zone_key(f.get("location")) for f in faults], dtype=np.int32)
+
+        skill_ok = np.empty((len(faults), len(tech_idx)), dtype=bool)
+        for eq in set(equipment):
+            skill_ok[equipment == eq] = self.roster.skilled_mask(eq)[tech_idx]
+
+        cost = ZONE_DISTANCE_COST * np.abs(zones[:, None] - self.roster.zone_pos[tech_idx][None, :])
+        cost = cost + SKILL_MISMATCH_COST * ~skill_ok
+        return cost + WORKLOAD_COST * load[tech_idx][None, :]
+
+    # Expand technicians into one column per free capacity slot; later slots cost more
+    def _slots(self, tech_idx, remaining):
+        free = remaining[tech_idx]
+        owners = np.repeat(np.arange(len(tech_idx)), free)
+        if owners.size == 0:
+            return owners, owners
+        starts = np.cumsum(free) - free
+        rank = np.arange(owners.size) - np.repeat(starts, free)
+        return owners, rank
+
+    def _solve_block(self, faults, fault_idx, tech_idx, remaining, load, exact):
+        if len(fault_idx) == 0 or len(tech_idx) == 0:
+            return {}
+        owners, rank = self._slots(tech_idx, remaining)
+        if owners.size == 0:
+            return {}
+        block = [faults[i] for i in fault_idx]
+        cost = self.cost_matrix(block, tech_idx, load)[:, owners] + WORKLOAD_COST * rank[None, :]
+
+        result = {}
+        if exact and linear_sum_assignment is not None and cost.size <= self.max_block_cells:
+            rows, cols = linear_sum_assignment(cost)
+            for r, c in zip(rows, cols):
+                result[fault_idx[r]] = tech_idx[owners[c]]
+        else:
+            # Greedy: each fault takes its cheapest free slot
+            cost = cost.astype(np.float64)
+            for r in range(len(fault_idx)):
+                c = int(np.argmin(cost[r]))
+                if not np.isfinite(cost[r, c]):
+                    break
+                result[fault_idx[r]] = tech_idx[owners[c]]
+                cost[:, c] = np.inf
+
+        for tech in result.values():
+            remaining[tech] -= 1
+            load[tech] += 1
+        return result
+
+    # Assign a batch of faults and commit them to the roster's load, so later batches in
+    # the same cycle see the capacity already taken; returns {fault position: technician position}.
+    # The whole batch is one min-cost matching over every free slot, skill mismatch being
+    # just a large cost; batches too large for one matrix are solved in blocks instead.
+    def assign(self, faults):
+        remaining = np.maximum(self.roster.capacity - self.roster.load.astype(np.int64), 0)
+        load = self.roster.load.copy()
+        if linear_sum_assignment is not None and len(faults) * int(remaining.sum()) <= self.max_block_cells:
+            assignment = self._solve_block(faults, list(range(len(faults))), np.flatnonzero(remaining > 0),
+                                           remaining, load, exact=True)
+        else:
+            assignment = self._assign_blocks(faults, remaining, load)
+        self.roster.commit(assignment.values())
+        return assignment
+
+    def _assign_blocks(self, faults, remaining, load):
+        started = time.perf_counter()
+        assignment = {}
+
+        # Skilled technicians first, one block per equipment type
+        by_equipment = {}
+        for i, f in enumerate(faults):
+            by_equipment.setdefault(f["equipment"], []).append(i)
+        for equipment, fault_idx in by_equipment.items():
+            tech_idx = np.flatnonzero(self.roster.skilled_mask(equipment) & (remaining > 0))
+            exact = time.perf_counter() - started < self.time_budget_s
+            assignment.update(self._solve_block(faults, fault_idx, tech_idx, remaining, load, exact))
+
+        # No skilled capacity left: fall back to technicians in the same zone
+        by_zone = {}
+        for i, f in enumerate(faults):
+            if i not in assignment:
+                by_zone.setdefault(f.get("location"), []).append(i)
+        for zone, fault_idx in by_zone.items():
+            tech_idx = np.array(self.roster.zone_index.get(zone, []), dtype=np.int64)
+            tech_idx = tech_idx[remaining[tech_idx] > 0]
+            exact = time.perf_counter() - started < self.time_budget_s
+            assignment.update(self._solve_block(faults, fault_idx, tech_idx, remaining, load, exact))
+
+        # Whatever is left goes to the whole roster
+        leftover = [i for i in range(len(faults)) if i not in assignment]
+        if leftover:
+            tech_idx = np.flatnonzero(remaining > 0)
+            exact = time.perf_counter() - started < self.time_budget_s
+            assignment.update(self._solve_block(faults, leftover, tech_idx, remaining, load, exact))
+        return assignment
+
+
+# -------------------------
+# Travel-time matrix
+# -------------------------
+# Zone centroids on a local km grid (would come from GIS in production)
+ZONE_COORDS = {
+    "Zone A": (0.0, 0.0),
+    "Zone B": (12.0, 3.0),
+    "Zone C": (5.0, 14.0),
+    "Zone D": (18.0, 16.0)
+}
+CREW_SPEED_KMH = 40.0
+
+
+def site_coords(location, asset_id=None):
+    x, y = ZONE_COORDS.get(location, (10.0 * _zone_key(location), 0.0))
+    if asset_id and asset_id != "N/A":
+        # Stable per-asset offset inside the zone
+        h = sum((i + 1) * ord(ch) for i, ch in enumerate(str(asset_id)))
+        x += (h % 100) / 25.0 - 2.0
+        y += ((h // 100) % 100) / 25.0 - 2.0
+    return x, y
+
+
+def site_key(work_order):
+    asset_id = work_order.get("asset_id")
+    if asset_id and asset_id != "N/A":
+        return asset_id
+    return work_order.get("location")
+
+
+class TravelTimeMatrix:
+    # Backing arrays grow by doubling, so adding sites one at a time is amortized
+    # O(n) per site rather than a full copy each
+    def __init__(self, speed_kmh=CREW_SPEED_KMH, initial_capacity=64):
+        self.speed_kmh = speed_kmh
+        self.index = {}
+        self._coords = np.empty((initial_capacity, 2))
+        self._minutes = np.zeros((initial_capacity, initial_capacity))
+
+    @property
+    def coords(self):
+        return self._coords[:len(self.index)]
+
+    @property
+    def minutes(self):
+        n = len(self.index)
+        return self._minutes[:n, :n]
+
+    def _reserve(self, n):
+        capacity = len(self._coords)
+        if n <= capacity:
+            return
+        grown = max(n, 2 * capacity)
+        coords = np.empty((grown, 2))
+        coords[:capacity] = self._coords
+        minutes = np.zeros((grown, grown))
+        minutes[:capacity, :capacity] = self._minutes
+        self._coords, self._minutes = coords, minutes
+
+    # Add or move sites; only the affected rows/columns are recomputed
+    def update(self, sites):
+        changed = []
+        for key, xy in sites.items():
+            xy = np.asarray(xy, dtype=np.float64)
+            pos = self.index.get(key)
+            if pos is None:
+                pos = self.index[key] = len(self.index)
+                self._reserve(pos + 1)
+                self._coords[pos] = xy
+                changed.append(pos)
+            elif not np.array_equal(self._coords[pos], xy):
+                self._coords[pos] = xy
+                changed.append(pos)
+        if not changed:
+            return []
+
+        changed = np.array(changed)
+        coords = self.coords
+        delta = coords[changed, None, :] - coords[None, :, :]
+        rows = np.hypot(delta[..., 0], delta[..., 1]) / self.speed_kmh * 60.0
+        minutes = self.minutes
+        minutes[changed, :] = rows
+        minutes[:, changed] = rows.T
+        return changed.tolist()
+
+    # Drop sites and compact the rest in place; returns {old position: new position}
+    def remove(self, keys):
+        drop = set(keys)
+        keep = [k for k in self.index if k not in drop]
+        if len(keep) == len(self.index):
+            return {}
+        pos = np.array([self.index[k] for k in keep], dtype=np.int64)
+        n = len(keep)
+        self._coords[:n] = self._coords[pos]
+        self._minutes[:n, :n] = self._minutes[np.ix_(pos, pos)]
+        self.index = {k: i for i, k in enumerate(keep)}
+        return {int(old): new for new, old in enumerate(pos)}
+
+    def positions(self, keys):
+        return np.array([self.index[k] for k in keys], dtype=np.int64)
+
+
+# -------------------------
+# Route planning (nearest insertion + 2-opt)
+# -------------------------
+def _route_cost(route, minutes):
+    if len(route) < 2:
+        return 0.0
+    route = np.asarray(route)
+    return float(minutes[route[:-1], route[1:]].sum())
+
+
+def _cheapest_insertion(route, node, minutes):
+    # Open route: inserting after the last stop only adds one leg
+    route = np.asarray(route)
+    a, b = route[:-1], route[1:]
+    between = minutes[a, node] + minutes[node, b] - minutes[a, b]
+    tail = minutes[route[-1], node]
+    if between.size and between.min() < tail:
+        return int(np.argmin(between)) + 1
+    return len(route)
+
+
+def nearest_insertion(depot, nodes, minutes):
+    route = [depot]
+    remaining = list(nodes)
+    while remaining:
+        # Unrouted node closest to any routed node
+        dist = minutes[np.ix_(route, remaining)].min(axis=0)
+        node = remaining.pop(int(np.argmin(dist)))
+        route.insert(_cheapest_insertion(route, node, minutes), node)
+    return route
+
+
+def two_opt(route, minutes, max_passes=50):
+    # Depot (position 0) stays fixed; the route is open-ended
+    route = list(route)
+    n = len(route)
+    if n < 4:
+        return route
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            js = np.arange(i + 1, n)
+            c = np.asarray(route)[js]
+            nxt = np.asarray(route + [route[-1]])[js + 1]
+            has_next = js + 1 < n
+            delta = minutes[a, c] + np.where(has_next, minutes[b, nxt], 0.0) \
+                - minutes[a, b] - np.where(has_next, minutes[c, nxt], 0.0)
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = int(js[k])
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route
+
+
+class RoutePlanner:
+    def __init__(self, matrix=None):
+        self.matrix = matrix or TravelTimeMatrix()
+        self.routes = {}
+        self.jobs = {}
+        self.depots = {}
+
+    # Depots and the sites of assigned jobs; unassigned work never enters the matrix
+    def _register(self, work_orders, technicians):
+        sites = {}
+        for t in technicians:
+            self.depots[t["name"]] = "depot:" + t["name"]
+            sites[self.depots[t["name"]]] = site_coords(t["zone"])
+        for wo in work_orders:
+            if wo.get("assigned_to"):
+                sites[site_key(wo)] = site_coords(wo.get("location"), wo.get("asset_id"))
+        self.matrix.update(sites)
+
+    # Evict sites no open job uses any more, remapping the routes to the compacted matrix
+    def _evict(self, keys):
+        in_use = {site_key(wo) for jobs in self.jobs.values() for wo in jobs}
+        depots = set(self.depots.values())
+        moved = self.matrix.remove([k for k in keys if k not in in_use and k not in depots])
+        if moved:
+            self.routes = {tech: [moved[node] for node in route] for tech, route in self.routes.items()}
+
+    def _optimize(self, tech, nodes):
+        depot = self.matrix.index[self.depots[tech]]
+        self.routes[tech] = two_opt(nearest_insertion(depot, nodes, self.matrix.minutes), self.matrix.minutes)
+
+    def _nodes(self, tech):
+        return [self.matrix.index[site_key(wo)] for wo in self.jobs[tech]]
+
+    # Full plan for a dispatch cycle; sites of the previous cycle's jobs are evicted
+    def plan(self, work_orders, technicians):
+        previous = [site_key(wo) for jobs in self.jobs.values() for wo in jobs]
+        self.routes, self.jobs = {}, {}
+        self._evict(previous)
+        self._register(work_orders, technicians)
+        for wo in work_orders:
+            if wo.get("assigned_to"):
+                self.jobs.setdefault(wo["assigned_to"], []).append(wo)
+        for tech in self.jobs:
+            self._optimize(tech, self._nodes(tech))
+        return self.itineraries()
+
+    # New faults: insert into the existing routes and polish locally
+    def add_jobs(self, work_orders, technicians):
+        self._register(work_orders, technicians)
+        touched = set()
+        for wo in work_orders:
+            tech = wo.get("assigned_to")
+            if not tech:
+                continue
+            self.jobs.setdefault(tech, []).append(wo)
+            node = self.matrix.index[site_key(wo)]
+            route = self.routes.get(tech) or [self.matrix.index[self.depots[tech]]]
+            route.insert(_cheapest_insertion(route, node, self.matrix.minutes), node)
+            self.routes[tech] = route
+            touched.add(tech)
+        for tech in touched:
+            self.routes[tech] = two_opt(self.routes[tech], self.matrix.minutes)
+        return self.itineraries()
+
+    # Closed jobs leave their routes (the remaining stops keep their order) and their
+    # sites leave the matrix; returns {work order id: technician} for the closed jobs
+    def close_jobs(self, work_order_ids):
+        closing = set(work_order_ids)
+        closed, sites = {}, []
+        for tech, jobs in self.jobs.items():
+            route = self.routes.get(tech, [])
+            for wo in [wo for wo in jobs if wo.get("work_order_id") in closing]:
+                jobs.remove(wo)
+                # One route node per job, after the depot
+                route.pop(route.index(self.matrix.index[site_key(wo)], 1))
+                closed[wo["work_order_id"]] = tech
+                sites.append(site_key(wo))
+        self._evict(sites)
+        return closed
+
+    def itineraries(self):
+        minutes = self.matrix.minutes
+        result = {}
+        for tech, route in self.routes.items():
+            # Match route nodes back to work orders (several jobs can share a site)
+            pending = {}
+            for wo in self.jobs.get(tech, []):
+                pending.setdefault(self.matrix.index[site_key(wo)], []).append(wo)
+            stops, eta = [], 0.0
+            for prev, node in zip(route[:-1], route[1:]):
+                eta += minutes[prev, node]
+                wo = pending[node].pop(0)
+                stops.append({
+                    "stop": len(stops) + 1,
+                    "work_order_id": wo.get("work_order_id"),
+                    "location": wo.get("location"),
+                    "fault_code": wo.get("fault_code"),
+                    "eta_minutes": round(float(eta), 1)
+                })
+            result[tech] = {"stops": stops, "travel_minutes": round(_route_cost(route, minutes), 1)}
+        return result
@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from types import SimpleNamespace
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from instrumentation import span, current_trace
+from usage_ledger import LEDGER, current_budget, estimate_tokens
+from rate_limiter import PriorityScheduler
+from resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, call_with_retries, time_left
+
+# -------------------------
+# Shared Azure OpenAI access
+# -------------------------
+# The client (and the openai import) is only built on the first GenAI call. The SDK's
+# own retries are off: every retry and hedge goes through _send, the scheduler and the
+# breaker instead.
+load_dotenv()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_client():
+    from openai import AzureOpenAI
+    return AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        max_retries=0
+    )
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_client()
+    return _client
+
+
+# Swap the client (stubs for backtests, throttled wrappers for batch runs)
+def set_client(client):
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def deployment_name():
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+
+# Client-side RPM/TPM limits (GENAI_RPM / GENAI_TPM); None means calls go straight out
+_scheduler = None
+_scheduler_loaded = False
+
+
+def get_scheduler():
+    global _scheduler, _scheduler_loaded
+    if not _scheduler_loaded:
+        with _client_lock:
+            if not _scheduler_loaded:
+                _scheduler = PriorityScheduler.from_env()
+                _scheduler_loaded = True
+    return _scheduler
+
+
+def set_scheduler(scheduler):
+    global _scheduler, _scheduler_loaded
+    with _client_lock:
+        _scheduler, _scheduler_loaded = scheduler, True
+
+
+@contextmanager
+def _rate_limited(priority, reserved, timeout=None):
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield 0.0
+        return
+    with scheduler.slot(priority, reserved, timeout) as waited:
+        yield waited
+
+
+def _settle(reserved, used):
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        scheduler.settle(reserved, used)
+
+
+SKIPPED_TEXT = "⏭️ Skipped: run GenAI budget nearly exhausted."
+
+
+# -------------------------
+# Deadlines, retries, hedging and the circuit breaker
+# -------------------------
+# Shared by every call in the process so a failing service is detected once
+_breaker = CircuitBreaker.from_env()
+
+
+# Per-call timeout, capped by what is left of the run deadline
+def _call_timeout():
+    timeout = float(os.getenv("GENAI_CALL_TIMEOUT_S", 30))
+    left = time_left()
+    if left is not None:
+        if left < float(os.getenv("GENAI_MIN_CALL_S", 1)):
+            raise DeadlineExceeded("Run deadline reached before the GenAI call")
+        timeout = min(timeout, left)
+    return timeout
+
+
+def _send(create, timeout, stream=False, discard=None):
+    if not _breaker.allow():
+        raise CircuitOpen("GenAI circuit breaker is open")
+    try:
+        if stream:
+            result, calls = create(timeout), {"attempts": 1, "hedged": False}
+        else:
+            # Second request after GENAI_HEDGE_AFTER_S (0 disables hedging)
+            hedge_after = float(os.getenv("GENAI_HEDGE_AFTER_S", 10)) or None
+            result, calls = call_with_retries(create, timeout, hedge_after=hedge_after,
+                                              attempts=int(os.getenv("GENAI_ATTEMPTS", 3)), discard=discard)
+    except Exception:
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return result, calls
+
+
+def _fallback_text(fallback):
+    return fallback() if callable(fallback) else fallback
+
+
+# Completion tokens reserved against TPM when a call sets no max_tokens
+DEFAULT_RESERVED_COMPLETION = 600
+
+
+# priority: "high" (faults, work orders), "normal", or "low" (summaries, trend
+# narratives) - low-priority calls are the first dropped when the budget runs low
+def _plan_call(messages, model, priority, kwargs):
+    model = model or deployment_name()
+    budget = current_budget()
+    if budget is not None:
+        plan = budget.plan(messages, model, kwargs.get("max_tokens"), priority)
+        if plan is None:
+            return budget, model, True
+        model, kwargs["max_tokens"] = plan
+    return budget, model, False
+
+
+# -------------------------
+# Single-flight: identical concurrent prompts share one request
+# -------------------------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Span attrs marking a fallback or skipped result, copied to the followers' spans
+        self.degraded = {}
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _flight_key(messages, model, kwargs):
+    payload = json.dumps([model or deployment_name(), messages, sorted(kwargs.items())], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# fallback: text, or a zero-argument function building it from the caller's structured
+# data, returned instead of raising when the call is skipped, out of time or failing
+def chat_completion(messages, model=None, agent=None, priority="normal", fallback=None, **kwargs):
+    if os.getenv("GENAI_SINGLEFLIGHT", "1") == "0":
+        return _complete(messages, model, agent, priority, kwargs, fallback)[0]
+
+    key = _flight_key(messages, model, kwargs)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        # Wait for the leader's response instead of sending a duplicate request, but no
+        # longer than this caller's own deadline
+        with span("chat.completions.create", "llm", agent=agent, cache_hit=True, coalesced=True) as attrs:
+            started = time.perf_counter()
+            finished = flight.done.wait(time_left())
+            attrs["queue_wait_s"] = round(time.perf_counter() - started, 4)
+            if not finished:
+                error = DeadlineExceeded("Run deadline reached while waiting for a coalesced GenAI call")
+            else:
+                error = flight.error
+                attrs.update(flight.degraded)
+            if error is not None:
+                if fallback is None:
+                    raise error
+                attrs["fallback"] = type(error).__name__
+                return _fallback_text(fallback)
+        # A degraded leader result is rebuilt from this caller's own data
+        if flight.degraded and fallback is not None:
+            return _fallback_text(fallback)
+        return flight.result
+
+    try:
+        flight.result, flight.degraded = _complete(messages, model, agent, priority, kwargs, fallback)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+# Returns (text, span attrs marking a degraded result - empty for a real completion)
+def _complete(messages, model, agent, priority, kwargs, fallback=None):
+    budget, model, skip = _plan_call(messages, model, priority, kwargs)
+    if skip:
+        with span("chat.completions.create", "llm", agent=agent, skipped=True):
+            return SKIPPED_TEXT if fallback is None else _fallback_text(fallback), {"skipped": True}
+
+    reserved = estimate_tokens(messages) + (kwargs.get("max_tokens") or DEFAULT_RESERVED_COMPLETION)
+    with span("chat.completions.create", "llm", agent=agent, queue_wait_s=0.0, cache_hit=False,
+              model=model, max_tokens=kwargs.get("max_tokens"), priority=priority) as attrs:
+        abandoned = threading.Event()
+
+        # Every attempt (first try, retry or hedge) takes its own scheduler slot, so a 429
+        # pauses the scheduler before the next one. Attempts that fail, or that only get
+        # going after the call is decided, hand their token reservation back.
+        def attempt(timeout):
+            with _rate_limited(priority, reserved, timeout) as waited:
+                attrs["queue_wait_s"] = round(attrs["queue_wait_s"] + waited, 4)
+                if abandoned.is_set():
+                    _settle(reserved, 0)
+                    return None
+                try:
+                    return get_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        timeout=timeout,
+                        **kwargs
+                    )
+                except Exception:
+                    _settle(reserved, 0)
+                    raise
+
+        # Hedges that lost still ran on the service: their late results settle the
+        # reservation at the tokens actually used and are charged to the run
+        context = contextvars.copy_context()
+
+        def discard(late):
+            usage = getattr(late, "usage", None)
+            if usage is None:
+                if late is not None:
+                    _settle(reserved, 0)
+                return
+            _settle(reserved, usage.prompt_tokens + usage.completion_tokens)
+            context.copy().run(_record_usage, budget, agent, model, usage.prompt_tokens, usage.completion_tokens)
+
+        try:
+            resp, calls = _send(attempt, _call_timeout(), discard=discard)
+            attrs.update(calls)
+        except Exception as e:
+            if fallback is None:
+                raise
+            attrs["fallback"] = type(e).__name__
+            return _fallback_text(fallback), {"fallback": attrs["fallback"]}
+        finally:
+            abandoned.set()
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            attrs["prompt_tokens"] = usage.prompt_tokens
+            attrs["completion_tokens"] = usage.completion_tokens
+    if usage is not None:
+        _settle(reserved, usage.prompt_tokens + usage.completion_tokens)
+        _record_usage(budget, agent, model, usage.prompt_tokens, usage.completion_tokens)
+    return resp.choices[0].message.content, {}
+
+
+# Yield the completion text piece by piece as the service generates it
+def stream_completion(messages, model=None, agent=None, priority="normal", fallback=None, **kwargs):
+    budget, model, skip = _plan_call(messages, model, priority, kwargs)
+    if skip:
+        with span("chat.completions.create", "llm", agent=agent, skipped=True, stream=True):
+            yield SKIPPED_TEXT if fallback is None else _fallback_text(fallback)
+            return
+
+    pieces, usage = [], None
+    reserved = estimate_tokens(messages) + (kwargs.get("max_tokens") or DEFAULT_RESERVED_COMPLETION)
+    with span("chat.completions.create", "llm", agent=agent, queue_wait_s=0.0, cache_hit=False,
+              model=model, max_tokens=kwargs.get("max_tokens"), priority=priority, stream=True) as attrs:
+        # Final usage chunk needs an API version that supports stream_options
+        if os.getenv("AZURE_OPENAI_STREAM_USAGE") == "1":
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        try:
+            with _rate_limited(priority, reserved, _call_timeout()) as waited:
+                attrs["queue_wait_s"] = round(waited, 4)
+                started = time.perf_counter()
+                chunks, _ = _send(lambda timeout: get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                    timeout=timeout,
+                    **kwargs
+                ), _call_timeout(), stream=True)
+        except Exception as e:
+            if fallback is None:
+                raise
+            attrs["fallback"] = type(e).__name__
+            yield _fallback_text(fallback)
+            return
+        for chunk in chunks:
+            # Usage arrives on a final chunk without choices, when the service sends it
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not pieces:
+                    attrs["time_to_first_token_s"] = round(time.perf_counter() - started, 4)
+                pieces.append(delta)
+                yield delta
+
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens, completion_tokens = estimate_tokens(messages), len("".join(pieces)) // 4
+        attrs["prompt_tokens"] = prompt_tokens
+        attrs["completion_tokens"] = completion_tokens
+    _settle(reserved, prompt_tokens + completion_tokens)
+    _record_usage(budget, agent, model, prompt_tokens, completion_tokens)
+
+
+def _record_usage(budget, agent, model, prompt_tokens, completion_tokens):
+    if budget is not None:
+        run_id = budget.run_id
+        cost = budget.cost(model, prompt_tokens, completion_tokens)
+        budget.charge(prompt_tokens + completion_tokens, cost)
+    else:
+        trace = current_trace()
+        run_id = trace.run_id if trace is not None else None
+        cost = 0.0
+    LEDGER.record(run_id, agent, model, prompt_tokens, completion_tokens, cost)
+
+
+# -------------------------
+# Offline client (benchmarks, backtests)
+# -------------------------
+class _OfflineCompletions:
+    def __init__(self, text):
+        self.text = text
+
+    def create(self, model=None, messages=None, max_tokens=None, stream=False, **kwargs):
+        text = self.text[:max_tokens * 4] if max_tokens else self.text
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages or []) // 4
+        if stream:
+            return self._chunks(text, prompt_tokens)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=text))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(text) // 4,
+                                  total_tokens=prompt_tokens + len(text) // 4)
+        )
+
+    def _chunks(self, text, prompt_tokens):
+        for word in text.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens, completion_tokens=len(text) // 4,
+            total_tokens=prompt_tokens + len(text) // 4))
+
+
+class OfflineClient:
+    def __init__(self, text="Offline advisory (GenAI disabled)."):
+        self.chat = SimpleNamespace(completions=_OfflineCompletions(text))
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+# -------------------------
+# Run traces
+# -------------------------
+# The active trace is carried in a context variable so the GenAI call path
+# can record into whichever run is executing without extra arguments.
+_active = contextvars.ContextVar("orchestrator_trace", default=None)
+
+
+class Trace:
+    def __init__(self, run_id=None):
+        self.run_id = run_id or f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.started_at = time.time()
+        self.origin_ns = time.perf_counter_ns()
+        self.pid = os.getpid()
+        # (name, category, start_ns, end_ns, thread id, attributes); list.append is atomic
+        self.spans = []
+
+    def record(self, name, category, start_ns, end_ns, attrs):
+        self.spans.append((name, category, start_ns, end_ns, threading.get_ident(), attrs))
+
+    @contextmanager
+    def span(self, name, category, **attrs):
+        start = time.perf_counter_ns()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, category, start, time.perf_counter_ns(), attrs)
+
+    # Make this the trace that nested spans (e.g. GenAI calls) record into
+    @contextmanager
+    def activate(self):
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    # -------------------------
+    # Exporters
+    # -------------------------
+    def to_chrome_trace(self):
+        events = []
+        for name, category, start, end, tid, attrs in self.spans:
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin_ns) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": self.pid,
+                "tid": tid,
+                "args": attrs
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": self.run_id}}
+
+    def to_openmetrics(self):
+        run = _label_value(self.run_id)
+        lines = ["# TYPE orchestrator_stage_duration_seconds gauge",
+                 "# UNIT orchestrator_stage_duration_seconds seconds"]
+        llm = {}
+        for name, category, start, end, _, attrs in self.spans:
+            seconds = (end - start) / 1e9
+            if category == "stage":
+                cached = "true" if attrs.get("cache_hit") else "false"
+                lines.append(f'orchestrator_stage_duration_seconds{{run_id="{run}",stage="{_label_value(name)}",'
+                             f'cache_hit="{cached}"}} {seconds:.6f}')
+            elif category == "llm":
+                agg = llm.setdefault(attrs.get("agent") or "unknown", {
+                    "calls": 0, "errors": 0, "fallbacks": 0, "cache_hits": 0, "seconds": 0.0, "queue_wait": 0.0,
+                    "prompt_tokens": 0, "completion_tokens": 0
+                })
+                agg["calls"] += 1
+                agg["errors"] += 1 if "error" in attrs else 0
+                agg["fallbacks"] += 1 if "fallback" in attrs else 0
+                agg["cache_hits"] += 1 if attrs.get("cache_hit") else 0
+                agg["seconds"] += seconds
+                agg["queue_wait"] += attrs.get("queue_wait_s", 0.0)
+                agg["prompt_tokens"] += attrs.get("prompt_tokens", 0)
+                agg["completion_tokens"] += attrs.get("completion_tokens", 0)
+
+        families = [
+            ("genai_calls", "counter", "calls", "_total"),
+            ("genai_errors", "counter", "errors", "_total"),
+            ("genai_fallbacks", "counter", "fallbacks", "_total"),
+            ("genai_cache_hits", "counter", "cache_hits", "_total"),
+            ("genai_prompt_tokens", "counter", "prompt_tokens", "_total"),
+            ("genai_completion_tokens", "counter", "completion_tokens", "_total"),
+            ("genai_call_duration_seconds", "counter", "seconds", "_total"),
+            ("genai_queue_wait_seconds", "counter", "queue_wait", "_total")
+        ]
+        for family, kind, key, suffix in families:
+            lines.append(f"# TYPE {family} {kind}")
+            for agent, agg in sorted(llm.items()):
+                value = agg[key]
+                value = f"{value:.6f}" if isinstance(value, float) else str(value)
+                lines.append(f'{family}{suffix}{{run_id="{run}",agent="{_label_value(agent)}"}} {value}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.run_id)
+        with open(base + ".trace.json", "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        with open(base + ".prom", "w") as f:
+            f.write(self.to_openmetrics())
+        return base
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def current_trace():
+    return _active.get()
+
+
+# Span on the active trace; a no-op when nothing is being traced
+@contextmanager
+def span(name, category, **attrs):
+    trace = _active.get()
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, category, **attrs) as a:
+        yield a
@@ -0,0 +1,249 @@
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------
+# Mock Azure OpenAI chat completions server
+# -------------------------
+# Point the agents at it with:
+#   AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8080 AZURE_OPENAI_API_KEY=mock
+#   AZURE_OPENAI_API_VERSION=2024-02-01 AZURE_OPENAI_DEPLOYMENT_NAME=mock
+
+CANNED_RESPONSE = (
+    "1. Summary: conditions are within normal operating limits.\n"
+    "2. Risks: monitor assets with low remaining useful life and any repeat faults.\n"
+    "3. Actions: prioritise critical work orders, confirm spare-part availability, "
+    "and keep reserve capacity for peak demand.\n"
+    "4. Recommendation: proceed with the current plan and review again in 24 hours."
+)
+
+
+def count_tokens(text):
+    # ~4 characters per token, close enough for load modelling
+    return max(1, math.ceil(len(text) / 4))
+
+
+class MockConfig:
+    def __init__(self, latency="lognormal:0.6:0.5", tokens_per_second=60.0,
+                 rate_limit=0.0, retry_after=1, mode="canned", seed=None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # Time to first token, from "fixed:S", "uniform:LO:HI" or "lognormal:MEDIAN:SIGMA"
+    def first_token_delay(self):
+        kind, *args = self.latency.split(":")
+        args = [float(a) for a in args]
+        with self._lock:
+            if kind == "fixed":
+                return args[0]
+            if kind == "uniform":
+                return self.rng.uniform(args[0], args[1])
+            if kind == "lognormal":
+                return args[0] * math.exp(self.rng.gauss(0, args[1]))
+        raise ValueError(f"Unknown latency distribution {self.latency}")
+
+    def should_throttle(self):
+        with self._lock:
+            return self.rng.random() < self.rate_limit
+
+    def completion_text(self, messages, max_tokens):
+        if self.mode == "echo":
+            text = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        else:
+            text = CANNED_RESPONSE
+        if max_tokens:
+            text = text[:max_tokens * 4]
+        return text
+
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = []
+
+    def record(self, latency, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latencies.append(latency)
+
+    def record_throttle(self):
+        with self._lock:
+            self.requests += 1
+            self.throttled += 1
+
+    def snapshot(self):
+        with self._lock:
+            lat = sorted(self.latencies)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1) if lat else None
+
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": {"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99), "max": pct(1.0)}
+        }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    config = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/stats":
+            return self._send_json(200, self.stats.snapshot())
+        self._send_json(404, {"error": {"code": "NotFound", "message": path}})
+
+    def do_DELETE(self):
+        if urlparse(self.path).path == "/stats":
+            self.stats.reset()
+            return self._send_json(200, {"reset": True})
+        self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        parts = urlparse(self.path).path.strip("/").split("/")
+        # /openai/deployments/{deployment}/chat/completions
+        if len(parts) != 5 or parts[:2] != ["openai", "deployments"] or parts[3:] != ["chat", "completions"]:
+            return self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.config.should_throttle():
+            self.stats.record_throttle()
+            return self._send_json(429, {"error": {
+                "code": "429",
+                "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit."
+            }}, headers={"Retry-After": str(self.config.retry_after)})
+
+        messages = body.get("messages", [])
+        text = self.config.completion_text(messages, body.get("max_tokens"))
+        prompt_tokens = sum(count_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = count_tokens(text)
+
+        if body.get("stream"):
+            return self._stream(parts[2], text, prompt_tokens, completion_tokens, started,
+                                (body.get("stream_options") or {}).get("include_usage"))
+
+        # Time to first token, then generation at the configured throughput
+        delay = self.config.first_token_delay()
+        if self.config.tokens_per_second:
+            delay += completion_tokens / self.config.tokens_per_second
+        time.sleep(delay)
+
+        self.stats.record(time.perf_counter() - started, prompt_tokens, completion_tokens)
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": parts[2],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": text}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    # Server-sent events, one ~4-character token per chunk at the configured throughput
+    def _stream(self, model, text, prompt_tokens, completion_tokens, started, include_usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        chunk_id = f"chatcmpl-mock-{int(time.time() * 1000)}"
+
+        def send(choices, usage=None):
+            event = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices}
+            if usage is not None:
+                event["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(self.config.first_token_delay())
+        send([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        per_token = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for i in range(0, len(text), 4):
+            send([{"index": 0, "delta": {"content": text[i:i + 4]}, "finish_reason": None}])
+            time.sleep(per_token)
+        send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            send([], {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.stats.record(time.perf_counter() - started, prompt_tokens, completion_tokens)
+
+
+def serve(config=None, host="127.0.0.1", port=8080, background=False):
+    handler = type("ConfiguredMockHandler", (MockHandler,), {
+        "config": config or MockConfig(),
+        "stats": MockStats()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Azure OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="lognormal:0.6:0.5",
+                        help="fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA (seconds to first token)")
+    parser.add_argument("--tps", type=float, default=60.0, help="Completion tokens per second (0 = instant)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--mode", choices=["canned", "echo"], default="canned")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(latency=args.latency, tokens_per_second=args.tps, rate_limit=args.rate_limit,
+                        retry_after=args.retry_after, mode=args.mode, seed=args.seed)
+    print(f"Mock Azure OpenAI listening on http://{args.host}:{args.port} (GET /stats for latency percentiles)")
+    serve(config, host=args.host, port=args.port)
@@ -1,108 +1,308 @@
 import os
-from dotenv import load_dotenv
+import json
+import time
+import hashlib
+import importlib
+from datetime import date
+from collections import OrderedDict
+from contextlib import contextmanager
+from instrumentation import Trace
+from usage_ledger import LEDGER, RunBudget
+from resilience import deadline_at
 
-# Import all agents
-from AssetIntegrityAgent import AssetIntegrityAgent
-from GridFaultForecastingAgent import GridFaultForecastingAgent
-from DemandForecastingAgent import DemandForecastingAgent
-from RenewableIntegrationAgent import RenewableIntegrationAgent
-from UtilityEnergyManagementAgent import UtilityEnergyManagementAgent
-from SupplyChainOptimizationAgent import SupplyChainOptimizationAgent
-from FieldOperationsAgent import FieldOperationsAgent
-from EnergyTradingAgent import EnergyTradingAgent
+# Agent registry: attribute -> (module, class). Agent modules pull in pandas,
+# NumPy and friends, so they are only imported when an agent is first used.
+AGENT_REGISTRY = {
+    "asset_agent": ("AssetIntegrityAgent", "AssetIntegrityAgent"),
+    "grid_agent": ("GridFaultForecastingAgent", "GridFaultForecastingAgent"),
+    "demand_agent": ("DemandForecastingAgent", "DemandForecastingAgent"),
+    "renewable_agent": ("RenewableIntegrationAgent", "RenewableIntegrationAgent"),
+    "energy_mgmt_agent": ("UtilityEnergyManagementAgent", "UtilityEnergyManagementAgent"),
+    "supply_chain_agent": ("SupplyChainOptimizationAgent", "SupplyChainOptimizationAgent"),
+    "field_ops_agent": ("FieldOperationsAgent", "FieldOperationsAgent"),
+    "trading_agent": ("EnergyTradingAgent", "EnergyTradingAgent")
+}
+
+
+def load_agent(name):
+    module_name, class_name = AGENT_REGISTRY[name]
+    return getattr(importlib.import_module(module_name), class_name)()
 
-# Load Azure OpenAI credentials
-load_dotenv()
 
 class OrchestratorAgent:
-    def __init__(self):
-        # Instantiate all agents
-        self.asset_agent = AssetIntegrityAgent()
-        self.grid_agent = GridFaultForecastingAgent()
-        self.demand_agent = DemandForecastingAgent()
-        self.renewable_agent = RenewableIntegrationAgent()
-        self.energy_mgmt_agent = UtilityEnergyManagementAgent()
-        self.supply_chain_agent = SupplyChainOptimizationAgent()
-        self.field_ops_agent = FieldOperationsAgent()
-        self.trading_agent = EnergyTradingAgent()
-
-    def run(self):
+    # Pipeline stages in run order, with the upstream stages each one reads
+    STAGES = [
+        ("AssetIntegrity", []),
+        ("GridFaults", ["AssetIntegrity"]),
+        ("DemandForecast", ["AssetIntegrity", "GridFaults"]),
+        ("RenewableIntegration", ["AssetIntegrity", "GridFaults", "DemandForecast"]),
+        ("UtilityEnergyManagement", ["AssetIntegrity", "GridFaults", "DemandForecast", "RenewableIntegration"]),
+        ("SupplyChainOptimization", ["AssetIntegrity", "GridFaults", "DemandForecast", "RenewableIntegration",
+                                     "UtilityEnergyManagement"]),
+        ("FieldOperations", ["AssetIntegrity", "GridFaults", "DemandForecast", "RenewableIntegration",
+                             "UtilityEnergyManagement", "SupplyChainOptimization"]),
+        ("EnergyTrading", ["AssetIntegrity", "GridFaults", "DemandForecast", "RenewableIntegration",
+                           "UtilityEnergyManagement", "SupplyChainOptimization", "FieldOperations"])
+    ]
+
+    # Run parameters and the stages that use them. as_of (the run date, today unless given)
+    # keys the asset register, so the fleet is re-read - and snapshotted to the run
+    # history - once per day rather than once per session.
+    DEFAULT_PARAMS = {"horizon_days": 30, "resolution": "D", "company_type": "Integrated Utility",
+                      "lat": 51.5, "lon": -0.1}
+    STAGE_PARAMS = {
+        "AssetIntegrity": ["as_of"],
+        "DemandForecast": ["horizon_days", "resolution"],
+        "RenewableIntegration": ["lat", "lon"],
+        "SupplyChainOptimization": ["company_type"]
+    }
+
+    def __init__(self, token_budget=None, cost_budget=None, history=None, run_deadline_s=None):
+        # Stage cache: stage -> {input key: (output, output digest)}, most recent last
+        self._cache = {}
+        # stage -> digest of the output the latest run used
+        self._current = {}
+        self.cache_entries_per_stage = 8
+        self.last_run = {"recomputed": [], "cached": []}
+        self.last_trace = None
+        # Per-run trace files (Chrome trace JSON + OpenMetrics) when set
+        self.trace_dir = os.getenv("ORCHESTRATOR_TRACE_DIR")
+        # Per-run GenAI budget (defaults from ORCHESTRATOR_RUN_TOKEN_BUDGET / _COST_BUDGET)
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.last_budget = None
+        # Run history database (ORCHESTRATOR_HISTORY_DB) for trend queries; run_history pulls in
+        # pandas, so it is only imported when a history store is configured
+        self.history = history
+        if history is None and os.getenv("ORCHESTRATOR_HISTORY_DB"):
+            from run_history import RunHistoryStore
+            self.history = RunHistoryStore.from_env()
+        # Latency SLO: GenAI calls past this point fall back to rule-based advisories
+        deadline_env = os.getenv("ORCHESTRATOR_RUN_DEADLINE_S")
+        self.run_deadline_s = run_deadline_s or (float(deadline_env) if deadline_env else None)
+        self._deadline_at = None
+
+    # Agents are instantiated on first access
+    def __getattr__(self, name):
+        if name not in AGENT_REGISTRY:
+            raise AttributeError(name)
+        agent = load_agent(name)
+        setattr(self, name, agent)
+        return agent
+
+    # -------------------------
+    # Stage functions
+    # -------------------------
+    def _asset_integrity(self, r, params):
         # Step 1: Asset Integrity
-        asset_data = self.asset_agent.asset_register()["assets"]
+        return self.asset_agent.asset_register()["assets"]
 
+    def _grid_faults(self, r, params):
         # Step 2: Grid Fault Forecasting
-        grid_exceptions = self.grid_agent.run(asset_data)["detected_exceptions"]
+        return self.grid_agent.run(r["AssetIntegrity"])["detected_exceptions"]
 
+    def _demand_forecast(self, r, params):
         # Step 3: Demand Forecasting
-        demand_results = self.demand_agent.run(
-            assets=asset_data, grid_exceptions=grid_exceptions, horizon_days=30
+        return self.demand_agent.run(
+            assets=r["AssetIntegrity"], grid_exceptions=r["GridFaults"], horizon_days=params["horizon_days"],
+            resolution=params["resolution"]
         )
-        demand_forecast = demand_results["forecast"]
 
+    def _renewable_integration(self, r, params):
         # Step 4: Renewable Integration
-        renewable_results = self.renewable_agent.run(
-            demand_forecast=demand_forecast,
-            grid_exceptions=grid_exceptions,
-            assets=asset_data
+        return self.renewable_agent.run(
+            demand_forecast=r["DemandForecast"]["forecast"],
+            grid_exceptions=r["GridFaults"],
+            assets=r["AssetIntegrity"],
+            lat=params["lat"],
+            lon=params["lon"]
         )
-        renewable_plan = renewable_results["integration_plan"]
 
+    def _energy_management(self, r, params):
         # Step 5: Utility Energy Management
-        energy_mgmt_results = self.energy_mgmt_agent.run(
-            assets=asset_data,
-            grid_exceptions=grid_exceptions,
-            demand_forecast=demand_forecast,
-            renewable_plan=renewable_plan
+        return self.energy_mgmt_agent.run(
+            assets=r["AssetIntegrity"],
+            grid_exceptions=r["GridFaults"],
+            demand_forecast=r["DemandForecast"]["forecast"],
+            renewable_plan=r["RenewableIntegration"]["integration_plan"]
         )
-        dispatch_plan = energy_mgmt_results["dispatch_plan"]
 
+    def _supply_chain(self, r, params):
         # Step 6: Supply Chain Optimization
-        supply_chain_results = self.supply_chain_agent.run(
-            assets=asset_data,
-            grid_exceptions=grid_exceptions,
-            demand_forecast=demand_forecast,
-            renewable_plan=renewable_plan,
-            dispatch_plan=dispatch_plan,
-            company_type="Integrated Utility"
+        return self.supply_chain_agent.run(
+            assets=r["AssetIntegrity"],
+            grid_exceptions=r["GridFaults"],
+            demand_forecast=r["DemandForecast"]["forecast"],
+            renewable_plan=r["RenewableIntegration"]["integration_plan"],
+            dispatch_plan=r["UtilityEnergyManagement"]["dispatch_plan"],
+            company_type=params["company_type"]
         )
-        supply_chain_plan = supply_chain_results["parts_forecast"]
 
+    def _field_operations(self, r, params):
         # Step 7: Field Operations
-        field_ops_results = self.field_ops_agent.run(
-            assets=asset_data,
-            grid_exceptions=grid_exceptions,
-            demand_forecast=demand_forecast,
-            renewable_plan=renewable_plan,
-            dispatch_plan=dispatch_plan,
-            supply_chain=supply_chain_plan
+        return self.field_ops_agent.run(
+            assets=r["AssetIntegrity"],
+            grid_exceptions=r["GridFaults"],
+            demand_forecast=r["DemandForecast"]["forecast"],
+            renewable_plan=r["RenewableIntegration"]["integration_plan"],
+            dispatch_plan=r["UtilityEnergyManagement"]["dispatch_plan"],
+            supply_chain=r["SupplyChainOptimization"]["parts_forecast"]
         )
 
+    def _energy_trading(self, r, params):
         # Step 8: Energy Trading
-        trading_results = self.trading_agent.run(
-            assets=asset_data,
-            grid_exceptions=grid_exceptions,
-            demand_forecast=demand_forecast,
-            renewable_plan=renewable_plan,
-            dispatch_plan=dispatch_plan,
-            supply_chain=supply_chain_plan,
-            field_ops=field_ops_results["work_orders"]
+        return self.trading_agent.run(
+            assets=r["AssetIntegrity"],
+            grid_exceptions=r["GridFaults"],
+            demand_forecast=r["DemandForecast"]["forecast"],
+            renewable_plan=r["RenewableIntegration"]["integration_plan"],
+            dispatch_plan=r["UtilityEnergyManagement"]["dispatch_plan"],
+            supply_chain=r["SupplyChainOptimization"]["parts_forecast"],
+            field_ops=r["FieldOperations"]["work_orders"]
         )
 
-        # Final orchestration output
+    def _stage_fn(self, stage):
         return {
-            "AssetIntegrity": asset_data,
-            "GridFaults": grid_exceptions,
-            "DemandForecast": demand_results,
-            "RenewableIntegration": renewable_results,
-            "UtilityEnergyManagement": energy_mgmt_results,
-            "SupplyChainOptimization": supply_chain_results,
-            "FieldOperations": field_ops_results,
-            "EnergyTrading": trading_results
-        }
+            "AssetIntegrity": self._asset_integrity,
+            "GridFaults": self._grid_faults,
+            "DemandForecast": self._demand_forecast,
+            "RenewableIntegration": self._renewable_integration,
+            "UtilityEnergyManagement": self._energy_management,
+            "SupplyChainOptimization": self._supply_chain,
+            "FieldOperations": self._field_operations,
+            "EnergyTrading": self._energy_trading
+        }[stage]
+
+    # -------------------------
+    # Memoization
+    # -------------------------
+    @staticmethod
+    def _digest(value):
+        payload = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # Key = stage parameters + digests of the upstream outputs it reads
+    def _stage_key(self, stage, deps, params):
+        return self._digest({
+            "stage": stage,
+            "params": {k: params[k] for k in self.STAGE_PARAMS.get(stage, [])},
+            "upstream": {d: self._current[d] for d in deps}
+        })
+
+    def dependents(self, stage):
+        affected = {stage}
+        for name, deps in self.STAGES:
+            if affected.intersection(deps):
+                affected.add(name)
+        return [name for name, _ in self.STAGES if name in affected]
+
+    # Drop a stage and everything downstream of it from the cache
+    def invalidate(self, stage=None):
+        if stage is None:
+            self._cache.clear()
+            self._current.clear()
+            return [name for name, _ in self.STAGES]
+        invalidated = self.dependents(stage)
+        for name in invalidated:
+            self._cache.pop(name, None)
+            self._current.pop(name, None)
+        return invalidated
+
+    # Trace, GenAI budget and deadline of the latest run, for work done on its behalf
+    @contextmanager
+    def run_context(self):
+        if self.last_trace is None:
+            raise RuntimeError("run_context() needs a run: call run() or stream() first")
+        with self.last_trace.activate(), self.last_budget.activate(), deadline_at(self._deadline_at):
+            yield
+
+    # Stages whose GenAI calls fell back or were skipped are not cached
+    @staticmethod
+    def _degraded(spans):
+        return any(cat == "llm" and ("fallback" in attrs or attrs.get("skipped"))
+                   for _, cat, _, _, _, attrs in spans)
+
+    # Yield each stage's result as soon as it is available
+    def stream(self, **params):
+        params = {**self.DEFAULT_PARAMS, "as_of": date.today().isoformat(), **params}
+        results = {}
+        run_started = time.perf_counter()
+        trace = Trace()
+        self.last_trace = trace
+        budget = RunBudget(trace.run_id, max_tokens=self.token_budget, max_cost=self.cost_budget)
+        self.last_budget = budget
+        self._deadline_at = time.monotonic() + self.run_deadline_s if self.run_deadline_s else None
+        self.last_run = {"recomputed": [], "cached": [], "degraded": [], "run_id": trace.run_id}
+
+        for stage, deps in self.STAGES:
+            started = time.perf_counter()
+            first_span = len(trace.spans)
+            with self.run_context(), trace.span(stage, "stage") as attrs:
+                key = self._stage_key(stage, deps, params)
+                entries = self._cache.setdefault(stage, OrderedDict())
+                cached = key in entries
+                attrs["cache_hit"] = cached
+                if cached:
+                    entries.move_to_end(key)
+                    output, digest = entries[key]
+                    self.last_run["cached"].append(stage)
+                else:
+                    output = self._stage_fn(stage)(results, params)
+                    digest = self._digest(output)
+                    if self._degraded(trace.spans[first_span:]):
+                        self.last_run["degraded"].append(stage)
+                    else:
+                        entries[key] = (output, digest)
+                        if len(entries) > self.cache_entries_per_stage:
+                            entries.popitem(last=False)
+                    self.last_run["recomputed"].append(stage)
+                self._current[stage] = digest
+
+            results[stage] = output
+            yield {
+                "stage": stage,
+                "output": output,
+                "cached": cached,
+                "elapsed_s": round(time.perf_counter() - started, 3)
+            }
+
+        elapsed = time.perf_counter() - run_started
+        self.last_run["elapsed_s"] = round(elapsed, 3)
+        if self.run_deadline_s:
+            self.last_run["deadline_s"] = self.run_deadline_s
+            self.last_run["deadline_met"] = elapsed <= self.run_deadline_s
+        self.last_run["usage"] = LEDGER.run_summary(trace.run_id)
+        self.last_run["budget"] = budget.summary()
+        if self.history is not None:
+            self.history.record_run(trace.run_id, trace.started_at, params, results,
+                                    recomputed=self.last_run["recomputed"], usage=self.last_run["usage"]["totals"])
+        if self.trace_dir:
+            trace.export(self.trace_dir)
+
+    def run(self, **params):
+        results = {}
+        for event in self.stream(**params):
+            results[event["stage"]] = event["output"]
+
+        # Final orchestration output
+        return results
 
 # Example usage
 if __name__ == "__main__":
+    import argparse
+    from result_serializer import SERIALIZERS, get_serializer, dumps_json
+
+    parser = argparse.ArgumentParser(description="Run all agents once and print or export the results.")
+    parser.add_argument("--format", choices=list(SERIALIZERS), default="json")
+    parser.add_argument("--out", default=None, help="File (json/msgpack) or directory (parquet); prints JSON if omitted")
+    parser.add_argument("--compression", default=None,
+                        help="gzip | xz | zstd for json/msgpack; snappy | zstd | gzip for parquet")
+    args = parser.parse_args()
+
     orchestrator = OrchestratorAgent()
     results = orchestrator.run()
-    import json
-    print(json.dumps(results, indent=2))
+    if args.out:
+        options = {"compression": args.compression} if args.compression or args.format != "parquet" else {}
+        print(f"Saved {get_serializer(args.format, **options).write(results, args.out)}")
+    else:
+        print(dumps_json(results, indent=2))
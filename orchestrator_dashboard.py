@@ -1,46 +1,175 @@
+import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
-import os
 import pprint
 from orchestrator import OrchestratorAgent
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from run_history import RunHistoryStore
+from genai import stream_completion
+import fallback_advisories
 
-# ----------------------
-# Azure OpenAI Setup
-# ----------------------
-load_dotenv()
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-
-def genai_advisory(prompt: str):
+# Yields the advisory as it is generated, for st.write_stream
+def genai_advisory(prompt: str, fallback=None):
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        yield from stream_completion(
+            agent="dashboard",
+            priority="low",
+            fallback=fallback,
             messages=[
                 {"role": "system", "content": "You are a utility operations advisor."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            max_tokens=400
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
-        return f"⚠️ GenAI Error: {e}"
+        yield f"⚠️ GenAI Error: {e}"
 
 # ----------------------
 # Table Coloring Logic (RUL-driven)
 # ----------------------
-def color_rag(row):
-    if "RUL (months)" in row:
-        if row["RUL (months)"] <= 3:
-            return ['background-color: red'] * len(row)
-        elif row["RUL (months)"] <= 6:
-            return ['background-color: yellow'] * len(row)
-    return ['background-color: lightgreen'] * len(row)
+RAG_COLORS = {
+    "Red": "background-color: red",
+    "Amber": "background-color: yellow",
+    "Green": "background-color: lightgreen"
+}
+
+# Whole-column RAG status, computed once per table
+def rag_column(df):
+    codes = np.full(len(df), 2, dtype=np.int8)
+    if "RUL (months)" in df:
+        rul = pd.to_numeric(df["RUL (months)"], errors="coerce").to_numpy()
+        codes = np.select([rul <= 3, rul <= 6], [0, 1], 2).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=list(RAG_COLORS))
+
+# Cell styles for one page, from its slice of the RAG column
+def color_rag(page, rag):
+    css = pd.Series(rag).map(RAG_COLORS).to_numpy(dtype=object)
+    return pd.DataFrame(np.repeat(css[:, None], page.shape[1], axis=1), index=page.index, columns=page.columns)
+
+# ----------------------
+# Paged tables
+# ----------------------
+PAGE_SIZES = [50, 100, 500, 1000]
+PROMPT_RECORDS = 50
+
+# Only the visible page (and selected columns) is sent to the browser
+def paged_table(label, df, colored=False):
+    key = label.replace(" ", "_").lower()
+    columns = st.multiselect("Columns", list(df.columns), default=list(df.columns), key=f"{key}_columns")
+    left, right = st.columns([1, 3])
+    page_size = left.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    pages = max(1, -(-len(df) // page_size))
+    page_no = right.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+
+    start = (page_no - 1) * page_size
+    page = df.iloc[start:start + page_size][columns or list(df.columns)]
+    if colored:
+        rag = df["RAG"].to_numpy()[start:start + page_size]
+        page = page.style.apply(lambda p: color_rag(p, rag), axis=None)
+    st.dataframe(page, use_container_width=True, height=300)
+    st.caption(f"Rows {start + 1:,}–{min(start + page_size, len(df)):,} of {len(df):,}")
+
+# Large tables are trimmed before they go into the GenAI prompt
+def prompt_preview(output):
+    if isinstance(output, list) and len(output) > PROMPT_RECORDS:
+        return output[:PROMPT_RECORDS] + [f"... {len(output) - PROMPT_RECORDS:,} more records"]
+    if isinstance(output, dict):
+        return {k: prompt_preview(v) for k, v in output.items()}
+    return output
+
+# ----------------------
+# Per-agent tab rendering
+# ----------------------
+# Explicit mapping to orchestrator keys
+tab_mapping = {
+    "Asset Integrity": "AssetIntegrity",
+    "Grid Faults": "GridFaults",
+    "Demand Forecast": "DemandForecast",
+    "Renewable Integration": "RenewableIntegration",
+    "Utility Energy Management": "UtilityEnergyManagement",
+    "Supply Chain Optimization": "SupplyChainOptimization",
+    "Field Operations": "FieldOperations",
+    "Energy Trading": "EnergyTrading"
+}
+
+# Table held in each agent's output dict
+table_keys = {
+    "Demand Forecast": "forecast",
+    "Renewable Integration": "integration_plan",
+    "Utility Energy Management": "dispatch_plan",
+    "Supply Chain Optimization": "parts_forecast",
+    "Field Operations": "work_orders",
+    "Energy Trading": "buy_sell_orders"
+}
+
+# DataFrames are built once per run and reused across reruns (paging, column changes)
+def table_frame(run_id, label, records):
+    frames = st.session_state.setdefault("frames", {})
+    if (run_id, label) not in frames:
+        df = pd.DataFrame(records) if isinstance(records, list) else pd.json_normalize(records)
+        if label == "Asset Integrity":
+            df["RAG"] = rag_column(df)
+        frames[(run_id, label)] = df
+    return frames[(run_id, label)]
+
+def render_tab(label, output, run_id, advisory=None):
+    st.subheader(f"{label} Results")
+    if not output:
+        st.warning("⚠️ No data returned from this agent.")
+        return None
+
+    # --- Custom handling per agent ---
+    if label in ("Asset Integrity", "Grid Faults"):
+        paged_table(label, table_frame(run_id, label, output), colored=label == "Asset Integrity")
+
+    elif isinstance(output, dict) and label in table_keys:
+        if label == "Energy Trading" and "market_position" in output:
+            st.json(output["market_position"])
+        if table_keys[label] in output:
+            paged_table(label, table_frame(run_id, label, output[table_keys[label]]))
+        if label == "Demand Forecast" and "summary" in output:
+            st.markdown(f"**Agent Summary:** {output['summary']}")
+
+    else:
+        st.json(output)
+
+    # --- GenAI Recommendation ---
+    st.markdown("### 🤖 GenAI Recommendation")
+    if advisory is not None:
+        st.info(advisory)
+        return advisory
+
+    preview = prompt_preview(output)
+    try:
+        safe_output = json.dumps(preview, indent=2, default=str)
+    except Exception:
+        safe_output = pprint.pformat(preview, indent=2)
+
+    prompt = f"Summarize insights and give a recommendation for the following {label} results:\n{safe_output}"
+    with st.container(border=True):
+        return st.write_stream(genai_advisory(prompt, lambda: fallback_advisories.generic(label, output)))
+
+# ----------------------
+# Trends from the run history
+# ----------------------
+def render_history(history):
+    with st.expander("📈 Trends across runs"):
+        days = st.slider("Window (days)", 7, 365, 90, key="history_days")
+        repeats = history.repeat_faults(days=days)
+        st.markdown(f"**Repeat faults per substation (last {days} days)**")
+        if repeats.empty:
+            st.caption("No repeat faults recorded yet.")
+        else:
+            st.bar_chart(repeats.groupby("substation")["faults"].sum())
+            st.dataframe(repeats, use_container_width=True, height=250)
+
+        drift = history.rul_drift(days=days)
+        st.markdown(f"**RUL drift per asset (last {days} days)**")
+        if drift.empty:
+            st.caption("No asset snapshots recorded yet.")
+        else:
+            st.dataframe(drift.head(500), use_container_width=True, height=250)
 
 # ----------------------
 # Streamlit UI
@@ -49,103 +178,77 @@ st.set_page_config(page_title="Utility Orchestrator", layout="wide")
 st.title("⚡ Utility Orchestrator – Multi-Agent Dashboard")
 
 st.sidebar.header("Controls")
+
+# Keep one orchestrator per session so unchanged stages come from its cache
+if "orchestrator" not in st.session_state:
+    history = RunHistoryStore(os.getenv("ORCHESTRATOR_HISTORY_DB", "run_history.db"))
+    st.session_state.orchestrator = OrchestratorAgent(history=history)
+orch = st.session_state.orchestrator
+
+company_type = st.sidebar.selectbox(
+    "Company type",
+    ["Integrated Utility", "Transmission Operator", "Distribution Operator",
+     "Generation Company", "Retail Energy Supplier"]
+)
+horizon_days = st.sidebar.slider("Forecast horizon (days)", 7, 90, 30)
+resolution = st.sidebar.selectbox("Demand resolution", ["D", "30min", "15min"],
+                                  format_func={"D": "Daily", "30min": "30 minutes", "15min": "15 minutes"}.get)
+
+stage_names = [name for name, _ in OrchestratorAgent.STAGES]
+stale_stage = st.sidebar.selectbox("Stage to recompute", stage_names)
+if st.sidebar.button("↻ Invalidate stage"):
+    invalidated = orch.invalidate(stale_stage)
+    st.sidebar.caption(f"Invalidated: {', '.join(invalidated)}")
+
+labels = list(tab_mapping.keys())
+
 if st.sidebar.button("▶ Run Orchestrator"):
-    orch = OrchestratorAgent()
-    results = orch.run()
-
-    # Explicit mapping to orchestrator keys
-    tab_mapping = {
-        "Asset Integrity": "AssetIntegrity",
-        "Grid Faults": "GridFaults",
-        "Demand Forecast": "DemandForecast",
-        "Renewable Integration": "RenewableIntegration",
-        "Utility Energy Management": "UtilityEnergyManagement",
-        "Supply Chain Optimization": "SupplyChainOptimization",
-        "Field Operations": "FieldOperations",
-        "Energy Trading": "EnergyTrading"
-    }
-
-    tabs = st.tabs(list(tab_mapping.keys()))
-
-    for idx, (label, agent_key) in enumerate(tab_mapping.items()):
-        with tabs[idx]:
-            st.subheader(f"{label} Results")
-
-            output = results.get(agent_key, {})
-            if not output:
-                st.warning("⚠️ No data returned from this agent.")
-                continue
-
-            df = None
-
-            # --- Custom handling per agent ---
-            if label == "Asset Integrity":
-                df = pd.DataFrame(output) if isinstance(output, list) else pd.json_normalize(output)
-                styled_df = df.style.apply(color_rag, axis=1)
-                st.dataframe(styled_df, use_container_width=True, height=300)
-
-            elif label == "Grid Faults":
-                df = pd.DataFrame(output) if isinstance(output, list) else pd.json_normalize(output)
-                st.dataframe(df, use_container_width=True, height=300)
-
-            elif label == "Demand Forecast":
-                if isinstance(output, dict) and "forecast" in output:
-                    df = pd.DataFrame(output["forecast"])
-                    st.dataframe(df, use_container_width=True, height=300)
-                    if "summary" in output:
-                        st.markdown(f"**Agent Summary:** {output['summary']}")
-                else:
-                    st.json(output)
-
-            elif label == "Renewable Integration":
-                if isinstance(output, dict) and "integration_plan" in output:
-                    df = pd.DataFrame(output["integration_plan"])
-                    st.dataframe(df, use_container_width=True, height=300)
-                else:
-                    st.json(output)
-
-            elif label == "Utility Energy Management":
-                if isinstance(output, dict) and "dispatch_plan" in output:
-                    df = pd.DataFrame(output["dispatch_plan"])
-                    st.dataframe(df, use_container_width=True, height=300)
-                else:
-                    st.json(output)
-
-            elif label == "Supply Chain Optimization":
-                if isinstance(output, dict) and "parts_forecast" in output:
-                    df = pd.DataFrame(output["parts_forecast"])
-                    st.dataframe(df, use_container_width=True, height=300)
-                else:
-                    st.json(output)
-
-            elif label == "Field Operations":
-                if isinstance(output, dict) and "work_orders" in output:
-                    df = pd.DataFrame(output["work_orders"])
-                    st.dataframe(df, use_container_width=True, height=300)
-                else:
-                    st.json(output)
-
-            elif label == "Energy Trading":
-                if isinstance(output, dict):
-                    if "market_position" in output:
-                        st.json(output["market_position"])
-                    if "buy_sell_orders" in output:
-                        df = pd.DataFrame(output["buy_sell_orders"])
-                        st.dataframe(df, use_container_width=True, height=300)
-                else:
-                    st.json(output)
-
-            # --- GenAI Recommendation ---
-            try:
-                safe_output = json.dumps(output, indent=2, default=str)
-            except Exception:
-                safe_output = pprint.pformat(output, indent=2)
-
-            prompt = f"Summarize insights and give a recommendation for the following {label} results:\n{safe_output}"
-            with st.spinner("Generating GenAI recommendation..."):
-                advisory = genai_advisory(prompt)
-                st.markdown("### 🤖 GenAI Recommendation")
-                st.info(advisory)
+    tabs = dict(zip(labels, st.tabs(labels)))
+    label_for = {agent_key: label for label, agent_key in tab_mapping.items()}
+    progress = st.progress(0.0, text="Running orchestrator...")
+    st.session_state.frames = {}
+    run = {"outputs": {}, "advisories": {}}
+
+    # Render each tab as soon as its stage finishes
+    stream = orch.stream(company_type=company_type, horizon_days=horizon_days, resolution=resolution)
+    for done, event in enumerate(stream, start=1):
+        label = label_for[event["stage"]]
+        source = "cache" if event["cached"] else f"{event['elapsed_s']:.1f}s"
+        progress.progress(done / len(labels), text=f"{label} ready ({source})")
+        run["run_id"] = orch.last_run["run_id"]
+        run["outputs"][label] = event["output"]
+        # Dashboard advisories draw on the same per-run GenAI budget
+        with tabs[label], orch.run_context():
+            run["advisories"][label] = render_tab(label, event["output"], run["run_id"])
+
+    progress.empty()
+    # Kept so paging and column changes re-render without re-running agents or GenAI
+    st.session_state.last_dashboard_run = run
+    st.sidebar.caption(
+        f"Recomputed {len(orch.last_run['recomputed'])} stage(s), "
+        f"reused {len(orch.last_run['cached'])} from cache."
+    )
+    budget = orch.last_budget.summary()
+    st.sidebar.caption(
+        f"GenAI: {budget['used_tokens']:,} / {budget['max_tokens']:,} tokens, "
+        f"cost {budget['used_cost']:.4f} / {budget['max_cost']:.2f}, "
+        f"{budget['downgraded_calls']} downgraded, {budget['skipped_calls']} skipped."
+    )
+    if "deadline_met" in orch.last_run:
+        st.sidebar.caption(
+            f"Run took {orch.last_run['elapsed_s']:.1f}s of a {orch.last_run['deadline_s']:.0f}s deadline"
+            f"{'' if orch.last_run['deadline_met'] else ' (missed)'}; "
+            f"{len(orch.last_run['degraded'])} stage(s) used rule-based advisories."
+        )
+
+elif "last_dashboard_run" in st.session_state:
+    run = st.session_state.last_dashboard_run
+    tabs = dict(zip(labels, st.tabs(labels)))
+    for label, output in run["outputs"].items():
+        with tabs[label]:
+            render_tab(label, output, run["run_id"], advisory=run["advisories"].get(label) or "")
 
 else:
     st.info("Click **▶ Run Orchestrator** in the sidebar to execute all 8 agents.")
+
+render_history(orch.history)
@@ -0,0 +1,246 @@
+import heapq
+import random
+import time
+from array import array
+from collections import deque
+
+BUY, SELL = 1, -1
+# Quantities below this (MWh) are float residue, not volume: never rested or matched
+QTY_EPSILON = 1e-6
+
+# -------------------------
+# Limit order book (price-time priority)
+# -------------------------
+class OrderBook:
+    def __init__(self, product, tick=0.01):
+        self.product = product
+        self.tick = tick
+
+        # Compact order storage, indexed by order id
+        self.side = array("b")
+        self.price = array("q")   # price in ticks
+        self.qty = array("d")     # remaining MWh; 0 once filled or cancelled
+        self.owner = []
+
+        # Heap of price levels per side (bids negated so both are min-heaps)
+        self._heaps = {BUY: [], SELL: []}
+        self._levels = {BUY: {}, SELL: {}}
+
+        # Trade tape
+        self.trade_maker = array("q")
+        self.trade_taker = array("q")
+        self.trade_price = array("q")
+        self.trade_qty = array("d")
+
+    def _key(self, side, ticks):
+        return -ticks if side == BUY else ticks
+
+    # Top-of-book level for a side, skipping levels emptied by cancels
+    def _top(self, side):
+        heap, levels = self._heaps[side], self._levels[side]
+        while heap:
+            ticks = heap[0] if side == SELL else -heap[0]
+            level = levels[ticks]
+            while level and self.qty[level[0]] <= QTY_EPSILON:
+                level.popleft()
+            if level:
+                return ticks, level
+            del levels[ticks]
+            heapq.heappop(heap)
+        return None, None
+
+    def best_bid(self):
+        ticks, _ = self._top(BUY)
+        return ticks * self.tick if ticks is not None else None
+
+    def best_ask(self):
+        ticks, _ = self._top(SELL)
+        return ticks * self.tick if ticks is not None else None
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return bid if ask is None else ask
+        return (bid + ask) / 2
+
+    # Limit order; returns (order id, [(price, qty), ...] fills)
+    def submit(self, side, price, qty, owner=None):
+        ticks = int(round(price / self.tick))
+        oid = len(self.qty)
+        self.side.append(side)
+        self.price.append(ticks)
+        self.qty.append(0.0)
+        self.owner.append(owner)
+
+        fills = []
+        remaining = float(qty)
+        opposite = -side
+        while remaining > QTY_EPSILON:
+            best, level = self._top(opposite)
+            if best is None or (side == BUY and best > ticks) or (side == SELL and best < ticks):
+                break
+            while level and remaining > QTY_EPSILON:
+                maker = level[0]
+                fill = min(remaining, self.qty[maker])
+                if fill > QTY_EPSILON:
+                    self.qty[maker] -= fill
+                    remaining -= fill
+                    self.trade_maker.append(maker)
+                    self.trade_taker.append(oid)
+                    self.trade_price.append(best)
+                    self.trade_qty.append(fill)
+                    fills.append((best * self.tick, fill))
+                if self.qty[maker] <= QTY_EPSILON:
+                    self.qty[maker] = 0.0
+                    level.popleft()
+
+        # Rest the unfilled remainder
+        if remaining > QTY_EPSILON:
+            self.qty[oid] = remaining
+            levels = self._levels[side]
+            if ticks not in levels:
+                levels[ticks] = deque()
+                heapq.heappush(self._heaps[side], self._key(side, ticks))
+            levels[ticks].append(oid)
+        return oid, fills
+
+    def cancel(self, oid):
+        self.qty[oid] = 0.0
+
+    def depth(self, side, levels=5):
+        out = []
+        for ticks in sorted(self._levels[side], reverse=(side == BUY)):
+            live = sum(self.qty[o] for o in self._levels[side][ticks])
+            if live > QTY_EPSILON:
+                out.append((ticks * self.tick, live))
+            if len(out) == levels:
+                break
+        return out
+
+
+# -------------------------
+# Market simulator (hourly + daily products)
+# -------------------------
+def hourly_products(delivery_date):
+    return [f"{delivery_date} H{h:02d}" for h in range(24)]
+
+
+def daily_product(delivery_date):
+    return f"{delivery_date} Base"
+
+
+class MarketSimulator:
+    def __init__(self, mid_price=55.0, spread=0.5, seed=None):
+        self.mid_price = mid_price
+        self.spread = spread
+        self.rng = random.Random(seed)
+        self.books = {}
+        # Delivery date of each dated product's book, for dropping delivered books
+        self.delivery = {}
+
+    def book(self, product):
+        if product not in self.books:
+            self.books[product] = OrderBook(product)
+        return self.books[product]
+
+    # Resting synthetic liquidity around the mid price
+    def seed_liquidity(self, product, levels=20, orders_per_level=5, mean_qty=25.0, mid=None):
+        book = self.book(product)
+        mid = self.mid_price if mid is None else mid
+        for i in range(levels):
+            offset = self.spread / 2 + i * 0.25
+            for _ in range(orders_per_level):
+                qty = round(self.rng.expovariate(1 / mean_qty), 1) or 1.0
+                book.submit(SELL, mid + offset, qty, owner="market")
+                book.submit(BUY, mid - offset, qty, owner="market")
+        return book
+
+    # Random marketable and passive flow
+    def synthetic_flow(self, product, n=1000, aggressive=0.3):
+        book = self.book(product)
+        for _ in range(n):
+            side = BUY if self.rng.random() < 0.5 else SELL
+            offset = self.rng.uniform(-1.0, 1.0) if self.rng.random() < aggressive else self.rng.uniform(0.3, 3.0)
+            price = self.mid_price - side * offset
+            book.submit(side, round(price, 2), round(self.rng.uniform(1, 50), 1), owner="market")
+        return book
+
+    # Drop the books of every product delivered before delivery_date
+    def close_before(self, delivery_date):
+        for product in [p for p, d in self.delivery.items() if d < delivery_date]:
+            del self.books[product], self.delivery[product]
+
+    # Seed the daily book agents trade for a delivery date with synthetic flow; a book
+    # that earlier sessions emptied on one side is topped up around its last mid. Books
+    # for earlier delivery dates are dropped, so a long-running session does not grow.
+    def open_session(self, delivery_date, flow=200):
+        delivery_date = str(delivery_date)
+        self.close_before(delivery_date)
+        product = daily_product(delivery_date)
+        if product not in self.books:
+            self.delivery[product] = delivery_date
+            self.seed_liquidity(product)
+            self.synthetic_flow(product, n=flow)
+        else:
+            book = self.books[product]
+            if book.best_bid() is None or book.best_ask() is None:
+                self.seed_liquidity(product, mid=book.mid())
+        return self.books[product]
+
+    # Execute agent orders against the daily product book. Orders are immediate-or-cancel:
+    # whatever does not fill is cancelled, so later runs never trade against stale agent orders.
+    def execute(self, orders):
+        executions = []
+        for order in orders:
+            side = BUY if order["type"] == "BUY" else SELL
+            product = daily_product(order["delivery_date"])
+            self.delivery.setdefault(product, str(order["delivery_date"]))
+            book = self.book(product)
+            if book.mid() is None:
+                self.seed_liquidity(product)
+            reference = book.mid()
+
+            oid, fills = book.submit(side, order["price"], order["volume_mwh"], owner="agent")
+            book.cancel(oid)
+            filled = sum(q for _, q in fills)
+            avg_price = sum(p * q for p, q in fills) / filled if filled else None
+            executions.append({
+                "type": order["type"],
+                "product": product,
+                "requested_mwh": order["volume_mwh"],
+                "filled_mwh": round(filled, 1),
+                "fill_ratio": round(filled / order["volume_mwh"], 3) if order["volume_mwh"] else 0.0,
+                "avg_price": round(avg_price, 2) if avg_price is not None else None,
+                "reference_mid": round(reference, 2),
+                # Positive slippage = worse than the pre-trade mid
+                "slippage": round(side * (avg_price - reference), 2) if avg_price is not None else None,
+                "status": "FILLED" if filled >= order["volume_mwh"] - QTY_EPSILON else ("PARTIAL" if filled else "CANCELLED")
+            })
+        return executions
+
+
+# -------------------------
+# Throughput benchmark
+# -------------------------
+def benchmark(n_orders=300_000, seed=7):
+    rng = random.Random(seed)
+    book = OrderBook("bench")
+    sides = [BUY if rng.random() < 0.5 else SELL for _ in range(n_orders)]
+    prices = [round(55.0 + rng.gauss(0, 1.5), 2) for _ in range(n_orders)]
+    qtys = [rng.uniform(1, 50) for _ in range(n_orders)]
+
+    started = time.perf_counter()
+    submit = book.submit
+    for side, price, qty in zip(sides, prices, qtys):
+        submit(side, price, qty)
+    elapsed = time.perf_counter() - started
+    return {
+        "orders": n_orders,
+        "trades": len(book.trade_qty),
+        "seconds": round(elapsed, 3),
+        "orders_per_second": int(n_orders / elapsed)
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark())
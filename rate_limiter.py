@@ -0,0 +1,127 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+from resilience import retry_after_s
+
+# -------------------------
+# Client-side RPM / TPM scheduling
+# -------------------------
+# Calls wait here, highest priority first, until both the request and token
+# buckets can cover them, so the service is not pushed into returning 429s.
+PRIORITY_RANK = {"high": 0, "normal": 1, "low": 2}
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.level = float(self.capacity)
+        self.stamp = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    # Seconds until `amount` is available (requests larger than the bucket wait for a full one)
+    def wait_time(self, amount):
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class PriorityScheduler:
+    def __init__(self, rpm=None, tpm=None, burst_seconds=10):
+        # Bursts are limited to a few seconds' worth of quota rather than a whole minute
+        self.requests = TokenBucket(rpm, max(1, rpm * burst_seconds // 60)) if rpm else None
+        self.tokens = TokenBucket(tpm, max(1, tpm * burst_seconds // 60)) if tpm else None
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.stats = {"granted": 0, "throttled": 0, "wait_s": 0.0, "max_depth": 0}
+
+    @classmethod
+    def from_env(cls):
+        rpm, tpm = os.getenv("GENAI_RPM"), os.getenv("GENAI_TPM")
+        if not rpm and not tpm:
+            return None
+        return cls(rpm=int(rpm) if rpm else None, tpm=int(tpm) if tpm else None)
+
+    def _wait_time(self, now, tokens):
+        wait = max(0.0, self._paused_until - now)
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        return wait
+
+    # Block until this call is at the head of the queue and the buckets cover it
+    def acquire(self, priority="normal", tokens=0, timeout=None):
+        entry = (PRIORITY_RANK.get(priority, PRIORITY_RANK["normal"]), next(self._seq))
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._queue))
+            self._cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(now, tokens) if self._queue[0] == entry else None
+                    if wait == 0:
+                        heapq.heappop(self._queue)
+                        if self.requests is not None:
+                            self.requests.take(1)
+                        if self.tokens is not None:
+                            self.tokens.take(tokens)
+                        self.stats["granted"] += 1
+                        self.stats["wait_s"] += now - started
+                        self._cond.notify_all()
+                        return now - started
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise TimeoutError(f"GenAI call waited {timeout}s for rate-limit capacity")
+                        wait = min(wait if wait is not None else deadline - now, deadline - now)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    # Correct the token reservation once the real usage is known
+    def settle(self, reserved, used):
+        if self.tokens is None:
+            return
+        with self._cond:
+            if used < reserved:
+                self.tokens.give(reserved - used)
+            else:
+                self.tokens.take(used - reserved)
+            self._cond.notify_all()
+
+    # Stop granting for a while after the service throttles us anyway
+    def pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats["throttled"] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority="normal", tokens=0, timeout=None):
+        waited = self.acquire(priority, tokens, timeout)
+        try:
+            yield waited
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                self.pause(retry_after_s(e) or 1.0)
+            raise
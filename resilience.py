@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# -------------------------
+# Deadlines
+# -------------------------
+# Absolute time.monotonic() deadline for the current run; nested deadlines keep the earlier one
+_deadline = contextvars.ContextVar("run_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+@contextmanager
+def deadline_at(at):
+    if at is None:
+        yield
+        return
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline(seconds):
+    return deadline_at(None if seconds is None else time.monotonic() + seconds)
+
+
+def time_left():
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_after_s=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(failure_threshold=int(os.getenv("GENAI_BREAKER_FAILURES", 5)),
+                   reset_after_s=float(os.getenv("GENAI_BREAKER_RESET_S", 30)))
+
+    # Closed: allow. Open: fail fast until the cool-down ends, then let one probe through.
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after_s:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+# -------------------------
+# Retries and hedging
+# -------------------------
+_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="genai-call")
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_transient(error):
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, "status_code", None) in TRANSIENT_STATUS:
+        return True
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+
+
+# Seconds the service asked us to wait (Retry-After / retry-after-ms on a 429), or None
+def retry_after_s(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+# Attempts that lost the race: not started ones are cancelled, running ones hand any
+# late result to discard(result)
+def _abandon(futures, discard):
+    for future in futures:
+        if future.cancel() or discard is None:
+            continue
+        future.add_done_callback(lambda f: discard(f.result()) if f.exception() is None else None)
+
+
+# fn(timeout) runs in a worker thread; if it has not answered after hedge_after
+# seconds a second identical attempt starts and the first success wins
+def hedged_call(fn, timeout, hedge_after=None, discard=None):
+    expires = time.monotonic() + timeout
+    futures = [_pool.submit(fn, timeout)]
+    hedged = False
+    try:
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"GenAI call did not finish within {timeout:.1f}s")
+            can_hedge = not hedged and hedge_after is not None and hedge_after < remaining
+            done, _ = wait(futures, timeout=hedge_after if can_hedge else remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    return future.result(), hedged
+                if not futures:
+                    raise future.exception()
+            if not done and can_hedge:
+                futures.append(_pool.submit(fn, remaining))
+                hedged = True
+    finally:
+        _abandon(futures, discard)
+
+
+# Exponential backoff, or the service's Retry-After when it sends one
+def call_with_retries(fn, timeout, hedge_after=None, attempts=3, backoff_s=0.5, discard=None):
+    expires = time.monotonic() + timeout
+    for attempt in range(attempts):
+        remaining = expires - time.monotonic()
+        try:
+            result, hedged = hedged_call(fn, remaining, hedge_after, discard)
+            return result, {"attempts": attempt + 1, "hedged": hedged}
+        except Exception as e:
+            remaining = expires - time.monotonic()
+            delay = retry_after_s(e) or backoff_s * 2 ** attempt
+            if attempt == attempts - 1 or not is_transient(e) or delay >= remaining:
+                raise
+            time.sleep(delay)
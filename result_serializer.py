@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import gzip
+import lzma
+import math
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Orchestrator result serialization
+# -------------------------
+# Results are nested dicts of agent outputs; lists of records are "tables".
+# JSON keeps the nested shape; msgpack and parquet store tables column-wise.
+
+# Plain Python value for anything the encoders do not know (Timestamps, NumPy scalars, ...)
+def to_builtin(obj):
+    if obj is pd.NaT or obj is pd.NA or obj is None:
+        return None
+    if isinstance(obj, (pd.Timestamp, dt.datetime, dt.date, dt.time)):
+        return obj.isoformat()
+    if isinstance(obj, (pd.Timedelta, dt.timedelta)):
+        return obj.total_seconds()
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        value = float(obj)
+        return None if math.isnan(value) else value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+# Stdlib fallback: also turns non-string keys (tuples from groupby dicts) into strings
+def _normalize(obj):
+    if isinstance(obj, dict):
+        return {k if isinstance(k, (str, int, float, bool)) or k is None else str(to_builtin(k)): _normalize(v)
+                for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    if isinstance(obj, float) and math.isnan(obj):
+        return None
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return _normalize(to_builtin(obj))
+
+
+def compress(payload, compression):
+    if not compression:
+        return payload
+    if compression == "gzip":
+        return gzip.compress(payload, compresslevel=6)
+    if compression == "xz":
+        return lzma.compress(payload)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=6).compress(payload)
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def decompress(payload, compression):
+    if not compression:
+        return payload
+    if compression == "gzip":
+        return gzip.decompress(payload)
+    if compression == "xz":
+        return lzma.decompress(payload)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown compression {compression}")
+
+
+# -------------------------
+# Table extraction
+# -------------------------
+def is_table(value):
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(r, dict) for r in value)
+
+
+# Split results into {table path: DataFrame} (or the raw record lists with frames=False)
+# and the remaining nested structure, where each table is replaced by {"__table__": path}
+def split_tables(results, prefix="", frames=True):
+    tables = {}
+
+    def walk(value, path):
+        if is_table(value):
+            tables[path] = pd.DataFrame(value) if frames else value
+            return {"__table__": path}
+        if isinstance(value, dict):
+            return {k: walk(v, f"{path}.{k}" if path else str(k)) for k, v in value.items()}
+        return value
+
+    return tables, walk(results, prefix)
+
+
+def join_tables(tables, skeleton):
+    if isinstance(skeleton, dict):
+        if set(skeleton) == {"__table__"}:
+            table = tables[skeleton["__table__"]]
+            return table if isinstance(table, list) else table.to_dict(orient="records")
+        return {k: join_tables(tables, v) for k, v in skeleton.items()}
+    return skeleton
+
+
+# -------------------------
+# Serializers
+# -------------------------
+class JsonSerializer:
+    extension = ".json"
+
+    def __init__(self, indent=None, compression=None):
+        self.indent = indent
+        self.compression = compression
+
+    def dumps(self, results):
+        try:
+            import orjson
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if self.indent:
+                option |= orjson.OPT_INDENT_2
+            payload = orjson.dumps(results, default=to_builtin, option=option)
+        except (ImportError, TypeError):
+            payload = json.dumps(_normalize(results), indent=self.indent).encode("utf-8")
+        return compress(payload, self.compression)
+
+    def loads(self, payload):
+        return json.loads(decompress(payload, self.compression))
+
+    def write(self, results, path):
+        with open(path, "wb") as f:
+            f.write(self.dumps(results))
+        return path
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+
+class MsgpackSerializer:
+    extension = ".msgpack"
+
+    def __init__(self, compression=None):
+        self.compression = compression
+
+    # Tables whose records all share one key set are stored column-wise, straight from the
+    # records (no DataFrame, so None/int columns are not turned into NaN/float); anything
+    # else is stored row by row so no keys are invented on decode
+    @staticmethod
+    def _pack_table(records):
+        keys = records[0].keys()
+        if all(r.keys() == keys for r in records):
+            return {"columns": {k: [r[k] for r in records] for k in keys}}
+        return {"rows": records}
+
+    @staticmethod
+    def _unpack_table(table):
+        if "rows" in table:
+            return table["rows"]
+        columns = table["columns"]
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def dumps(self, results):
+        import msgpack
+        tables, skeleton = split_tables(results, frames=False)
+        packed = {path: self._pack_table(records) for path, records in tables.items()}
+        payload = msgpack.packb({"format": 2, "tables": packed, "results": skeleton},
+                                default=to_builtin, strict_types=False, use_bin_type=True)
+        return compress(payload, self.compression)
+
+    def loads(self, payload):
+        import msgpack
+        body = msgpack.unpackb(decompress(payload, self.compression), raw=False, strict_map_key=False)
+        if body.get("format") == 2:
+            tables = {path: self._unpack_table(table) for path, table in body["tables"].items()}
+        else:
+            # Files written before format 2: plain {column: values}
+            tables = {path: pd.DataFrame(cols) for path, cols in body["tables"].items()}
+        return join_tables(tables, body["results"])
+
+    def write(self, results, path):
+        with open(path, "wb") as f:
+            f.write(self.dumps(results))
+        return path
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+
+class ParquetSerializer:
+    # A directory: one parquet file per table plus manifest.json for everything else
+    extension = ""
+
+    def __init__(self, compression="snappy"):
+        self.compression = compression
+
+    @staticmethod
+    def _file_name(path):
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", path) + ".parquet"
+
+    @staticmethod
+    def _arrow_safe(df):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind.startswith("mixed") or kind in ("unknown-array", "empty"):
+                df[col] = [None if v is None else
+                           json.dumps(_normalize(v)) if isinstance(v, (dict, list)) else str(v)
+                           for v in df[col]]
+        return df
+
+    def write(self, results, path):
+        os.makedirs(path, exist_ok=True)
+        tables, skeleton = split_tables(results)
+        files = {}
+        for table, df in tables.items():
+            files[table] = self._file_name(table)
+            self._arrow_safe(df).to_parquet(os.path.join(path, files[table]), index=False,
+                                            compression=self.compression)
+        with open(os.path.join(path, "manifest.json"), "wb") as f:
+            f.write(JsonSerializer(indent=2).dumps({"tables": files, "results": skeleton}))
+        return path
+
+    def read(self, path):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        tables = {t: pd.read_parquet(os.path.join(path, name)) for t, name in manifest["tables"].items()}
+        return join_tables(tables, manifest["results"])
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "msgpack": MsgpackSerializer,
+    "parquet": ParquetSerializer
+}
+
+
+def get_serializer(name="json", **options):
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown result format {name}; choose from {', '.join(SERIALIZERS)}")
+    return SERIALIZERS[name](**options)
+
+
+def dumps_json(results, indent=None):
+    return JsonSerializer(indent=indent).dumps(results).decode("utf-8")
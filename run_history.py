@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# -------------------------
+# Run history (SQLite)
+# -------------------------
+# One row per run in `runs`, plus per-stage tables keyed by run_id/run_at.
+# Only recomputed stages are written; cache hits would duplicate the previous rows.
+# The asset register is recomputed once per run date, which gives rul_drift one
+# snapshot per day.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    run_at REAL NOT NULL,
+    params TEXT,
+    recomputed TEXT,
+    usage TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_run_at ON runs (run_at);
+
+CREATE TABLE IF NOT EXISTS asset_snapshots (
+    run_id TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    asset_id TEXT,
+    asset_type TEXT,
+    zone TEXT,
+    age_years REAL,
+    degradation_pct REAL,
+    corrosion_level REAL,
+    rul_months REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_assets_run_at ON asset_snapshots (run_at);
+CREATE INDEX IF NOT EXISTS idx_assets_asset ON asset_snapshots (asset_id, run_at);
+CREATE INDEX IF NOT EXISTS idx_assets_zone ON asset_snapshots (zone, run_at);
+
+CREATE TABLE IF NOT EXISTS grid_faults (
+    run_id TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    event_at TEXT,
+    substation TEXT,
+    event_type TEXT,
+    fault_code TEXT,
+    load_mw REAL,
+    asset_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_faults_run_at ON grid_faults (run_at);
+CREATE INDEX IF NOT EXISTS idx_faults_substation ON grid_faults (substation, run_at);
+CREATE INDEX IF NOT EXISTS idx_faults_asset ON grid_faults (asset_id, run_at);
+
+CREATE TABLE IF NOT EXISTS demand_forecasts (
+    run_id TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    forecast_date TEXT,
+    base_case REAL,
+    cold_wave REAL,
+    recession REAL,
+    supply_shock REAL
+);
+CREATE INDEX IF NOT EXISTS idx_demand_run_at ON demand_forecasts (run_at);
+
+CREATE TABLE IF NOT EXISTS work_orders (
+    run_id TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    work_order_id TEXT,
+    asset_id TEXT,
+    fault_code TEXT,
+    equipment TEXT,
+    zone TEXT,
+    assigned_to TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_work_orders_run_at ON work_orders (run_at);
+CREATE INDEX IF NOT EXISTS idx_work_orders_zone ON work_orders (zone, run_at);
+CREATE INDEX IF NOT EXISTS idx_work_orders_asset ON work_orders (asset_id, run_at);
+
+CREATE TABLE IF NOT EXISTS trading_orders (
+    run_id TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    order_type TEXT,
+    volume_mwh REAL,
+    price REAL,
+    delivery_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trading_run_at ON trading_orders (run_at);
+"""
+
+# stage -> (table, path to the records in the stage output, {source column: table column})
+STAGE_TABLES = {
+    "AssetIntegrity": ("asset_snapshots", [], {
+        "Asset ID": "asset_id", "Type": "asset_type", "Location": "zone", "Age (years)": "age_years",
+        "Degradation %": "degradation_pct", "Corrosion Level": "corrosion_level",
+        "RUL (months)": "rul_months", "Status": "status"
+    }),
+    "GridFaults": ("grid_faults", [], {
+        "timestamp": "event_at", "substation": "substation", "event_type": "event_type",
+        "fault_code": "fault_code", "load_MW": "load_mw", "asset_id": "asset_id"
+    }),
+    "DemandForecast": ("demand_forecasts", ["forecast"], {
+        "date": "forecast_date", "base_case": "base_case", "cold_wave": "cold_wave",
+        "recession": "recession", "supply_shock": "supply_shock"
+    }),
+    "FieldOperations": ("work_orders", ["work_orders"], {
+        "work_order_id": "work_order_id", "asset_id": "asset_id", "fault_code": "fault_code",
+        "equipment": "equipment", "location": "zone", "assigned_to": "assigned_to", "status": "status"
+    }),
+    "EnergyTrading": ("trading_orders", ["buy_sell_orders"], {
+        "type": "order_type", "volume_mwh": "volume_mwh", "price": "price", "delivery_date": "delivery_date"
+    })
+}
+
+
+def _records(output, path):
+    for key in path:
+        output = output.get(key) if isinstance(output, dict) else None
+    return output if isinstance(output, list) else []
+
+
+# Column-wise conversion of one stage's records into executemany rows
+def _rows(records, run_id, run_at, columns):
+    # pandas (and result_serializer, which needs it) load on first use so importing
+    # the orchestrator stays cheap
+    import pandas as pd
+    df = pd.DataFrame.from_records(records).reindex(columns=list(columns))
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%dT%H:%M:%S")
+        elif df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v.isoformat() if hasattr(v, "isoformat") else v)
+    df = df.astype(object).where(df.notna(), None)
+    df.insert(0, "run_at", run_at)
+    df.insert(0, "run_id", run_id)
+    return list(df.itertuples(index=False, name=None))
+
+
+class RunHistoryStore:
+    def __init__(self, path="run_history.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Shared across Streamlit script threads; writes are serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv("ORCHESTRATOR_HISTORY_DB")
+        return cls(path) if path else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def record_run(self, run_id, run_at, params, results, recomputed=None, usage=None):
+        self.record_runs([(run_id, run_at, params, results, recomputed, usage)])
+
+    # Many runs in one transaction (backtests, batch regions)
+    def record_runs(self, runs):
+        from result_serializer import dumps_json
+        batches = {}
+        run_rows = []
+        for run_id, run_at, params, results, recomputed, usage in runs:
+            stages = list(results) if recomputed is None else recomputed
+            run_rows.append((run_id, run_at, dumps_json(params), json.dumps(stages),
+                             dumps_json(usage) if usage is not None else None))
+            for stage in stages:
+                if stage not in STAGE_TABLES or stage not in results:
+                    continue
+                table, path, columns = STAGE_TABLES[stage]
+                records = _records(results[stage], path)
+                if records:
+                    batches.setdefault(table, (columns, []))[1].extend(_rows(records, run_id, run_at, columns))
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)", run_rows)
+            for table, (columns, rows) in batches.items():
+                names = ", ".join(["run_id", "run_at", *columns.values()])
+                marks = ", ".join("?" * (len(columns) + 2))
+                self._conn.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", rows)
+
+    def prune(self, older_than_days):
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock, self._conn:
+            for table in ["runs"] + [t for t, _, _ in STAGE_TABLES.values()]:
+                self._conn.execute(f"DELETE FROM {table} WHERE run_at < ?", (cutoff,))
+
+    # -------------------------
+    # Trend queries
+    # -------------------------
+    def query(self, sql, params=()):
+        import pandas as pd
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def runs(self, limit=50):
+        import pandas as pd
+        df = self.query("SELECT run_id, run_at, params, recomputed FROM runs ORDER BY run_at DESC LIMIT ?", (limit,))
+        df["run_at"] = pd.to_datetime(df["run_at"], unit="s")
+        return df
+
+    # Fault codes seen more than once at a substation within the window
+    def repeat_faults(self, days=90, min_count=2, substation=None):
+        sql = """
+            SELECT substation, fault_code, COUNT(*) AS faults, COUNT(DISTINCT run_id) AS runs,
+                   MIN(event_at) AS first_seen, MAX(event_at) AS last_seen
+            FROM grid_faults
+            WHERE run_at >= ? {substation}
+            GROUP BY substation, fault_code
+            HAVING COUNT(*) >= ?
+            ORDER BY faults DESC, substation
+        """
+        params = [time.time() - days * 86400]
+        if substation is not None:
+            params.append(substation)
+        params.append(min_count)
+        return self.query(sql.format(substation="AND substation = ?" if substation is not None else ""), params)
+
+    # First vs latest RUL and degradation per asset over the window, with a monthly drift rate.
+    # The first/last snapshots are found per asset on the (asset_id, run_at) index, so only
+    # one row per asset leaves SQLite.
+    def rul_drift(self, days=90, asset_id=None):
+        sql = """
+            WITH span AS (
+                SELECT asset_id, COUNT(*) AS snapshots, MIN(run_at) AS first_at, MAX(run_at) AS last_at
+                FROM asset_snapshots
+                WHERE run_at >= ? {asset}
+                GROUP BY asset_id
+            ), ends AS (
+                SELECT span.*,
+                       (SELECT rowid FROM asset_snapshots a
+                        WHERE a.asset_id = span.asset_id AND a.run_at = span.first_at LIMIT 1) AS first_row,
+                       (SELECT rowid FROM asset_snapshots a
+                        WHERE a.asset_id = span.asset_id AND a.run_at = span.last_at LIMIT 1) AS last_row
+                FROM span
+            )
+            SELECT e.asset_id, e.snapshots,
+                   f.rul_months AS rul_first, l.rul_months AS rul_last,
+                   l.rul_months - f.rul_months AS rul_change,
+                   l.degradation_pct - f.degradation_pct AS degradation_change,
+                   CASE WHEN e.last_at > e.first_at
+                        THEN (l.rul_months - f.rul_months) / ((e.last_at - e.first_at) / ?) END AS rul_drift_per_month
+            FROM ends e
+            JOIN asset_snapshots f ON f.rowid = e.first_row
+            JOIN asset_snapshots l ON l.rowid = e.last_row
+            ORDER BY rul_change IS NULL, rul_change, e.asset_id
+        """
+        params = [time.time() - days * 86400] + ([asset_id] if asset_id is not None else []) + [30 * 86400.0]
+        df = self.query(sql.format(asset="AND asset_id = ?" if asset_id is not None else ""), params)
+        return df.astype({c: float for c in df.columns[2:]})
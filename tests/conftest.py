@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Flat module layout: make the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import genai
+
+
+# GenAI calls go to the offline client, never to Azure
+@pytest.fixture(autouse=True)
+def offline_genai(monkeypatch):
+    for name in ("ORCHESTRATOR_HISTORY_DB", "ORCHESTRATOR_TRACE_DIR", "ORCHESTRATOR_RUN_DEADLINE_S", "GENAI_RPM",
+                 "GENAI_TPM"):
+        monkeypatch.delenv(name, raising=False)
+    genai.set_client(genai.OfflineClient())
+    genai.set_scheduler(None)
+    yield
+    genai.set_client(None)
+    genai.set_scheduler(None)
+
+
+# Seeded asset register factory with the columns capital planning and the degradation
+# simulator read. "Unknown" is in no cost catalog or degradation profile; negative RUL is
+# overdue.
+@pytest.fixture
+def fleet():
+    def make(n=40, seed=0):
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame({
+            "Asset ID": [f"A{i:03d}" for i in range(n)],
+            "Type": rng.choice(["Pump", "Turbine", "Pipeline", "Sensor", "Unknown"], size=n),
+            "Degradation %": rng.uniform(5, 95, size=n).round(1),
+            "Corrosion Level": rng.uniform(0, 0.8, size=n).round(2),
+            "RUL (months)": rng.integers(-3, 120, size=n)
+        })
+    return make
@@ -0,0 +1,27 @@
+import pytest
+from backtest import Backtester, build_history
+
+
+@pytest.fixture(scope="module")
+def history():
+    return build_history("2023-01-01", "2023-04-30")
+
+
+def test_replay_trades_and_scores(history):
+    backtester = Backtester(workers=2, n_paths=2000)
+    result = backtester.run(history)
+    daily, metrics = result["daily"], result["metrics"]
+
+    assert metrics["days"] == len(history) - backtester.lag - backtester.horizon + 1
+    assert metrics["days_traded"] > 0
+    assert metrics["hit_rate"] is not None and 0 < metrics["hit_rate"] <= 1
+    assert metrics["total_pnl"] != 0 and metrics["pnl_sharpe"] is not None
+    # Both sides of the book show up as the backup plan lags demand
+    assert (daily["traded_mwh"] > 0).any() and (daily["traded_mwh"] < 0).any()
+    assert (daily.loc[daily["recommendation"] == "HOLD", "traded_mwh"] == 0).all()
+
+
+def test_replay_is_reproducible(history):
+    first = Backtester(workers=1, n_paths=2000).run(history)["daily"]
+    second = Backtester(workers=2, n_paths=2000).run(history)["daily"]
+    assert first.equals(second)
@@ -0,0 +1,79 @@
+import threading
+import pytest
+import genai
+from batch_orchestrator import DEFAULT_REGIONS, BatchOrchestrator, ThrottledClient, consolidate
+
+
+def region_results(assets, exceptions, position, var):
+    return {
+        "AssetIntegrity": [{"Asset ID": f"A{i}", "RUL (months)": 3 if i % 2 else 24} for i in range(assets)],
+        "GridFaults": [{"event": i} for i in range(exceptions)],
+        "EnergyTrading": {"market_position": {"surplus_deficit_mwh": position, "recommendation": "HOLD",
+                                              "risk": {"var_gbp": var}}}
+    }
+
+
+def test_consolidate_sums_regions_in_order():
+    report = consolidate({
+        "North": (region_results(4, 2, -120, 1500.5), 1.0),
+        "South": (region_results(3, 0, 80, None), 2.0)
+    })
+    assert [row["region"] for row in report["by_region"]] == ["North", "South"]
+    assert report["by_region"][0]["low_rul_assets"] == 2
+    assert report["by_region"][1]["work_orders"] == 0
+    assert report["totals"] == {
+        "assets": 7, "low_rul_assets": 3, "grid_exceptions": 2, "part_shortages": 0, "work_orders": 0,
+        "unassigned_work_orders": 0, "trading_position_mwh": -40, "trading_var_gbp": 1500.5, "regions": 2
+    }
+    assert consolidate({}) == {"by_region": [], "totals": {}}
+
+
+def test_duplicate_region_names_are_rejected():
+    with pytest.raises(ValueError, match="London"):
+        BatchOrchestrator(max_workers=1).run([DEFAULT_REGIONS[0], dict(DEFAULT_REGIONS[1], name="London")])
+
+
+def test_throttled_client_builds_its_client_on_first_call():
+    built = []
+
+    def factory():
+        built.append(1)
+        if len(built) == 1:
+            raise RuntimeError("Missing credentials")
+        return genai.OfflineClient("ok")
+
+    client = ThrottledClient(factory, threading.BoundedSemaphore(1))
+    assert built == []
+    # A failing factory fails the call, not the client; the next call tries again
+    with pytest.raises(RuntimeError):
+        client.chat.completions.create(model="m", messages=[])
+    response = client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+    assert response.choices[0].message.content == "ok"
+    client.chat.completions.create(model="m", messages=[])
+    assert len(built) == 2
+
+
+def test_missing_credentials_fail_per_call(monkeypatch):
+    pytest.importorskip("openai")
+    for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_AD_TOKEN", "OPENAI_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    client = ThrottledClient(genai.build_client, threading.BoundedSemaphore(1))
+    with pytest.raises(Exception, match="credentials"):
+        client.chat.completions.create(model="m", messages=[])
+
+
+def test_seeded_regions_are_reproducible():
+    london = DEFAULT_REGIONS[0]
+    regions = [dict(london, name="A", seed=7), dict(london, name="B", seed=7), dict(london, name="C", seed=8)]
+    output = BatchOrchestrator(max_workers=3, client_factory=genai.OfflineClient).run(regions)
+
+    assert list(output["regions"]) == ["A", "B", "C"]
+    summaries = {row.pop("region"): row for row in output["consolidated"]["by_region"]}
+    for row in summaries.values():
+        row.pop("runtime_s")
+    assert summaries["A"] == summaries["B"]
+    results = output["regions"]
+    for stage in ("AssetIntegrity", "EnergyTrading"):
+        assert results["A"][stage] == results["B"][stage]
+    assert results["A"]["AssetIntegrity"] != results["C"]["AssetIntegrity"]
+    assert output["consolidated"]["totals"]["regions"] == 3
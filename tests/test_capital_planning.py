@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from capital_planning import CostCatalog, capital_plan
+
+START = "2025-01-01"
+CATALOG = CostCatalog({"Pump": 10_000, "Turbine": 80_000, "Sensor": 1_000})
+
+
+def period_index(schedule, column):
+    labels = pd.period_range(pd.Timestamp(START).to_period("Q"), periods=100, freq="Q").astype(str)
+    return schedule[column].map({label: i for i, label in enumerate(labels)})
+
+
+def test_unlimited_budget_replaces_everything_when_due(fleet):
+    schedule, cash_flow, summary = capital_plan(fleet(), CATALOG, horizon_months=60, escalation=0, start=START)
+    assert (schedule["Deferred (periods)"] == 0).all()
+    in_horizon = period_index(schedule, "Due Period") < 20
+    assert (schedule["Funded"] == in_horizon).all()
+    assert summary["deferred_assets"] == 0
+    assert cash_flow["planned_cost"].sum() == pytest.approx(schedule.loc[in_horizon, "Replacement Cost (£)"].sum())
+    # Unknown types are costed at the catalog default
+    assert (schedule.loc[schedule["Type"] == "Unknown", "Replacement Cost (£)"] == 10_000).all()
+
+
+@pytest.mark.parametrize("budget", [20_000, 60_000, 150_000])
+def test_spend_never_runs_ahead_of_the_budget(fleet, budget):
+    schedule, cash_flow, summary = capital_plan(fleet(), CATALOG, horizon_months=60, budget_per_period=budget,
+                                                escalation=0, start=START)
+    funded = schedule[schedule["Funded"]]
+    spend = funded.groupby(period_index(funded, "Scheduled Period"))["Replacement Cost (£)"].sum() \
+        .reindex(range(20), fill_value=0)
+    # Unspent budget carries forward: spend through period p is at most (p + 1) budgets
+    assert (spend.cumsum().to_numpy() <= budget * np.arange(1, 21) + 1e-6).all()
+    assert (schedule["Deferred (periods)"] >= 0).all()
+    assert (cash_flow["budget"] == budget).all()
+    np.testing.assert_allclose(cash_flow["planned_cost"], spend.to_numpy())
+
+
+def test_work_past_the_horizon_is_unfunded(fleet):
+    schedule, _, summary = capital_plan(fleet(), CATALOG, horizon_months=12, budget_per_period=20_000,
+                                        escalation=0, start=START)
+    unfunded = schedule[~schedule["Funded"]]
+    assert len(unfunded) == summary["unfunded_assets"] > 0
+    assert (unfunded["Scheduled Period"] == "Beyond horizon").all()
+    assert summary["unfunded_cost"] == pytest.approx(unfunded["Replacement Cost (£)"].sum())
+    assert summary["funded_assets"] + summary["unfunded_assets"] == summary["assets"]
+
+
+def test_zero_budget_funds_nothing(fleet):
+    schedule, cash_flow, summary = capital_plan(fleet(), CATALOG, horizon_months=60, budget_per_period=0,
+                                                escalation=0, start=START)
+    assert not schedule["Funded"].any() and (schedule["Scheduled Period"] == "Beyond horizon").all()
+    assert summary["funded_assets"] == 0 and summary["planned_cost"] == 0
+    assert summary["budget_per_period"] == 0 and (cash_flow["budget"] == 0).all()
+    assert cash_flow["backlog_cost"].iloc[-1] == pytest.approx(cash_flow["due_cost"].sum())
+
+
+def test_most_degraded_assets_are_funded_first():
+    assets = pd.DataFrame({
+        "Asset ID": ["A", "B", "C"],
+        "Type": ["Pump"] * 3,
+        "RUL (months)": [0, 0, 0],
+        "Degradation %": [50.0, 90.0, 70.0]
+    })
+    schedule, _, _ = capital_plan(assets, CATALOG, budget_per_period=10_000, escalation=0, start=START)
+    assert schedule["Priority"].tolist() == [3, 1, 2]
+    assert schedule["Deferred (periods)"].tolist() == [2, 0, 1]
+    assert schedule["Scheduled Period"].tolist() == ["2025Q3", "2025Q1", "2025Q2"]
+
+
+def test_costs_escalate_to_the_scheduled_period():
+    assets = pd.DataFrame({"Asset ID": ["A"], "Type": ["Pump"], "RUL (months)": [24], "Degradation %": [60.0]})
+    schedule, _, _ = capital_plan(assets, CATALOG, freq="M", escalation=0.03, start=START)
+    # 24 months of RUL (720 days) falls due in the 24th monthly period
+    assert schedule["Scheduled Period"].iloc[0] == "2026-12"
+    assert schedule["Replacement Cost (£)"].iloc[0] == pytest.approx(10_000 * 1.03 ** (23 / 12), abs=0.01)
+
+    with pytest.raises(ValueError):
+        capital_plan(assets, CATALOG, freq="W", start=START)
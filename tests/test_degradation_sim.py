@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from degradation_sim import DegradationSimulator
+
+
+def assert_same(a, b):
+    pd.testing.assert_frame_equal(a["assets"], b["assets"])
+    pd.testing.assert_frame_equal(a["failures_by_month"], b["failures_by_month"])
+    for key in ("degradation", "corrosion", "rul"):
+        np.testing.assert_array_equal(a[key], b[key])
+
+
+def test_fixed_seed_is_reproducible(fleet):
+    sim = DegradationSimulator(months=24, trials=200, seed=42)
+    assert_same(sim.run(fleet(), start="2025-01-01"), sim.run(fleet(), start="2025-01-01"))
+    assert_same(sim.run(fleet(), start="2025-01-01"),
+                DegradationSimulator(months=24, trials=200, seed=42).run(fleet(), start="2025-01-01"))
+
+
+def test_different_seeds_differ(fleet):
+    a = DegradationSimulator(months=24, trials=200, seed=1).run(fleet(), start="2025-01-01")
+    b = DegradationSimulator(months=24, trials=200, seed=2).run(fleet(), start="2025-01-01")
+    assert not np.array_equal(a["degradation"], b["degradation"])
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_result_does_not_depend_on_threads(fleet, workers):
+    # A tiny memory budget forces many chunks; each draws from its own seeded stream
+    sim = DegradationSimulator(months=24, trials=200, memory_mb=0.1, workers=workers, seed=42)
+    assert sim.chunk_size() < len(fleet())
+    again = DegradationSimulator(months=24, trials=200, memory_mb=0.1, workers=1, seed=42)
+    assert_same(sim.run(fleet(), start="2025-01-01"), again.run(fleet(), start="2025-01-01"))
+
+
+def test_summary_is_consistent(fleet):
+    out = DegradationSimulator(months=36, trials=500, seed=7).run(fleet(), start="2025-01-01")
+    assets = out["assets"]
+    assert (assets["Failure Prob (12m)"] <= assets["Failure Prob (horizon)"]).all()
+    assert ((assets["Failure Prob (horizon)"] >= 0) & (assets["Failure Prob (horizon)"] <= 1)).all()
+    ordered = assets.dropna(subset=["Failure Month P90"])
+    assert (ordered["Failure Month P10"] <= ordered["Failure Month P50"]).all()
+    assert (ordered["Failure Month P50"] <= ordered["Failure Month P90"]).all()
+    assert (np.diff(out["degradation"], axis=1) >= -1e-3).all()
+    assert (out["degradation"] <= 100).all() and (out["corrosion"] <= 1).all()
+
+    failures = out["failures_by_month"]
+    assert failures["month"].iloc[0] == "2025-02"
+    assert failures["expected_failures"].sum() == pytest.approx(assets["Failure Prob (horizon)"].sum(), abs=0.05)
+
+
+def test_median_failure_month_is_the_rul(fleet):
+    assets = fleet(60, seed=3)
+    out = DegradationSimulator(months=60, trials=400, seed=1).run(assets, start="2025-01-01")["assets"]
+    rul = assets["RUL (months)"]
+    within = rul <= 60
+    # Overdue assets most likely fail in the first month
+    np.testing.assert_array_equal(out.loc[within, "Failure Month P50"], rul[within].clip(lower=1))
+    # Past the horizon the median asset survives it
+    short = DegradationSimulator(months=12, trials=400, seed=1).run(assets, start="2025-01-01")["assets"]
+    assert (short.loc[rul > 12, "Failure Prob (horizon)"] < 0.5).all()
+    assert (short.loc[rul <= 12, "Failure Prob (horizon)"] >= 0.5).all()
+
+
+def test_agent_reruns_the_simulation_when_the_register_changes():
+    from AssetIntegrityAgent import AssetIntegrityAgent
+    agent = AssetIntegrityAgent(fleet_size=20)
+    first = agent.degradation_forecast(months=12, trials=50, seed=1)
+    assert agent.degradation_forecast(months=12, trials=50, seed=1) is first
+
+    # Edited in place, then replaced by an equal copy
+    agent.assets_df.loc[0, "RUL (months)"] = 1
+    edited = agent.degradation_forecast(months=12, trials=50, seed=1)
+    assert edited is not first
+    agent.assets_df = agent.assets_df.copy()
+    assert agent.degradation_forecast(months=12, trials=50, seed=1) is edited
+    agent.assets_df = agent.assets_df.iloc[1:]
+    assert len(agent.degradation_forecast(months=12, trials=50, seed=1)["assets"]) == 19
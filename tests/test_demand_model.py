@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from demand_model import SeasonalDemandModel
+from DemandForecastingAgent import DemandForecastingAgent
+
+
+def demand(start="2022-01-01", days=730, seed=0):
+    times = pd.date_range(start, periods=days, freq="D")
+    rng = np.random.default_rng(seed)
+    load = 1200 + 200 * np.sin(2 * np.pi * times.dayofyear.to_numpy() / 365.25) + rng.normal(0, 50, days)
+    return times, load
+
+
+@pytest.mark.parametrize("appended", [1, 5, 60])
+def test_update_matches_full_refit(appended):
+    times, load = demand()
+    cut = len(load) - appended
+    model = SeasonalDemandModel().fit(times[:cut], load[:cut])
+    model.update(times[cut:], load[cut:])
+    full = SeasonalDemandModel().fit(times, load)
+
+    assert model.last_fit == "update" and full.last_fit == "full"
+    assert model.n_obs == full.n_obs
+    np.testing.assert_allclose(model.coef, full.coef, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(model.predict(times[-10:]), full.predict(times[-10:]), rtol=1e-5)
+    assert model.residual_std() == pytest.approx(full.residual_std(), rel=1e-6)
+
+
+def test_fit_or_update_extends_only_matching_history():
+    times, load = demand()
+    model = SeasonalDemandModel().fit(times[:-7], load[:-7])
+
+    model.fit_or_update(times, load)
+    assert model.last_fit == "update"
+    model.fit_or_update(times, load)
+    assert model.last_fit == "update"
+
+    # Revised history: the fitted prefix no longer matches, so the model is refitted
+    revised = load.copy()
+    revised[0] += 1
+    model.fit_or_update(times, revised)
+    assert model.last_fit == "full"
+    model.fit_or_update(times[1:], revised[1:])
+    assert model.last_fit == "full"
+
+
+def test_agent_updates_the_model_on_later_runs():
+    agent = DemandForecastingAgent()
+    history = agent.history("D")
+    # As if the last run was three days ago
+    stale = history.iloc[:-3].reset_index(drop=True)
+    agent.histories["D"] = stale
+    agent.model("D").fit(stale["date"], stale["load"])
+
+    agent.run(assets=[], grid_exceptions=[], horizon_days=7)
+    assert agent.model("D").last_fit == "update"
+    assert agent.model("D").n_obs == len(agent.histories["D"]) == len(history)
+
+    coef = agent.model("D").coef.copy()
+    agent.run(assets=[], grid_exceptions=[], horizon_days=7)
+    assert agent.model("D").last_fit == "update"
+    np.testing.assert_array_equal(agent.model("D").coef, coef)
+
+
+def test_first_agent_run_is_a_full_fit():
+    agent = DemandForecastingAgent()
+    agent.run(assets=[], grid_exceptions=[], horizon_days=7)
+    assert agent.model("D").last_fit == "full"
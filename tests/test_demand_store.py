@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from demand_store import FeederLoadStore, downsample, interval_index
+from DemandForecastingAgent import DemandForecastingAgent
+
+
+@pytest.fixture
+def store():
+    return FeederLoadStore.simulate(7, start="2024-03-01", end="2024-03-04", resolution="30min", seed=3)
+
+
+def frame(store):
+    return pd.DataFrame(store.values.T, index=store.index, columns=store.feeders)
+
+
+def test_interval_index_covers_whole_days():
+    index = interval_index("2024-03-01", "2024-03-02", "15min")
+    assert len(index) == 2 * 96
+    assert index[0] == pd.Timestamp("2024-03-01") and index[-1] == pd.Timestamp("2024-03-02 23:45")
+
+
+@pytest.mark.parametrize("how", ["mean", "max", "min", "sum"])
+def test_downsample_matches_pandas(store, how):
+    daily = store.downsample("D", how=how, chunk_feeders=3)
+    expected = getattr(frame(store).resample("D"), how)()
+    assert daily.index.equals(expected.index)
+    np.testing.assert_allclose(daily.values, expected.to_numpy().T, rtol=1e-5)
+
+    loads = pd.DataFrame({"date": store.index, "load": store.values[0]})
+    np.testing.assert_allclose(downsample(loads, "D", how)["load"], expected.iloc[:, 0], rtol=1e-5)
+
+
+def test_total_sums_feeders(store):
+    expected = store.values.astype(np.float64).sum(axis=0)
+    np.testing.assert_allclose(store.total()["load"], expected)
+    np.testing.assert_allclose(store.total(chunk_feeders=2)["load"], expected)
+    # Non-contiguous subsets gather rows instead of slicing
+    subset = ["FDR-00005", "FDR-00001", "FDR-00002"]
+    np.testing.assert_allclose(store.total(subset, chunk_feeders=2)["load"], frame(store)[subset].sum(axis=1))
+    with pytest.raises(KeyError, match="FDR-99999"):
+        store.total(["FDR-00001", "FDR-99999"])
+
+
+def test_peaks(store):
+    peaks = store.peaks(chunk_feeders=4)
+    loads = frame(store)
+    np.testing.assert_array_equal(peaks["peak_mw"], loads.max().to_numpy())
+    assert (peaks["peak_at"].to_numpy() == loads.idxmax().to_numpy()).all()
+
+
+def test_memmap_round_trip(tmp_path):
+    path = str(tmp_path / "loads.npy")
+    written = FeederLoadStore.simulate(5, start="2024-03-01", end="2024-03-02", resolution="15min", seed=4,
+                                       path=path, chunk_feeders=2)
+    in_memory = FeederLoadStore.simulate(5, start="2024-03-01", end="2024-03-02", resolution="15min", seed=4,
+                                         chunk_feeders=2)
+    written.values.flush()
+
+    reopened = FeederLoadStore.open(path, written.index, written.feeders)
+    assert isinstance(reopened.values, np.memmap) and reopened.values.dtype == np.float32
+    np.testing.assert_array_equal(reopened.values, in_memory.values)
+    pd.testing.assert_frame_equal(reopened.feeder("FDR-00003"), in_memory.feeder("FDR-00003"))
+
+    daily = reopened.downsample("D", path=str(tmp_path / "daily.npy"))
+    np.testing.assert_allclose(daily.values, in_memory.downsample("D").values)
+    assert reopened.bytes_per_feeder_year() == pytest.approx(4 * 96 * 365.25)
+
+
+def test_sub_daily_forecast_is_the_daily_mean_of_its_intervals():
+    result = DemandForecastingAgent().run(assets=[], grid_exceptions=[], horizon_days=3, resolution="15min")
+    intervals = pd.DataFrame(result["interval_forecast"])
+    daily = pd.DataFrame(result["forecast"])
+    assert len(intervals) == 3 * 96 and len(daily) == 3
+
+    expected = downsample(intervals, "D")
+    assert daily["date"].equals(expected["date"])
+    # Both sides are rounded (intervals to 0.1 MW, days to whole MW)
+    np.testing.assert_allclose(daily.drop(columns="date"), expected.drop(columns="date"), atol=1)
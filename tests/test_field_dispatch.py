@@ -0,0 +1,127 @@
+import itertools
+import numpy as np
+import pytest
+import field_dispatch
+from field_dispatch import (DEFAULT_TECHNICIANS, WORKLOAD_COST, AssignmentEngine, TechnicianRoster,
+                            _zone_key)
+
+ZONES = ["Zone A", "Zone B", "Zone C", "Zone D"]
+
+
+def transformer_roster(capacities, active_jobs=None):
+    active_jobs = active_jobs or [0] * len(capacities)
+    return TechnicianRoster([
+        {"name": f"Tech {i}", "skills": ["Transformer"], "zone": ZONES[i % 4], "capacity": c, "active_jobs": a}
+        for i, (c, a) in enumerate(zip(capacities, active_jobs))
+    ])
+
+
+def faults(locations, equipment="Transformer"):
+    return [{"equipment": equipment, "location": loc} for loc in locations]
+
+
+# Cost of a whole assignment: the cost matrix entries plus the rising cost of later slots
+def total_cost(engine, batch, assignment, load):
+    tech_idx = np.arange(len(engine.roster))
+    cost = engine.cost_matrix(batch, tech_idx, load)
+    per_tech = np.bincount(list(assignment.values()), minlength=len(tech_idx))
+    return sum(cost[f, t] for f, t in assignment.items()) + WORKLOAD_COST * (per_tech * (per_tech - 1) / 2).sum()
+
+
+def brute_force(engine, batch, load, free):
+    best = np.inf
+    for techs in itertools.product(range(len(free)), repeat=len(batch)):
+        if (np.bincount(techs, minlength=len(free)) <= free).all():
+            best = min(best, total_cost(engine, batch, dict(enumerate(techs)), load))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_assignment_is_optimal_under_capacities(seed):
+    rng = np.random.default_rng(seed)
+    roster = transformer_roster([1, 2, 1, 2], active_jobs=[0, 1, 0, 0])
+    batch = faults(rng.choice(ZONES, size=5))
+    load = roster.load.copy()
+    free = roster.capacity - roster.load.astype(np.int64)
+
+    engine = AssignmentEngine(roster)
+    assignment = engine.assign(batch)
+
+    assert sorted(assignment) == list(range(len(batch)))
+    assert (np.bincount(list(assignment.values()), minlength=len(roster)) <= free).all()
+    assert total_cost(engine, batch, assignment, load) == pytest.approx(brute_force(engine, batch, load, free))
+
+
+def test_greedy_fallback_is_never_cheaper():
+    rng = np.random.default_rng(7)
+    batch = faults(rng.choice(ZONES, size=6))
+    exact_engine = AssignmentEngine(transformer_roster([2, 2, 2, 2]))
+    greedy_engine = AssignmentEngine(transformer_roster([2, 2, 2, 2]), max_block_cells=0)
+    load = exact_engine.roster.load.copy()
+
+    exact = exact_engine.assign(batch)
+    greedy = greedy_engine.assign(batch)
+    assert len(exact) == len(greedy) == len(batch)
+    assert total_cost(exact_engine, batch, exact, load) <= total_cost(greedy_engine, batch, greedy, load)
+
+
+def test_batch_is_matched_globally_across_equipment_types():
+    # Smith is the only relay technician but also repairs transformers; solving the
+    # transformer block first would give him the transformer and leave the relay unskilled
+    technicians = [
+        {"name": "Smith", "skills": ["Transformer", "Relay"], "zone": "Zone A", "capacity": 1},
+        {"name": "Jones", "skills": ["Transformer"], "zone": "Zone A", "capacity": 1}
+    ]
+    batch = [{"equipment": "Transformer", "location": "Zone A"}, {"equipment": "Relay", "location": "Zone A"}]
+
+    engine = AssignmentEngine(TechnicianRoster(technicians))
+    load = engine.roster.load.copy()
+    assignment = engine.assign(batch)
+    assert assignment == {0: 1, 1: 0}
+
+    per_type = AssignmentEngine(TechnicianRoster(technicians), max_block_cells=0)
+    blocks = per_type.assign(batch)
+    assert blocks == {0: 0, 1: 1}
+    assert total_cost(engine, batch, assignment, load) < total_cost(per_type, batch, blocks, load)
+
+
+def test_greedy_is_used_without_scipy(monkeypatch):
+    monkeypatch.setattr(field_dispatch, "linear_sum_assignment", None)
+    engine = AssignmentEngine(transformer_roster([1, 1]))
+    assignment = engine.assign(faults(["Zone B", "Zone A"]))
+    assert assignment == {0: 1, 1: 0}
+
+
+def test_capacity_is_committed_across_batches():
+    roster = TechnicianRoster(DEFAULT_TECHNICIANS)
+    engine = AssignmentEngine(roster)
+    smith = roster.name_index["Technician Smith"]
+
+    first = engine.assign(faults(["Zone A"] * 2))
+    assert list(first.values()) == [smith, smith]
+    # Smith has one slot left; the rest fall back to the zone, then the whole roster
+    second = engine.assign(faults(["Zone A"] * 12))
+    assert list(second.values()).count(smith) == 1
+    assert len(second) == roster.capacity.sum() - 2
+    assert (roster.load <= roster.capacity).all()
+    assert engine.assign(faults(["Zone A"])) == {}
+
+    roster.release([smith])
+    assert engine.assign(faults(["Zone A"])) == {0: smith}
+    roster.reset()
+    np.testing.assert_array_equal(roster.load, roster.base_load)
+
+
+def test_zone_keys_and_csv_defaults(tmp_path):
+    assert _zone_key("Zone C") == 2
+    assert _zone_key(" Zone A ") == 0
+    assert _zone_key("Zone North") == _zone_key(None) == _zone_key("Zone CD") == 26
+
+    path = tmp_path / "roster.csv"
+    path.write_text("name,skills,zone,capacity,active_jobs\n"
+                    "Tech A,Transformer;Relay,Zone A,2,1\n"
+                    "Tech B,Generator,Zone B,,\n")
+    roster = TechnicianRoster.from_csv(path)
+    np.testing.assert_array_equal(roster.capacity, [2, 1])
+    np.testing.assert_array_equal(roster.load, [1, 0])
+    assert roster.skilled_mask("Relay").tolist() == [True, False]
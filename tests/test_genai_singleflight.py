@@ -0,0 +1,119 @@
+import time
+import threading
+import pytest
+import genai
+from instrumentation import Trace
+from resilience import DeadlineExceeded, deadline
+
+MESSAGES = [{"role": "user", "content": "Summarise the open grid faults."}]
+
+
+# Offline client whose requests block until released, so calls stay in flight
+class GatedClient(genai.OfflineClient):
+    def __init__(self, error=None):
+        super().__init__("Shared advisory.")
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.requests = 0
+        self.error = error
+        offline_create = self.chat.completions.create
+
+        def create(**kwargs):
+            self.requests += 1
+            self.entered.set()
+            self.release.wait(10)
+            if self.error is not None:
+                raise self.error
+            return offline_create(**kwargs)
+
+        self.chat.completions.create = create
+
+
+@pytest.fixture
+def client():
+    client = GatedClient()
+    genai.set_client(client)
+    return client
+
+
+# Start the leading call in a thread and wait until its request is on the wire
+def lead(client, **kwargs):
+    out = {}
+
+    def run():
+        out["text"] = genai.chat_completion(MESSAGES, model="test", **kwargs)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert client.entered.wait(5)
+    return thread, out
+
+
+def llm_spans(trace):
+    return [attrs for _, cat, _, _, _, attrs in trace.spans if cat == "llm"]
+
+
+def test_identical_prompts_share_one_request(client):
+    thread, leader = lead(client)
+    follower = {}
+    waiter = threading.Thread(target=lambda: follower.setdefault(
+        "text", genai.chat_completion(MESSAGES, model="test")))
+    waiter.start()
+    time.sleep(0.1)
+    client.release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert leader["text"] == follower["text"] == "Shared advisory."
+    assert client.requests == 1
+
+
+def test_follower_falls_back_at_its_deadline(client):
+    thread, _ = lead(client)
+    trace = Trace()
+    try:
+        started = time.monotonic()
+        with trace.activate(), deadline(0.3):
+            text = genai.chat_completion(MESSAGES, model="test", fallback=lambda: "Rule-based advisory.")
+        waited = time.monotonic() - started
+    finally:
+        client.release.set()
+        thread.join(5)
+
+    assert text == "Rule-based advisory."
+    assert 0.25 <= waited < 2
+    attrs, = llm_spans(trace)
+    assert attrs["coalesced"] and attrs["fallback"] == "DeadlineExceeded"
+
+
+def test_follower_without_fallback_raises_at_its_deadline(client):
+    thread, _ = lead(client)
+    try:
+        with pytest.raises(DeadlineExceeded), deadline(0.2):
+            genai.chat_completion(MESSAGES, model="test")
+    finally:
+        client.release.set()
+        thread.join(5)
+
+
+def test_degraded_leader_result_is_flagged_and_rebuilt(client):
+    client.error = ValueError("bad request")
+    thread, leader = lead(client, fallback="Leader fallback.")
+    trace = Trace()
+    follower = {}
+
+    def follow():
+        with trace.activate():
+            follower["text"] = genai.chat_completion(MESSAGES, model="test", fallback="Follower fallback.")
+
+    waiter = threading.Thread(target=follow)
+    waiter.start()
+    time.sleep(0.1)
+    client.release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert leader["text"] == "Leader fallback."
+    assert follower["text"] == "Follower fallback."
+    attrs, = llm_spans(trace)
+    assert attrs["coalesced"] and attrs["fallback"] == "ValueError"
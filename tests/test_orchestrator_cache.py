@@ -0,0 +1,106 @@
+import pytest
+from instrumentation import span
+from orchestrator import OrchestratorAgent
+
+
+# Orchestrator whose stages are cheap stand-ins: each output is built from the stage's
+# parameters and upstream outputs, and every call is counted
+@pytest.fixture
+def orch():
+    orch = OrchestratorAgent()
+    orch.calls = []
+    orch.degrade = set()
+
+    def stage_fn(stage):
+        def run(results, params):
+            orch.calls.append(stage)
+            if stage in orch.degrade:
+                with span("chat.completions.create", "llm", fallback="DeadlineExceeded"):
+                    pass
+            used = {k: params[k] for k in orch.STAGE_PARAMS.get(stage, [])}
+            return {"stage": stage, "params": used, "upstream": sorted(results)}
+        return run
+
+    orch._stage_fn = stage_fn
+    return orch
+
+
+def stage_names():
+    return [name for name, _ in OrchestratorAgent.STAGES]
+
+
+def test_second_run_is_served_from_cache(orch):
+    first = orch.run()
+    assert orch.last_run["recomputed"] == stage_names()
+    orch.calls.clear()
+
+    second = orch.run()
+    assert orch.calls == []
+    assert orch.last_run["cached"] == stage_names()
+    assert second == first
+
+
+def test_changed_parameter_recomputes_only_its_stage_and_downstream(orch):
+    orch.run()
+    orch.calls.clear()
+
+    orch.run(horizon_days=60)
+    assert orch.calls == stage_names()[2:]
+    assert orch.last_run["cached"] == ["AssetIntegrity", "GridFaults"]
+
+
+def test_unchanged_output_keeps_downstream_cached(orch):
+    orch.run()
+    # Only the renewable stage loses its entry; it recomputes to the same output digest,
+    # so nothing downstream runs again
+    orch._cache.pop("RenewableIntegration")
+    orch.calls.clear()
+
+    orch.run()
+    assert orch.calls == ["RenewableIntegration"]
+    assert orch.last_run["recomputed"] == ["RenewableIntegration"]
+
+
+def test_invalidate_drops_stage_and_dependents(orch):
+    orch.run()
+    assert orch.invalidate("FieldOperations") == ["FieldOperations", "EnergyTrading"]
+    orch.calls.clear()
+
+    orch.run()
+    assert orch.calls == ["FieldOperations", "EnergyTrading"]
+    assert orch.invalidate() == stage_names()
+    orch.calls.clear()
+    orch.run()
+    assert orch.calls == stage_names()
+
+
+def test_cache_entries_are_bounded_per_stage(orch):
+    orch.cache_entries_per_stage = 2
+    for horizon in (10, 20, 30):
+        orch.run(horizon_days=horizon)
+    assert len(orch._cache["DemandForecast"]) == 2
+    orch.calls.clear()
+
+    orch.run(horizon_days=10)
+    assert "DemandForecast" in orch.calls
+    orch.calls.clear()
+    orch.run(horizon_days=30)
+    assert "DemandForecast" not in orch.calls
+
+
+def test_degraded_stage_is_not_cached(orch):
+    orch.degrade.add("GridFaults")
+    orch.run()
+    assert orch.last_run["degraded"] == ["GridFaults"]
+    orch.degrade.clear()
+    orch.calls.clear()
+
+    orch.run()
+    assert orch.calls == ["GridFaults"]
+    assert orch.last_run["degraded"] == []
+
+
+def test_run_context_needs_a_run(orch):
+    with pytest.raises(RuntimeError):
+        with orch.run_context():
+            pass
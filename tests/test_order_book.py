@@ -0,0 +1,120 @@
+import pytest
+from EnergyTradingAgent import EnergyTradingAgent
+from order_book import BUY, SELL, MarketSimulator, OrderBook, daily_product
+
+
+def test_price_time_priority():
+    book = OrderBook("test")
+    first, _ = book.submit(SELL, 55.0, 10, owner="a")
+    second, _ = book.submit(SELL, 55.0, 10, owner="b")
+    book.submit(SELL, 54.5, 5, owner="c")
+
+    taker, fills = book.submit(BUY, 55.0, 20)
+    # Best price first, then the earlier order at the same price
+    assert fills == [(pytest.approx(54.5), 5), (pytest.approx(55.0), 10), (pytest.approx(55.0), 5)]
+    assert book.qty[first] == 0 and book.qty[second] == 5
+    assert list(book.trade_maker) == [2, first, second]
+    assert set(book.trade_taker) == {taker}
+    assert book.depth(SELL) == [(pytest.approx(55.0), 5)]
+
+
+def test_unmarketable_remainder_rests():
+    book = OrderBook("test")
+    book.submit(SELL, 56.0, 10)
+    oid, fills = book.submit(BUY, 55.0, 8)
+    assert fills == []
+    assert book.best_bid() == pytest.approx(55.0) and book.best_ask() == pytest.approx(56.0)
+    assert book.mid() == pytest.approx(55.5)
+    assert book.depth(BUY) == [(pytest.approx(55.0), 8)]
+
+    book.cancel(oid)
+    assert book.best_bid() is None and book.depth(BUY) == []
+    assert book.mid() == pytest.approx(56.0)
+
+
+def test_float_residue_is_not_rested_or_matched():
+    book = OrderBook("test")
+    book.submit(SELL, 55.0, 0.1)
+    book.submit(SELL, 55.0, 0.2)
+    oid, fills = book.submit(BUY, 55.0, 0.1 + 0.2)
+    assert sum(q for _, q in fills) == pytest.approx(0.3)
+    assert book.qty[oid] == 0 and book.best_bid() is None
+    assert book.best_ask() is None and book.depth(SELL) == []
+
+    book.submit(SELL, 55.0, 1e-9)
+    assert book.best_ask() is None
+
+
+def order(kind, volume, price, delivery="2024-06-01"):
+    return {"type": kind, "volume_mwh": volume, "price": price, "delivery_date": delivery}
+
+
+def test_agent_orders_are_immediate_or_cancel():
+    market = MarketSimulator(seed=1)
+    book = market.open_session("2024-06-01")
+    bid = book.best_bid()
+
+    # A passive buy far below the market fills nothing and does not rest
+    passive, = market.execute([order("BUY", 100, bid - 10)])
+    assert passive["status"] == "CANCELLED" and passive["filled_mwh"] == 0
+    assert book.best_bid() == pytest.approx(bid)
+    assert all(owner != "agent" or qty == 0 for owner, qty in zip(book.owner, book.qty))
+
+    # A marketable sell larger than the bids within its limit fills partially
+    partial, = market.execute([order("SELL", 10_000, bid - 0.5)])
+    assert partial["status"] == "PARTIAL" and 0 < partial["filled_mwh"] < 10_000
+    assert partial["slippage"] >= 0
+
+    filled, = market.execute([order("BUY", 1, book.best_ask() + 1)])
+    assert filled["status"] == "FILLED" and filled["fill_ratio"] == 1.0
+
+
+def test_open_session_tops_up_one_sided_books():
+    market = MarketSimulator(seed=2)
+    book = market.open_session("2024-06-01")
+    market.execute([order("BUY", 10 ** 6, 10 ** 4)])
+    assert book.best_ask() is None
+
+    market.open_session("2024-06-01")
+    assert book is market.book(daily_product("2024-06-01"))
+    assert book.best_bid() is not None and book.best_ask() is not None
+
+
+def test_sessions_seed_the_traded_product_and_drop_delivered_books():
+    market = MarketSimulator(seed=3)
+    market.open_session("2024-06-01")
+    assert list(market.books) == [daily_product("2024-06-01")]
+
+    market.execute([order("BUY", 5, 60.0, delivery="2024-06-02")])
+    market.open_session("2024-06-02")
+    market.open_session("2024-06-03")
+    assert sorted(market.books) == [daily_product("2024-06-03")]
+    assert market.delivery == {daily_product("2024-06-03"): "2024-06-03"}
+
+
+def position(side, expected_price=55.0):
+    rec = "Buy 200 MWh" if side == "BUY" else "Sell 200 MWh"
+    return {"surplus_deficit_mwh": 0, "hedge_volume_mwh": 200, "recommendation": rec,
+            "risk": {"expected_price": expected_price}}
+
+
+def test_agent_limit_prices_cross_the_book_mid_by_max_slippage():
+    agent = EnergyTradingAgent(n_paths=100, max_slippage=1.5, seed=4)
+    buy, = agent.generate_orders(position("BUY"))
+    book = agent.market.book(daily_product(buy["delivery_date"]))
+    assert buy["price"] == pytest.approx(round(book.mid() + 1.5, 2))
+    sell, = agent.generate_orders(position("SELL"))
+    assert sell["price"] == pytest.approx(round(book.mid() - 1.5, 2))
+    assert agent.generate_orders({"surplus_deficit_mwh": 0, "recommendation": "HOLD"}) == []
+
+    # Marketable against its own reference, so the execution fills at bounded slippage
+    execution, = agent.simulate_execution([buy])
+    assert execution["filled_mwh"] > 0
+    assert 0 <= execution["slippage"] <= 1.5 + 0.01
+
+
+def test_agent_prices_off_the_risk_engine_without_a_book_mid(monkeypatch):
+    agent = EnergyTradingAgent(n_paths=100, max_slippage=1.0, seed=5)
+    monkeypatch.setattr(agent.market, "open_session", lambda delivery_date: OrderBook("empty"))
+    buy, = agent.generate_orders(position("BUY", expected_price=61.25))
+    assert buy["price"] == pytest.approx(62.25)
@@ -0,0 +1,134 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from rate_limiter import PriorityScheduler, TokenBucket
+
+
+class ServiceError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+# -------------------------
+# Token bucket
+# -------------------------
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    bucket = TokenBucket(per_minute=600, burst=10)
+    bucket.take(10)
+    bucket.refill(bucket.stamp + 0.5)
+    assert bucket.level == pytest.approx(5)
+    assert bucket.wait_time(8) == pytest.approx(0.3)
+    bucket.refill(bucket.stamp + 60)
+    assert bucket.level == 10
+    # More than the bucket holds waits only for a full bucket
+    bucket.take(10)
+    assert bucket.wait_time(50) == pytest.approx(1.0)
+    bucket.give(100)
+    assert bucket.level == 10 and bucket.wait_time(3) == 0
+
+
+def test_bursts_are_a_few_seconds_of_quota():
+    scheduler = PriorityScheduler(rpm=600, tpm=60_000, burst_seconds=2)
+    assert scheduler.requests.capacity == 20 and scheduler.tokens.capacity == 2000
+    assert PriorityScheduler(rpm=1).requests.capacity == 1
+    assert PriorityScheduler(tpm=1000).requests is None
+
+
+def test_from_env(monkeypatch):
+    assert PriorityScheduler.from_env() is None
+    monkeypatch.setenv("GENAI_TPM", "90000")
+    scheduler = PriorityScheduler.from_env()
+    assert scheduler.requests is None and scheduler.tokens.rate == 1500
+
+
+# -------------------------
+# Scheduling
+# -------------------------
+def test_rpm_and_tpm_limit_grants():
+    scheduler = PriorityScheduler(rpm=600, burst_seconds=1)
+    waits = [scheduler.acquire() for _ in range(11)]
+    assert max(waits[:10]) < 0.05
+    # The 11th request waits ~0.1s for one request to refill
+    assert 0.05 < waits[10] < 0.5
+    assert scheduler.stats["granted"] == 11
+
+    scheduler = PriorityScheduler(tpm=6000, burst_seconds=1)
+    assert scheduler.acquire(tokens=80) < 0.05
+    started = time.monotonic()
+    scheduler.acquire(tokens=50)
+    # 30 tokens short at 100 tokens/s
+    assert 0.2 < time.monotonic() - started < 0.8
+
+
+def test_higher_priority_is_granted_first():
+    scheduler = PriorityScheduler(rpm=6000)
+    scheduler._paused_until = time.monotonic() + 60
+    order = []
+
+    def call(name, priority):
+        scheduler.acquire(priority)
+        order.append(name)
+
+    threads = []
+    for name, priority in [("low", "low"), ("normal-1", "normal"), ("high", "high"), ("normal-2", "normal"),
+                           ("unknown", "urgent")]:
+        threads.append(threading.Thread(target=call, args=(name, priority)))
+        threads[-1].start()
+        while scheduler.stats["max_depth"] < len(threads):
+            time.sleep(0.001)
+
+    with scheduler._cond:
+        scheduler._paused_until = 0.0
+        scheduler._cond.notify_all()
+    for t in threads:
+        t.join(5)
+    # Unknown priorities queue as normal; equal priorities are first come, first served
+    assert order == ["high", "normal-1", "normal-2", "unknown", "low"]
+
+
+def test_timeout_leaves_the_queue():
+    scheduler = PriorityScheduler(tpm=6000, burst_seconds=1)
+    scheduler.acquire(tokens=100)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(tokens=100, timeout=0.05)
+    assert scheduler._queue == [] and scheduler.stats["granted"] == 1
+    # The bucket was not charged for the call that gave up
+    assert scheduler.tokens.level < 20
+
+
+# -------------------------
+# Settlement and throttling
+# -------------------------
+def test_settle_refunds_or_charges_the_difference():
+    scheduler = PriorityScheduler(tpm=60_000, burst_seconds=1)
+    scheduler.acquire(tokens=600)
+    level = scheduler.tokens.level
+    scheduler.settle(600, 200)
+    assert scheduler.tokens.level == pytest.approx(level + 400)
+    scheduler.settle(200, 900)
+    assert scheduler.tokens.level == pytest.approx(level - 300)
+    # A failed call that used nothing hands the whole reservation back, up to capacity
+    scheduler.settle(10_000, 0)
+    assert scheduler.tokens.level == scheduler.tokens.capacity
+
+    unlimited = PriorityScheduler(rpm=60)
+    unlimited.settle(100, 0)
+    assert unlimited.tokens is None
+
+
+def test_429_pauses_grants_for_retry_after():
+    scheduler = PriorityScheduler(rpm=6000)
+    with pytest.raises(ServiceError):
+        with scheduler.slot(tokens=10):
+            raise ServiceError(429, {"retry-after-ms": "150"})
+    assert scheduler.stats["throttled"] == 1
+    assert scheduler.acquire() == pytest.approx(0.15, abs=0.1)
+
+    with pytest.raises(ServiceError):
+        with scheduler.slot():
+            raise ServiceError(500)
+    assert scheduler.stats["throttled"] == 1 and scheduler._paused_until < time.monotonic()
@@ -0,0 +1,212 @@
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+import genai
+from rate_limiter import PriorityScheduler
+from resilience import (CircuitBreaker, DeadlineExceeded, call_with_retries, deadline, hedged_call,
+                        retry_after_s, time_left)
+from usage_ledger import LEDGER, RunBudget
+
+
+class ServiceError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+def test_breaker_opens_after_repeated_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_breaker_probes_once_after_cool_down():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    # One probe goes through; everything else waits for its outcome
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0 and breaker.allow()
+
+
+# -------------------------
+# Hedging
+# -------------------------
+def test_fast_call_is_not_hedged():
+    calls = []
+    result, hedged = hedged_call(lambda timeout: calls.append(timeout) or "ok", 5, hedge_after=1)
+    assert (result, hedged) == ("ok", False) and len(calls) == 1
+
+
+def test_hedge_wins_and_late_result_is_discarded():
+    late = []
+    started = []
+
+    def slow_then_fast(timeout):
+        started.append(timeout)
+        if len(started) == 1:
+            time.sleep(0.3)
+            return "first"
+        return "hedge"
+
+    result, hedged = hedged_call(slow_then_fast, 5, hedge_after=0.05, discard=late.append)
+    assert (result, hedged) == ("hedge", True)
+    assert late == []
+    time.sleep(0.4)
+    assert late == ["first"]
+
+
+def test_failed_first_attempt_waits_for_the_hedge():
+    started = []
+
+    def fail_first(timeout):
+        started.append(timeout)
+        if len(started) == 1:
+            time.sleep(0.1)
+            raise ConnectionError("reset")
+        time.sleep(0.2)
+        return "hedge"
+
+    result, hedged = hedged_call(fail_first, 5, hedge_after=0.05)
+    assert (result, hedged) == ("hedge", True)
+
+
+def test_hedged_call_times_out():
+    with pytest.raises(DeadlineExceeded):
+        hedged_call(lambda timeout: time.sleep(0.5), 0.1)
+
+
+# -------------------------
+# Retries
+# -------------------------
+def test_transient_errors_are_retried_with_backoff():
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ServiceError(503)
+        return "ok"
+
+    result, calls = call_with_retries(flaky, 5, attempts=3, backoff_s=0.02)
+    assert result == "ok" and calls == {"attempts": 3, "hedged": False}
+    assert attempts[2] - attempts[1] >= attempts[1] - attempts[0] >= 0.02
+
+
+def test_permanent_errors_are_not_retried():
+    attempts = []
+
+    def bad_request(timeout):
+        attempts.append(timeout)
+        raise ServiceError(400)
+
+    with pytest.raises(ServiceError):
+        call_with_retries(bad_request, 5, attempts=3, backoff_s=0.01)
+    assert len(attempts) == 1
+
+
+def test_retry_after_is_honoured():
+    assert retry_after_s(ServiceError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_s(ServiceError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_s(ServiceError(429, {"retry-after": "soon"})) is None
+    assert retry_after_s(ValueError()) is None
+
+    attempts = []
+
+    def throttled(timeout):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ServiceError(429, {"retry-after-ms": "150"})
+        return "ok"
+
+    call_with_retries(throttled, 5, attempts=2, backoff_s=0.01)
+    assert attempts[1] - attempts[0] >= 0.15
+
+
+def test_retries_stop_when_the_delay_exceeds_the_timeout():
+    attempts = []
+
+    def throttled(timeout):
+        attempts.append(timeout)
+        raise ServiceError(429, {"retry-after": "10"})
+
+    with pytest.raises(ServiceError):
+        call_with_retries(throttled, 1, attempts=3)
+    assert len(attempts) == 1
+
+
+# -------------------------
+# Deadlines
+# -------------------------
+def test_nested_deadlines_keep_the_earlier_one():
+    assert time_left() is None
+    with deadline(10):
+        with deadline(0.5):
+            assert time_left() <= 0.5
+        with deadline(60):
+            assert 9 < time_left() <= 10
+    assert time_left() is None
+
+
+# -------------------------
+# Late hedge accounting in genai
+# -------------------------
+class RecordingScheduler(PriorityScheduler):
+    def __init__(self):
+        super().__init__(rpm=10 ** 6, tpm=10 ** 6)
+        self.settled = []
+
+    def settle(self, reserved, used):
+        self.settled.append((reserved, used))
+        super().settle(reserved, used)
+
+
+def test_late_hedge_is_settled_and_charged_at_its_real_usage(monkeypatch):
+    monkeypatch.setenv("GENAI_HEDGE_AFTER_S", "0.05")
+    lock = threading.Lock()
+    calls = []
+
+    def create(**kwargs):
+        with lock:
+            calls.append(kwargs)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.3)
+        completion_tokens = 50 if first else 20
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="first" if first else "hedge"))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=completion_tokens))
+
+    genai.set_client(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    scheduler = RecordingScheduler()
+    genai.set_scheduler(scheduler)
+    budget = RunBudget("late-hedge-run", max_tokens=10 ** 6, max_cost=10 ** 6)
+
+    with budget.activate():
+        text = genai.chat_completion([{"role": "user", "content": "Hedge me"}], model="test", max_tokens=100)
+    assert text == "hedge" and len(calls) == 2
+
+    for _ in range(50):
+        if len(scheduler.settled) == 2:
+            break
+        time.sleep(0.02)
+    assert sorted(used for _, used in scheduler.settled) == [120, 150]
+    assert budget.used_tokens == 270
+    totals = LEDGER.run_summary("late-hedge-run")["totals"]
+    assert totals["calls"] == 2 and totals["total_tokens"] == 270
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from result_serializer import (JsonSerializer, MsgpackSerializer, ParquetSerializer, dumps_json,
+                               get_serializer, join_tables, split_tables)
+
+
+def results():
+    return {
+        "AssetIntegrity": [
+            {"Asset ID": "A1", "Type": "Pump", "RUL (months)": 12, "Degradation %": 40.5, "Owner": None},
+            {"Asset ID": "A2", "Type": "Turbine", "RUL (months)": 3, "Degradation %": 88.0, "Owner": "North"}
+        ],
+        "FieldOperations": {
+            "agent": "field_operations",
+            # Records with different key sets
+            "work_orders": [
+                {"wo_id": "WO-1", "technician": "Technician Smith"},
+                {"wo_id": "WO-2", "technician": None, "parts": ["Relay", "Fuse"]}
+            ],
+            "advisory": "Dispatch two crews.",
+            "stats": {"assigned": 1, "ratio": 0.5, "empty": []}
+        }
+    }
+
+
+@pytest.mark.parametrize("serializer", [
+    JsonSerializer(), JsonSerializer(indent=2, compression="gzip"), MsgpackSerializer(),
+    MsgpackSerializer(compression="xz")
+])
+def test_round_trip_is_lossless(serializer, tmp_path):
+    original = results()
+    assert serializer.loads(serializer.dumps(original)) == original
+    path = serializer.write(original, tmp_path / f"results{serializer.extension}")
+    assert serializer.read(path) == original
+
+
+def test_zstd_round_trip():
+    pytest.importorskip("zstandard")
+    for serializer in (JsonSerializer(compression="zstd"), MsgpackSerializer(compression="zstd")):
+        assert serializer.loads(serializer.dumps(results())) == results()
+
+
+def test_pandas_and_numpy_values_become_builtins():
+    value = {
+        "when": pd.Timestamp("2024-06-01 12:30"),
+        "count": np.int64(3),
+        "share": np.float32(0.5),
+        "missing": float("nan"),
+        "flag": np.bool_(True),
+        "series": np.arange(3),
+        "frame": pd.DataFrame({"x": [1, 2]})
+    }
+    expected = {"when": "2024-06-01T12:30:00", "count": 3, "share": 0.5, "missing": None, "flag": True,
+                "series": [0, 1, 2], "frame": [{"x": 1}, {"x": 2}]}
+    assert JsonSerializer().loads(dumps_json(value).encode("utf-8")) == expected
+    decoded = MsgpackSerializer().loads(MsgpackSerializer().dumps(value))
+    assert decoded["when"] == expected["when"] and decoded["frame"] == expected["frame"]
+    assert decoded["count"] == 3 and decoded["flag"] is True and decoded["series"] == [0, 1, 2]
+
+
+def test_msgpack_reads_format_1_files():
+    import msgpack
+    legacy = msgpack.packb({"tables": {"rows": {"x": [1, 2], "y": ["a", "b"]}},
+                            "results": {"rows": {"__table__": "rows"}, "n": 2}}, use_bin_type=True)
+    assert MsgpackSerializer().loads(legacy) == {"rows": [{"x": 1, "y": "a"}, {"x": 2, "y": "b"}], "n": 2}
+
+
+def test_parquet_round_trip(tmp_path):
+    original = {
+        "assets": [{"Asset ID": f"A{i}", "RUL (months)": i, "Degradation %": i * 1.5} for i in range(5)],
+        "trading": {"orders": [{"type": "BUY", "volume_mwh": 50.0}], "summary": "Hedge the deficit."}
+    }
+    path = ParquetSerializer().write(original, str(tmp_path / "run"))
+    assert ParquetSerializer().read(path) == original
+
+
+def test_parquet_stores_mixed_columns_as_text(tmp_path):
+    original = {"events": [{"code": 1, "detail": {"a": 1}}, {"code": 2, "detail": "plain"}]}
+    restored = ParquetSerializer().read(ParquetSerializer().write(original, str(tmp_path / "run")))
+    assert restored == {"events": [{"code": 1, "detail": '{"a": 1}'}, {"code": 2, "detail": "plain"}]}
+
+
+def test_split_and_join_tables():
+    original = results()
+    tables, skeleton = split_tables(original, frames=False)
+    assert sorted(tables) == ["AssetIntegrity", "FieldOperations.work_orders"]
+    assert skeleton["FieldOperations"]["work_orders"] == {"__table__": "FieldOperations.work_orders"}
+    assert join_tables(tables, skeleton) == original
+
+    frames, skeleton = split_tables(original)
+    assert isinstance(frames["AssetIntegrity"], pd.DataFrame)
+    assert join_tables(frames, skeleton)["AssetIntegrity"][0]["Asset ID"] == "A1"
+
+
+def test_unknown_format_and_compression():
+    with pytest.raises(ValueError):
+        get_serializer("yaml")
+    with pytest.raises(ValueError):
+        JsonSerializer(compression="lz4").dumps({})
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from field_dispatch import DEFAULT_TECHNICIANS, RoutePlanner, TravelTimeMatrix, site_coords, site_key
+
+ZONES = ["Zone A", "Zone B", "Zone C", "Zone D"]
+
+
+def expected_minutes(matrix, coords):
+    keys = sorted(matrix.index, key=matrix.index.get)
+    xy = np.array([coords[k] for k in keys])
+    delta = xy[:, None, :] - xy[None, :, :]
+    return np.hypot(delta[..., 0], delta[..., 1]) / matrix.speed_kmh * 60.0
+
+
+def points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f"site-{i}": tuple(rng.uniform(0, 20, 2)) for i in range(n)}
+
+
+def test_matrix_grows_by_doubling_and_keeps_entries():
+    matrix = TravelTimeMatrix(initial_capacity=2)
+    sites = points(11)
+    for key, xy in sites.items():
+        matrix.update({key: xy})
+    assert len(matrix._coords) == 16
+    np.testing.assert_allclose(matrix.minutes, expected_minutes(matrix, sites))
+    np.testing.assert_array_equal(matrix.coords, [sites[k] for k in sorted(matrix.index, key=matrix.index.get)])
+
+
+def test_remove_compacts_in_place():
+    matrix = TravelTimeMatrix(initial_capacity=4)
+    sites = points(9)
+    matrix.update(sites)
+    before = matrix.minutes.copy()
+    old_index = dict(matrix.index)
+
+    moved = matrix.remove(["site-0", "site-4", "site-8", "unknown"])
+    assert sorted(matrix.index) == sorted(set(sites) - {"site-0", "site-4", "site-8"})
+    assert moved == {old_index[k]: new for k, new in matrix.index.items()}
+    for a, i in matrix.index.items():
+        for b, j in matrix.index.items():
+            assert matrix.minutes[i, j] == before[old_index[a], old_index[b]]
+    assert matrix.remove(["site-0"]) == {}
+
+    # Freed slots are reused, and moved or re-added sites are recomputed
+    sites = {k: sites[k] for k in matrix.index}
+    sites.update({"site-1": (3.0, 4.0), "new-0": (1.0, 1.0), "new-1": (19.0, 2.0)})
+    assert sorted(matrix.update(sites)) == [matrix.index[k] for k in ("site-1", "new-0", "new-1")]
+    np.testing.assert_allclose(matrix.minutes, expected_minutes(matrix, sites))
+
+
+def work_orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    techs = [t["name"] for t in DEFAULT_TECHNICIANS]
+    # A few jobs share an asset, and so a site
+    assets = rng.integers(0, n - 3, n)
+    return [{
+        "work_order_id": f"WO-{i:03d}",
+        "assigned_to": techs[i % len(techs)],
+        "location": ZONES[a % len(ZONES)],
+        "asset_id": f"A{a:03d}",
+        "fault_code": f"F{i}"
+    } for i, a in enumerate(assets)]
+
+
+# Routes must still point at the sites of the jobs they list, and the matrix must still
+# hold the true travel times between the sites it keeps
+def check(planner, itineraries):
+    keys = {pos: key for key, pos in planner.matrix.index.items()}
+    coords = {key: planner.matrix.coords[pos] for key, pos in planner.matrix.index.items()}
+    np.testing.assert_allclose(planner.matrix.minutes, expected_minutes(planner.matrix, coords))
+    by_id = {wo["work_order_id"]: wo for jobs in planner.jobs.values() for wo in jobs}
+    for tech, route in planner.routes.items():
+        assert keys[route[0]] == planner.depots[tech]
+        stops = itineraries[tech]["stops"]
+        assert len(stops) == len(route) - 1 == len(planner.jobs[tech])
+        for node, stop in zip(route[1:], stops):
+            wo = by_id[stop["work_order_id"]]
+            assert keys[node] == site_key(wo)
+            np.testing.assert_allclose(coords[keys[node]], site_coords(wo["location"], wo["asset_id"]))
+    used = {site_key(wo) for wo in by_id.values()} | set(planner.depots.values())
+    assert set(planner.matrix.index) == used
+
+
+def test_closing_jobs_mid_route_keeps_the_other_stops():
+    planner = RoutePlanner(TravelTimeMatrix(initial_capacity=4))
+    orders = work_orders(24)
+    itineraries = planner.plan(orders, DEFAULT_TECHNICIANS)
+    check(planner, itineraries)
+    order = {tech: [s["work_order_id"] for s in it["stops"]] for tech, it in itineraries.items()}
+
+    # The middle stop of every route, plus one job whose site another open job shares
+    closing = [ids[len(ids) // 2] for ids in order.values()]
+    assets = [wo["asset_id"] for wo in orders]
+    shared = next(wo for wo in orders if assets.count(wo["asset_id"]) > 1 and wo["work_order_id"] not in closing)
+    closing.append(shared["work_order_id"])
+
+    closed = planner.close_jobs(closing)
+    assert sorted(closed) == sorted(closing)
+    after = planner.itineraries()
+    check(planner, after)
+    for tech, ids in order.items():
+        assert [s["work_order_id"] for s in after[tech]["stops"]] == [i for i in ids if i not in closing]
+    assert site_key(shared) in planner.matrix.index
+
+    # New jobs go into the compacted matrix and routes
+    extra = [dict(wo, work_order_id=f"WO-X{i}", asset_id=f"B{i}") for i, wo in enumerate(orders[:6])]
+    check(planner, planner.add_jobs(extra, DEFAULT_TECHNICIANS))
+
+
+def test_next_cycle_evicts_previous_sites():
+    planner = RoutePlanner()
+    planner.plan(work_orders(12, seed=1), DEFAULT_TECHNICIANS)
+    fresh = [dict(wo, asset_id=f"N{i}") for i, wo in enumerate(work_orders(8, seed=2))]
+    itineraries = planner.plan(fresh, DEFAULT_TECHNICIANS)
+    check(planner, itineraries)
+    assert len(planner.matrix.index) == len({site_key(wo) for wo in fresh}) + len(DEFAULT_TECHNICIANS)
+
+
+def test_unassigned_work_is_not_routed():
+    planner = RoutePlanner()
+    orders = work_orders(6)
+    orders[0].update(assigned_to=None, asset_id="UNASSIGNED")
+    planner.plan(orders, DEFAULT_TECHNICIANS)
+    assert orders[0]["work_order_id"] not in {wo["work_order_id"] for jobs in planner.jobs.values() for wo in jobs}
+    assert "UNASSIGNED" not in planner.matrix.index
@@ -0,0 +1,74 @@
+import time
+
+import pandas as pd
+import pytest
+from run_history import RunHistoryStore
+
+DAY = 86400
+COLUMNS = ["asset_id", "snapshots", "rul_first", "rul_last", "rul_change", "degradation_change",
+           "rul_drift_per_month"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunHistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def assets(*rows):
+    return {"AssetIntegrity": [
+        {"Asset ID": a, "Type": "Transformer", "Location": "Zone A", "Age (years)": 10,
+         "Degradation %": deg, "Corrosion Level": 0.2, "RUL (months)": rul, "Status": "OK"}
+        for a, rul, deg in rows
+    ]}
+
+
+def faults(*rows):
+    return {"GridFaults": [
+        {"timestamp": f"2024-06-0{i + 1}T00:00:00", "substation": sub, "event_type": "Trip",
+         "fault_code": code, "load_MW": 10.0, "asset_id": "A1"}
+        for i, (sub, code) in enumerate(rows)
+    ]}
+
+
+def test_repeat_faults_within_the_window(store):
+    now = time.time()
+    store.record_run("old", now - 200 * DAY, {}, faults(("S1", "F2"), ("S1", "F2")))
+    store.record_run("r1", now - 10 * DAY, {}, faults(("S1", "F1"), ("S2", "F1")))
+    store.record_run("r2", now - 1 * DAY, {}, faults(("S1", "F1"), ("S1", "F1"), ("S2", "F3")))
+
+    df = store.repeat_faults(days=90)
+    assert df[["substation", "fault_code", "faults", "runs"]].values.tolist() == [["S1", "F1", 3, 2]]
+    assert df.loc[0, "first_seen"] == "2024-06-01T00:00:00" and df.loc[0, "last_seen"] == "2024-06-02T00:00:00"
+
+    everything = store.repeat_faults(days=365, min_count=1)
+    assert len(everything) == 4 and everything["faults"].is_monotonic_decreasing
+    assert store.repeat_faults(days=365, substation="S2").empty
+    assert store.repeat_faults(days=365, min_count=1, substation="S2")["fault_code"].tolist() == ["F1", "F3"]
+
+
+def test_rul_drift_compares_first_and_last_snapshots(store):
+    now = time.time()
+    store.record_run("old", now - 200 * DAY, {}, assets(("A1", 200.0, 0.0)))
+    store.record_run("r1", now - 61 * DAY, {}, assets(("A1", 100.0, 10.0), ("A2", 50.0, 40.0)))
+    store.record_run("r2", now - 31 * DAY, {}, assets(("A1", 97.0, 12.0), ("A2", 49.0, 41.0), ("A3", 20.0, 70.0)))
+    store.record_run("r3", now - 1 * DAY, {}, assets(("A1", 94.0, 15.0), ("A2", 50.0, 45.0)))
+
+    df = store.rul_drift(days=90)
+    assert df.columns.tolist() == COLUMNS
+    # Most negative change first, ties by asset; a single snapshot has no drift rate
+    assert df["asset_id"].tolist() == ["A1", "A2", "A3"]
+    a1, a2, a3 = (df.iloc[i] for i in range(3))
+    assert (a1["snapshots"], a1["rul_first"], a1["rul_last"]) == (3, 100.0, 94.0)
+    assert a1["rul_change"] == -6 and a1["degradation_change"] == 5
+    assert a1["rul_drift_per_month"] == pytest.approx(-3.0)
+    assert a2["rul_change"] == 0 and a2["rul_drift_per_month"] == 0
+    assert a3["snapshots"] == 1 and a3["rul_change"] == 0 and pd.isna(a3["rul_drift_per_month"])
+
+    one = store.rul_drift(days=365, asset_id="A1")
+    assert one["asset_id"].tolist() == ["A1"] and one.loc[0, "rul_first"] == 200.0
+    assert one.loc[0, "snapshots"] == 4
+
+    empty = store.rul_drift(days=90, asset_id="missing")
+    assert empty.empty and empty.columns.tolist() == COLUMNS
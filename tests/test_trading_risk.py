@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from EnergyTradingAgent import EnergyTradingAgent, RiskEngine
+
+
+def plan(demand_mw, supply_mw, days=5):
+    demand = [{"date": f"2024-06-0{i + 1}", "base_case": demand_mw} for i in range(days)]
+    dispatch = [{"renewables_mw": supply_mw / 2, "backup_mw": supply_mw / 2} for _ in range(days)]
+    return demand, dispatch
+
+
+def test_shocks_follow_the_correlation_matrix():
+    engine = RiskEngine(n_paths=200_000, seed=1)
+    z = engine.shocks()
+    np.testing.assert_allclose(np.corrcoef(z, rowvar=False), engine.correlation, atol=0.01)
+    np.testing.assert_allclose(z.std(axis=0), 1.0, atol=0.01)
+
+    demand, supply, price = engine.simulate(1000.0, 1000.0)
+    assert price.mean() == pytest.approx(engine.price_mean, rel=0.01)
+    assert demand.std() == pytest.approx(1000 * engine.demand_sd, rel=0.02)
+    # Demand errors move with price, supply errors against it
+    assert np.corrcoef(demand, price)[0, 1] > 0.5 and np.corrcoef(supply, price)[0, 1] < -0.3
+
+
+@pytest.mark.parametrize("demand,supply", [(5000, 5000), (5000, 4500), (5000, 5600)])
+def test_cvar_is_at_least_var(demand, supply):
+    risk = RiskEngine(n_paths=20_000, seed=2).evaluate(demand, supply, confidence=0.95)
+    assert risk["cvar_gbp"] >= risk["var_gbp"]
+    assert risk["balance_low_mwh"] <= risk["balance_median_mwh"] <= risk["balance_high_mwh"]
+    assert risk["var_buffer_mwh"] >= 0
+
+
+def test_evaluate_is_reproducible_for_a_seed():
+    assert RiskEngine(n_paths=5000, seed=3).evaluate(5000, 4800) == RiskEngine(n_paths=5000, seed=3).evaluate(5000, 4800)
+
+
+def test_flat_book_holds():
+    agent = EnergyTradingAgent(n_paths=20_000, seed=4)
+    position = agent.calculate_position(*plan(1000, 1000))
+    assert position["recommendation"] == "HOLD" and position["hedge_volume_mwh"] == 0
+    assert 0.4 < position["risk"]["deficit_probability"] < 0.6
+    assert agent.generate_orders(position) == []
+
+
+def test_clear_deficit_buys_and_surplus_sells():
+    agent = EnergyTradingAgent(n_paths=20_000, seed=5)
+    short = agent.calculate_position(*plan(1000, 800))
+    assert short["recommendation"] == f"Buy {short['hedge_volume_mwh']} MWh"
+    # The expected deficit plus the VaR buffer
+    assert short["hedge_volume_mwh"] == short["risk"]["hedge_buy_mwh"] > -short["surplus_deficit_mwh"]
+    order, = agent.generate_orders(short)
+    assert order["type"] == "BUY" and order["volume_mwh"] == short["hedge_volume_mwh"]
+
+    long = agent.calculate_position(*plan(1000, 1200))
+    assert long["recommendation"] == f"Sell {long['hedge_volume_mwh']} MWh"
+    assert 0 < long["hedge_volume_mwh"] < long["surplus_deficit_mwh"]
+    order, = agent.generate_orders(long)
+    assert order["type"] == "SELL"
+
+
+def test_small_or_unlikely_imbalances_hold():
+    # A likely deficit too small to trade
+    agent = EnergyTradingAgent(n_paths=20_000, min_trade_mwh=10_000, seed=6)
+    position = agent.calculate_position(*plan(1000, 800))
+    assert position["risk"]["deficit_probability"] > 0.9 and position["recommendation"] == "HOLD"
+
+    # A marginal deficit trades at the default threshold but not at a stricter one
+    marginal = plan(1000, 985)
+    assert EnergyTradingAgent(n_paths=20_000, seed=6).calculate_position(*marginal)["recommendation"].startswith("Buy")
+    agent = EnergyTradingAgent(n_paths=20_000, deficit_threshold=0.9, seed=6)
+    position = agent.calculate_position(*marginal)
+    assert 0.6 < position["risk"]["deficit_probability"] < 0.9 and position["recommendation"] == "HOLD"
+
+    assert EnergyTradingAgent(seed=6).calculate_position([], [])["recommendation"] == "HOLD"
@@ -0,0 +1,151 @@
+import os
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# -------------------------
+# Prices (per 1K tokens) and deployments
+# -------------------------
+def _price(name, default):
+    return float(os.getenv(name, default))
+
+
+def deployment_prices():
+    primary = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+    fallback = os.getenv("AZURE_OPENAI_FALLBACK_DEPLOYMENT_NAME")
+    prices = {primary: (_price("GENAI_PROMPT_PRICE_PER_1K", 0.005), _price("GENAI_COMPLETION_PRICE_PER_1K", 0.015))}
+    if fallback:
+        prices[fallback] = (_price("GENAI_FALLBACK_PROMPT_PRICE_PER_1K", 0.00015),
+                            _price("GENAI_FALLBACK_COMPLETION_PRICE_PER_1K", 0.0006))
+    return prices
+
+
+def estimate_tokens(messages):
+    return sum(len(m.get("content", "")) for m in messages) // 4 + 4 * len(messages)
+
+
+# -------------------------
+# Usage ledger
+# -------------------------
+class UsageLedger:
+    def __init__(self, max_runs=200):
+        self.max_runs = max_runs
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, run_id, agent, model, prompt_tokens, completion_tokens, cost):
+        with self._lock:
+            run = self._runs.setdefault(run_id or "adhoc", {})
+            self._runs.move_to_end(run_id or "adhoc")
+            row = run.setdefault(agent or "unknown", {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "models": {}
+            })
+            row["calls"] += 1
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            row["cost"] += cost
+            row["models"][model] = row["models"].get(model, 0) + 1
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+
+    def run_summary(self, run_id):
+        with self._lock:
+            by_agent = {a: dict(r, models=dict(r["models"])) for a, r in self._runs.get(run_id, {}).items()}
+        totals = {
+            "calls": sum(r["calls"] for r in by_agent.values()),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in by_agent.values()),
+            "completion_tokens": sum(r["completion_tokens"] for r in by_agent.values()),
+            "cost": round(sum(r["cost"] for r in by_agent.values()), 6)
+        }
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        return {"run_id": run_id, "totals": totals, "by_agent": by_agent}
+
+
+LEDGER = UsageLedger()
+
+
+# -------------------------
+# Per-run budget
+# -------------------------
+_active = contextvars.ContextVar("run_budget", default=None)
+
+
+class RunBudget:
+    def __init__(self, run_id, max_tokens=None, max_cost=None, default_max_tokens=600,
+                 min_completion_tokens=64, shrink_below=0.5, downgrade_below=0.35, skip_low_below=0.15):
+        self.run_id = run_id
+        self.max_tokens = max_tokens or int(os.getenv("ORCHESTRATOR_RUN_TOKEN_BUDGET", 60000))
+        self.max_cost = max_cost or float(os.getenv("ORCHESTRATOR_RUN_COST_BUDGET", 1.0))
+        self.default_max_tokens = default_max_tokens
+        self.min_completion_tokens = min_completion_tokens
+        # Fractions of the budget left at which each measure kicks in
+        self.shrink_below = shrink_below
+        self.downgrade_below = downgrade_below
+        self.skip_low_below = skip_low_below
+        self.prices = deployment_prices()
+        self.fallback_model = os.getenv("AZURE_OPENAI_FALLBACK_DEPLOYMENT_NAME")
+        self.used_tokens = 0
+        self.used_cost = 0.0
+        self.skipped = 0
+        self.downgraded = 0
+        self._lock = threading.Lock()
+
+    def remaining_fraction(self):
+        with self._lock:
+            return max(0.0, min(1 - self.used_tokens / self.max_tokens, 1 - self.used_cost / self.max_cost))
+
+    # Decide (model, max_tokens) for a call, or None to skip it
+    def plan(self, messages, model, max_tokens, priority):
+        left = self.remaining_fraction()
+        if left <= 0 or (priority == "low" and left < self.skip_low_below):
+            with self._lock:
+                self.skipped += 1
+            return None
+
+        if left < self.downgrade_below and self.fallback_model and model != self.fallback_model:
+            model = self.fallback_model
+            with self._lock:
+                self.downgraded += 1
+
+        requested = max_tokens or self.default_max_tokens
+        if left < self.shrink_below:
+            requested = max(self.min_completion_tokens, int(requested * left / self.shrink_below))
+        with self._lock:
+            room = self.max_tokens - self.used_tokens - estimate_tokens(messages)
+        if room < self.min_completion_tokens:
+            with self._lock:
+                self.skipped += 1
+            return None
+        return model, min(requested, room)
+
+    def cost(self, model, prompt_tokens, completion_tokens):
+        prompt_price, completion_price = self.prices.get(model, next(iter(self.prices.values())))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+    def charge(self, tokens, cost):
+        with self._lock:
+            self.used_tokens += tokens
+            self.used_cost += cost
+
+    def summary(self):
+        return {
+            "max_tokens": self.max_tokens,
+            "used_tokens": self.used_tokens,
+            "max_cost": self.max_cost,
+            "used_cost": round(self.used_cost, 6),
+            "downgraded_calls": self.downgraded,
+            "skipped_calls": self.skipped
+        }
+
+    @contextmanager
+    def activate(self):
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+
+def current_budget():
+    return _active.get()